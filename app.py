@@ -4,8 +4,13 @@ Aplicação Flask para automação de Histórias de Usuário.
 
 import os
 import json
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file, Response, g
 from werkzeug.exceptions import RequestEntityTooLarge
 
 from config import config
@@ -13,6 +18,12 @@ from services import LLMService, EmailService, FileService, GenerationService, R
 from prompts import UserStoryPrompts
 from database import init_db, SessionLocal
 from models import TranscriptionJob, ProcessingArtifact, JobStatus
+from services.usage_tracker import usage_context
+from services.timing import current_request_timings, end_request_timings, get_shared_timing_registry, start_request_timings, timed
+from services.transcript_compactor import get_shared_transcript_compactor
+from services.result_cache import get_shared_result_cache, make_result_key
+from services.extraction_cache import extractor_signature
+from services.llm_service import DEFAULT_CHAT_MODEL
 
 
 def create_app() -> Flask:
@@ -50,6 +61,349 @@ def create_app() -> Flask:
         except Exception as e:
             print(f"Aviso: Não foi possível inicializar o monitor de repositório: {str(e)}")
     
+    # Ramo do resumo quando output_type='both' (roda em paralelo com as HUs)
+    output_executor = ThreadPoolExecutor(
+        max_workers=max(config.LLM_MAX_IN_FLIGHT, 2),
+        thread_name_prefix="output-branch"
+    )
+    
+    def _run_branch(label: str, generate) -> Dict[str, Any]:
+        """
+        Executa um ramo de geração isolando falhas e medindo o tempo.
+        
+        Args:
+            label: Nome do ramo para os logs ('HUs' ou 'resumo')
+            generate: Função sem argumentos que retorna o resultado do GenerationService
+            
+        Returns:
+            Resultado do ramo, com 'elapsed_ms'
+        """
+        started = time.perf_counter()
+        try:
+            result = generate()
+        except Exception as e:
+            result = {'success': False, 'error': f'Erro na geração de {label}: {str(e)}'}
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+    
+    def _compaction_requested(transcript: bool) -> bool:
+        """
+        Indica se o texto da requisição atual deve ser compactado.
+        
+        Só transcrições (áudio transcrito, transcription_text, anotações do Gemini)
+        são compactadas; documentos extraídos (PDF, DOCX, TXT enviados) nunca: a
+        compactação remove números e rótulos repetidos que fazem parte dos requisitos.
+        
+        Args:
+            transcript: Se o texto de entrada é uma transcrição
+            
+        Returns:
+            True se a transcrição deve ser compactada (compact_transcript, padrão TRANSCRIPT_COMPACTION_ENABLED)
+        """
+        if not transcript:
+            return False
+        default = 'true' if config.TRANSCRIPT_COMPACTION_ENABLED else 'false'
+        return request.values.get('compact_transcript', default).strip().lower() not in ('false', '0', 'no', 'off')
+    
+    def _reuse_requested() -> bool:
+        """Indica se a requisição atual aceita resultados já gerados para o mesmo arquivo (reuse_results, padrão true)."""
+        return request.values.get('reuse_results', 'true').strip().lower() not in ('false', '0', 'no', 'off')
+    
+    def _generation_params(extractor: str, compact: bool, endpoint: str, max_attempts: int) -> Dict[str, Any]:
+        """
+        Parâmetros que mudam as HUs geradas para um arquivo (os mesmos de make_result_key).
+        
+        Gravados no artefato JSON dos jobs; um artefato só é reaproveitado por
+        uma requisição com exatamente os mesmos parâmetros.
+        """
+        return {
+            'extractor': extractor,
+            'compact': bool(compact),
+            'endpoint': endpoint,
+            'max_attempts': max_attempts,
+            'model': DEFAULT_CHAT_MODEL
+        }
+    
+    def _processed_job_results(file_hash: str, params: Dict[str, Any]):
+        """
+        Resultados do artefato JSON de um job já processado com o mesmo arquivo.
+        
+        Args:
+            file_hash: SHA-256 do arquivo (comparado com TranscriptionJob.source_hash)
+            params: Parâmetros da requisição (_generation_params); artefatos gerados
+                com outros parâmetros (extrator, compactação, endpoint, tentativas,
+                modelo), ou sem o registro deles, não são reaproveitados
+            
+        Returns:
+            Resultados no formato de _generate_outputs (apenas HUs) ou None
+        """
+        session = SessionLocal()
+        try:
+            artifact = (
+                session.query(ProcessingArtifact)
+                .join(TranscriptionJob)
+                .filter(
+                    TranscriptionJob.source_hash == file_hash,
+                    TranscriptionJob.status == JobStatus.PROCESSED,
+                    ProcessingArtifact.type == 'json'
+                )
+                .order_by(ProcessingArtifact.created_at.desc())
+                .first()
+            )
+            if artifact is None:
+                return None
+            with open(artifact.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not data.get('user_stories') or data.get('generation_params') != params:
+                return None
+            return {
+                'user_stories': data['user_stories'],
+                'generation_info': {**(data.get('generation_info') or {}), 'reused_from': 'job_artifact', 'job_id': artifact.job_id}
+            }
+        except Exception as e:
+            print(f"Aviso: não foi possível consultar jobs já processados: {str(e)}")
+            return None
+        finally:
+            session.close()
+    
+    def _reused_results(file_hash: str, params: Dict[str, Any], result_key: str, output_type: str, observations: str):
+        """
+        Busca resultados já gerados para o mesmo arquivo.
+        
+        Consulta o cache de resultados e, para HUs sem observações, o artefato
+        de um job do monitor que processou o mesmo arquivo.
+        
+        Args:
+            file_hash: SHA-256 do arquivo enviado
+            params: Parâmetros da geração (_generation_params)
+            result_key: Chave gerada por make_result_key
+            output_type: 'hus', 'summary' ou 'both'
+            observations: Observações do usuário (pode ser vazio)
+            
+        Returns:
+            Resultados no formato de _generate_outputs ou None
+        """
+        result_cache = get_shared_result_cache()
+        results = result_cache.get(result_key)
+        if results is not None:
+            for info_key in ('generation_info', 'summary_info'):
+                if isinstance(results.get(info_key), dict):
+                    results[info_key]['reused_from'] = 'result_cache'
+            return results
+        if output_type == 'hus' and not observations and result_cache.enabled:
+            results = _processed_job_results(file_hash, params)
+            if results is not None:
+                result_cache.record_job_artifact()
+                result_cache.set(result_key, {**results, 'timings': {}})
+            return results
+        return None
+    
+    def _compact_text(text: str, enabled: bool):
+        """
+        Compacta o texto de entrada antes dos prompts.
+        
+        Args:
+            text: Texto extraído ou transcrição
+            enabled: Se a compactação está ligada para esta requisição
+            
+        Returns:
+            Tupla (texto para os prompts, relatório da compactação ou None se desligada)
+        """
+        if not enabled or not text:
+            return text, None
+        with timed("compaction"):
+            report = get_shared_transcript_compactor().compact(text)
+        compacted = report.pop('text')
+        print(f"[DEBUG] Transcrição compactada: {report['original_chars']} -> {report['compacted_chars']} caracteres (~{report['tokens_removed']} tokens removidos)")
+        return compacted, report
+    
+    def _generate_outputs(text: str, output_type: str, provider: str, max_attempts: int, observations: str, on_event=None, endpoint: str = None, compact: bool = True, file_hash: str = None, extractor: str = None, reuse: bool = True):
+        """
+        Gera HUs e/ou resumo conforme o tipo de saída solicitado.
+        
+        Com output_type='both', HUs e resumo são gerados ao mesmo tempo; a falha
+        de um ramo não interrompe o outro.
+        
+        Args:
+            text: Texto de entrada (documento extraído ou transcrição)
+            output_type: 'hus', 'summary' ou 'both'
+            provider: Provedor da LLM
+            max_attempts: Número máximo de tentativas de auto-correção
+            observations: Observações do usuário (pode ser vazio)
+            on_event: Callback de progresso/streaming (opcional; chamado pelos dois ramos)
+            endpoint: Endpoint de origem; define se as HUs usam o modo especulativo (SPECULATIVE_ENDPOINTS)
+            compact: Se o texto é compactado antes dos prompts (relatório em 'compaction'
+                de generation_info/summary_info)
+            file_hash: SHA-256 do arquivo enviado (opcional); com ele, os resultados
+                são salvos e um reenvio do mesmo arquivo não gera de novo
+                ('reused_from' em generation_info/summary_info)
+            extractor: Assinatura do extrator do arquivo (extractor_signature); resultados
+                gerados a partir de outra versão do texto extraído não são reaproveitados
+            reuse: Se resultados já gerados para o arquivo podem ser reaproveitados
+            
+        Returns:
+            Tupla (results, failed_result). failed_result é preenchido quando a
+            única saída solicitada falhou e deve ser retornado com status 500.
+            results inclui 'timings' (ms por ramo) e, se um dos ramos de 'both'
+            falhou, 'output_errors'.
+        """
+        started = time.perf_counter()
+        result_key = None
+        if file_hash:
+            result_key = make_result_key(file_hash, extractor, output_type, observations, compact, max_attempts, endpoint, DEFAULT_CHAT_MODEL)
+            if reuse:
+                with timed("results.cached"):
+                    reused = _reused_results(file_hash, _generation_params(extractor, compact, endpoint, max_attempts), result_key, output_type, observations)
+                if reused is not None:
+                    print(f"[DEBUG] Arquivo já processado ({file_hash[:12]}): resultados reaproveitados, geração ignorada")
+                    reused['timings'] = {'total_ms': round((time.perf_counter() - started) * 1000, 1)}
+                    return reused, None
+        
+        results = {'timings': {}}
+        text, compaction = _compact_text(text, compact)
+        
+        def generate_hus() -> Dict[str, Any]:
+            return generation_service.generate_user_stories(
+                text=text,
+                provider=provider,
+                max_attempts=max_attempts,
+                observations=observations if observations else None,
+                on_event=on_event,
+                endpoint=endpoint
+            )
+        
+        def generate_summary() -> Dict[str, Any]:
+            return generation_service.generate_summary(
+                text=text,
+                provider=provider,
+                observations=observations if observations else None,
+                on_event=on_event
+            )
+        
+        summary_future = None
+        if output_type == 'both':
+            # Cópia do contexto: o ramo do resumo mantém o job/colaborador da contabilização de tokens
+            print(f"[DEBUG] Gerando HUs e resumo em paralelo (output_type: {output_type})")
+            summary_future = output_executor.submit(
+                contextvars.copy_context().run, _run_branch, 'resumo', generate_summary
+            )
+        
+        # Gerar HUs se solicitado
+        if output_type in ['hus', 'both']:
+            print(f"[DEBUG] Gerando HUs (output_type: {output_type})")
+            generation_result = _run_branch('HUs', generate_hus)
+            results['timings']['user_stories_ms'] = generation_result['elapsed_ms']
+            
+            if not generation_result['success']:
+                error_msg = generation_result.get('error', 'Erro desconhecido')
+                print(f"[DEBUG] Erro na geração de HUs: {error_msg}")
+                # Se apenas HUs foram solicitadas, retornar erro
+                if output_type == 'hus':
+                    return results, generation_result
+                # Se ambos foram solicitados, continuar sem HUs
+                print(f"[DEBUG] Continuando sem HUs (output_type: {output_type})")
+                results.setdefault('output_errors', {})['user_stories'] = error_msg
+            else:
+                results['user_stories'] = generation_result['content']
+                results['generation_info'] = generation_result
+                if compaction is not None:
+                    generation_result['compaction'] = compaction
+                print(f"[DEBUG] HUs geradas com sucesso: {len(generation_result['content'])} caracteres")
+        else:
+            print(f"[DEBUG] HUs NÃO serão geradas (output_type: {output_type})")
+        
+        # Gerar resumo se solicitado
+        if output_type in ['summary', 'both']:
+            if summary_future is not None:
+                summary_result = summary_future.result()
+            else:
+                print(f"[DEBUG] Gerando resumo (output_type: {output_type})")
+                summary_result = _run_branch('resumo', generate_summary)
+            results['timings']['summary_ms'] = summary_result['elapsed_ms']
+            
+            if not summary_result['success']:
+                error_msg = summary_result.get('error', 'Erro desconhecido')
+                print(f"[DEBUG] Erro na geração de resumo: {error_msg}")
+                # Se apenas resumo foi solicitado, retornar erro
+                if output_type == 'summary':
+                    return results, summary_result
+                # Se ambos foram solicitados, continuar sem resumo
+                print(f"[DEBUG] Continuando sem resumo (output_type: {output_type})")
+                results.setdefault('output_errors', {})['summary'] = error_msg
+            else:
+                results['summary'] = summary_result['content']
+                results['summary_info'] = summary_result
+                if compaction is not None:
+                    summary_result['compaction'] = compaction
+                print(f"[DEBUG] Resumo gerado com sucesso: {len(summary_result['content'])} caracteres")
+        else:
+            print(f"[DEBUG] Resumo NÃO será gerado (output_type: {output_type})")
+        
+        results['timings']['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        if result_key is not None:
+            get_shared_result_cache().set(result_key, results)
+        return results, None
+    
+    def _attach_stage_timings(data: Dict[str, Any]) -> None:
+        """
+        Inclui em generation_info o detalhamento de tempos por etapa da requisição atual.
+        
+        Args:
+            data: Corpo da resposta (alterado no lugar se tiver generation_info)
+        """
+        timings = current_request_timings()
+        if timings is not None and isinstance(data.get('generation_info'), dict):
+            data['generation_info']['stage_timings'] = timings.snapshot()
+    
+    @app.before_request
+    def _start_stage_timings():
+        """Inicia o detalhamento de tempos por etapa da requisição."""
+        g.stage_timings_token = start_request_timings()
+    
+    @app.after_request
+    def _report_stage_timings(response):
+        """Adiciona o detalhamento de tempos em generation_info e no cabeçalho Server-Timing."""
+        timings = current_request_timings()
+        if timings is None:
+            return response
+        if response.is_json and not response.is_streamed:
+            data = response.get_json(silent=True)
+            if isinstance(data, dict) and isinstance(data.get('generation_info'), dict):
+                _attach_stage_timings(data)
+                response.set_data(app.json.dumps(data))
+        header = timings.server_timing_header()
+        if header:
+            response.headers['Server-Timing'] = header
+        return response
+    
+    @app.after_request
+    def _retry_after_header(response):
+        """Repete no cabeçalho Retry-After o retry_after das respostas 503 (pool de CPU cheio)."""
+        if response.status_code == 503 and response.is_json and not response.is_streamed:
+            data = response.get_json(silent=True)
+            if isinstance(data, dict) and data.get('retry_after'):
+                response.headers['Retry-After'] = str(data['retry_after'])
+        return response
+    
+    @app.teardown_request
+    def _end_stage_timings(error=None):
+        """Encerra o detalhamento de tempos da requisição."""
+        token = g.pop('stage_timings_token', None)
+        if token is not None:
+            try:
+                end_request_timings(token)
+            except ValueError:
+                # Token criado em outro contexto (ex.: requisição encerrada em outra thread)
+                pass
+    
+    def _failure_status(result: Dict[str, Any], default: int = 500) -> int:
+        """Status HTTP de uma operação que falhou: 413 para entrada acima do orçamento do modelo, 503 com o pool de CPU cheio, default nos demais casos."""
+        return {'prompt_too_large': 413, 'cpu_pool_busy': 503}.get(result.get('error_type'), default)
+    
+    def _has_outputs(results: Dict[str, Any]) -> bool:
+        """Indica se ao menos uma saída (HUs ou resumo) foi gerada."""
+        return 'user_stories' in results or 'summary' in results
+    
     @app.route('/')
     def index():
         """Página principal da aplicação."""
@@ -115,10 +469,10 @@ def create_app() -> Flask:
                 return jsonify(save_result), 400
             
             try:
-                # Extrair texto do arquivo
-                text_result = file_service.extract_text_from_file(save_result['file_path'])
+                # Extrair texto do arquivo (hash do upload: reenvios saem do cache de extrações)
+                text_result = file_service.extract_text_from_file(save_result['file_path'], file_hash=save_result['sha256'])
                 if not text_result['success']:
-                    return jsonify(text_result), 400
+                    return jsonify(text_result), _failure_status(text_result, 400)
                 
                 extracted_text = text_result['text']
                 
@@ -141,59 +495,23 @@ def create_app() -> Flask:
                 print(f"[DEBUG] output_type é 'hus'? {output_type == 'hus'}")
                 print(f"[DEBUG] output_type é 'both'? {output_type == 'both'}")
                 
-                results = {}
-                
-                # Gerar HUs se solicitado
-                if output_type in ['hus', 'both']:
-                    print(f"[DEBUG] Gerando HUs (output_type: {output_type})")
-                    generation_result = generation_service.generate_with_auto_correction(
-                        text=extracted_text,
-                        provider=provider,
-                        max_attempts=max_attempts,
-                        observations=observations if observations else None
-                    )
-                    
-                    if not generation_result['success']:
-                        error_msg = generation_result.get('error', 'Erro desconhecido')
-                        print(f"[DEBUG] Erro na geração de HUs: {error_msg}")
-                        # Se apenas HUs foram solicitadas, retornar erro
-                        if output_type == 'hus':
-                            return jsonify(generation_result), 500
-                        # Se ambos foram solicitados, continuar sem HUs
-                        print(f"[DEBUG] Continuando sem HUs (output_type: {output_type})")
-                    else:
-                        results['user_stories'] = generation_result['content']
-                        results['generation_info'] = generation_result
-                        print(f"[DEBUG] HUs geradas com sucesso: {len(generation_result['content'])} caracteres")
-                else:
-                    print(f"[DEBUG] HUs NÃO serão geradas (output_type: {output_type})")
-                
-                # Gerar resumo se solicitado
-                if output_type in ['summary', 'both']:
-                    print(f"[DEBUG] Gerando resumo (output_type: {output_type})")
-                    summary_result = generation_service.generate_summary(
-                        text=extracted_text,
-                        provider=provider,
-                        observations=observations if observations else None
-                    )
-                    
-                    if not summary_result['success']:
-                        error_msg = summary_result.get('error', 'Erro desconhecido')
-                        print(f"[DEBUG] Erro na geração de resumo: {error_msg}")
-                        # Se apenas resumo foi solicitado, retornar erro
-                        if output_type == 'summary':
-                            return jsonify(summary_result), 500
-                        # Se ambos foram solicitados, continuar sem resumo
-                        print(f"[DEBUG] Continuando sem resumo (output_type: {output_type})")
-                    else:
-                        results['summary'] = summary_result['content']
-                        results['summary_info'] = summary_result
-                        print(f"[DEBUG] Resumo gerado com sucesso: {len(summary_result['content'])} caracteres")
-                else:
-                    print(f"[DEBUG] Resumo NÃO será gerado (output_type: {output_type})")
+                results, failed_result = _generate_outputs(
+                    text=extracted_text,
+                    output_type=output_type,
+                    provider=provider,
+                    max_attempts=max_attempts,
+                    observations=observations,
+                    endpoint='process',
+                    compact=_compaction_requested(transcript=False),
+                    file_hash=save_result['sha256'],
+                    extractor=extractor_signature(file_extension),
+                    reuse=_reuse_requested()
+                )
+                if failed_result is not None:
+                    return jsonify(failed_result), _failure_status(failed_result)
                 
                 # Se nenhum resultado foi gerado, retornar erro
-                if not results:
+                if not _has_outputs(results):
                     return jsonify({
                         'success': False,
                         'error': 'Nenhum tipo de saída foi gerado. Verifique o parâmetro output_type.'
@@ -214,7 +532,7 @@ def create_app() -> Flask:
                     )
                     
                     if not doc_result['success']:
-                        return jsonify(doc_result), 500
+                        return jsonify(doc_result), _failure_status(doc_result)
                     
                     # Enviar por e-mail com anexo
                     if email:
@@ -259,7 +577,8 @@ def create_app() -> Flask:
                     response_data = {
                         'success': True,
                         'extraction_info': text_result,
-                        'original_text': extracted_text  # Texto original para regeneração
+                        'original_text': extracted_text,  # Texto original para regeneração
+                        'source_type': 'document'  # Reenviado na regeneração (documentos não são compactados)
                     }
                     
                     if user_stories:
@@ -270,6 +589,10 @@ def create_app() -> Flask:
                         response_data['summary'] = summary
                         response_data['summary_info'] = results.get('summary_info', {})
                     
+                    response_data['timings'] = results['timings']
+                    if 'output_errors' in results:
+                        response_data['output_errors'] = results['output_errors']
+                    
                     return jsonify(response_data)
                 
                 else:
@@ -324,58 +647,19 @@ def create_app() -> Flask:
             print(f"[DEBUG] output_type é 'hus'? {output_type == 'hus'}")
             print(f"[DEBUG] output_type é 'both'? {output_type == 'both'}")
             
-            results = {}
-            
-            # Gerar HUs se solicitado
-            if output_type in ['hus', 'both']:
-                print(f"[DEBUG] Gerando HUs (output_type: {output_type})")
-                generation_result = generation_service.generate_with_auto_correction(
-                    text=transcription_text,
-                    provider=provider,
-                    max_attempts=max_attempts,
-                    observations=observations if observations else None
-                )
-                
-                if not generation_result['success']:
-                    error_msg = generation_result.get('error', 'Erro desconhecido')
-                    print(f"[DEBUG] Erro na geração de HUs: {error_msg}")
-                    # Se apenas HUs foram solicitadas, retornar erro
-                    if output_type == 'hus':
-                        return jsonify(generation_result), 500
-                    # Se ambos foram solicitados, continuar sem HUs
-                    print(f"[DEBUG] Continuando sem HUs (output_type: {output_type})")
-                else:
-                    results['user_stories'] = generation_result['content']
-                    results['generation_info'] = generation_result
-                    print(f"[DEBUG] HUs geradas com sucesso: {len(generation_result['content'])} caracteres")
-            else:
-                print(f"[DEBUG] HUs NÃO serão geradas (output_type: {output_type})")
-            
-            # Gerar resumo se solicitado
-            if output_type in ['summary', 'both']:
-                print(f"[DEBUG] Gerando resumo (output_type: {output_type})")
-                summary_result = generation_service.generate_summary(
-                    text=transcription_text,
-                    provider=provider,
-                    observations=observations if observations else None
-                )
-                
-                if not summary_result['success']:
-                    error_msg = summary_result.get('error', 'Erro desconhecido')
-                    print(f"[DEBUG] Erro na geração de resumo: {error_msg}")
-                    # Se apenas resumo foi solicitado, retornar erro
-                    if output_type == 'summary':
-                        return jsonify(summary_result), 500
-                    # Se ambos foram solicitados, continuar sem resumo
-                    print(f"[DEBUG] Continuando sem resumo (output_type: {output_type})")
-                else:
-                    results['summary'] = summary_result['content']
-                    results['summary_info'] = summary_result
-                    print(f"[DEBUG] Resumo gerado com sucesso: {len(summary_result['content'])} caracteres")
-            else:
-                print(f"[DEBUG] Resumo NÃO será gerado (output_type: {output_type})")
+            results, failed_result = _generate_outputs(
+                text=transcription_text,
+                output_type=output_type,
+                provider=provider,
+                max_attempts=max_attempts,
+                observations=observations,
+                endpoint='process-transcription',
+                compact=_compaction_requested(transcript=True)
+            )
+            if failed_result is not None:
+                return jsonify(failed_result), _failure_status(failed_result)
             
-            if not results:
+            if not _has_outputs(results):
                 return jsonify({
                     'success': False,
                     'error': 'Nenhum tipo de saída foi gerado. Verifique o parâmetro output_type.'
@@ -386,7 +670,8 @@ def create_app() -> Flask:
             response_data = {
                 'success': True,
                 'message': 'Processamento concluído com sucesso',
-                'original_text': transcription_text  # IMPORTANTE: Incluir texto original para regeneração
+                'original_text': transcription_text,  # IMPORTANTE: Incluir texto original para regeneração
+                'source_type': 'transcript'
             }
             
             if 'user_stories' in results:
@@ -397,6 +682,10 @@ def create_app() -> Flask:
                 response_data['summary'] = results['summary']
                 response_data['summary_info'] = results['summary_info']
             
+            response_data['timings'] = results['timings']
+            if 'output_errors' in results:
+                response_data['output_errors'] = results['output_errors']
+            
             return jsonify(response_data)
             
         except Exception as e:
@@ -405,6 +694,158 @@ def create_app() -> Flask:
                 'error': f'Erro interno: {str(e)}'
             }), 500
 
+    @app.route('/api/process-stream', methods=['POST'])
+    def process_stream():
+        """
+        Versão em streaming (Server-Sent Events) de /api/process e /api/process-transcription.
+        
+        Aceita um arquivo ('file') ou uma transcrição revisada ('transcription_text')
+        e emite os eventos:
+            - stage: início de uma etapa (extraction, generation, validation, summary)
+            - token: trecho de texto gerado, repassado assim que chega da LLM
+            - result: JSON final, idêntico ao preview retornado pelos endpoints síncronos
+        
+        Returns:
+            Resposta text/event-stream
+        """
+        provider = 'zello'
+        observations = request.form.get('observations', '').strip()
+        output_type = request.form.get('output_type', 'hus').strip().lower()
+        if output_type not in ['hus', 'summary', 'both']:
+            print(f"[DEBUG] ⚠️ output_type inválido recebido: '{output_type}', usando padrão 'hus'")
+            output_type = 'hus'
+        max_attempts = int(request.form.get('max_attempts', '3'))
+        transcription_text = request.form.get('transcription_text', '').strip()
+        file = request.files.get('file')
+        # Arquivos de áudio voltam para revisão; os demais arquivos são documentos
+        compact = _compaction_requested(transcript=file is None or not file.filename)
+        reuse = _reuse_requested()
+        
+        # Upload é salvo ainda no contexto da requisição; o restante roda em background
+        save_result = None
+        is_audio = False
+        extractor = None
+        if file is not None and file.filename:
+            file_extension = file_service.get_file_extension(file.filename)
+            is_audio = file_extension in ['mp3', 'wav']
+            extractor = extractor_signature(file_extension)
+            save_result = file_service.save_file(file)
+            if not save_result['success']:
+                return jsonify(save_result), 400
+        elif not transcription_text:
+            return jsonify({
+                'success': False,
+                'error': 'Nenhum arquivo ou transcrição fornecido'
+            }), 400
+        
+        events: "queue.Queue" = queue.Queue()
+        
+        def emit(event: Dict[str, Any]) -> None:
+            events.put(event)
+        
+        def worker() -> None:
+            try:
+                if save_result is not None:
+                    try:
+                        emit({'type': 'stage', 'stage': 'extraction'})
+                        text_result = file_service.extract_text_from_file(save_result['file_path'], file_hash=save_result['sha256'])
+                    finally:
+                        file_service.delete_file(save_result['file_path'])
+                    if not text_result['success']:
+                        emit({'type': 'result', 'data': text_result})
+                        return
+                    source_text = text_result['text']
+                    if is_audio:
+                        emit({'type': 'result', 'data': {
+                            'success': True,
+                            'requires_review': True,
+                            'transcription': source_text,
+                            'file_path': save_result['file_path'],
+                            'extraction_info': text_result,
+                            'message': 'Transcrição concluída. Revise e confirme para gerar HUs/Resumo.'
+                        }})
+                        return
+                    response_data = {
+                        'success': True,
+                        'extraction_info': text_result,
+                        'original_text': source_text,  # Texto original para regeneração
+                        'source_type': 'document'
+                    }
+                else:
+                    source_text = transcription_text
+                    response_data = {
+                        'success': True,
+                        'message': 'Processamento concluído com sucesso',
+                        'original_text': source_text,  # Texto original para regeneração
+                        'source_type': 'transcript'
+                    }
+                
+                results, failed_result = _generate_outputs(
+                    text=source_text,
+                    output_type=output_type,
+                    provider=provider,
+                    max_attempts=max_attempts,
+                    observations=observations,
+                    on_event=emit,
+                    endpoint='process-stream',
+                    compact=compact,
+                    file_hash=save_result['sha256'] if save_result is not None else None,
+                    extractor=extractor,
+                    reuse=reuse
+                )
+                if failed_result is not None:
+                    emit({'type': 'result', 'data': failed_result})
+                    return
+                if not _has_outputs(results):
+                    emit({'type': 'result', 'data': {
+                        'success': False,
+                        'error': 'Nenhum tipo de saída foi gerado. Verifique o parâmetro output_type.'
+                    }})
+                    return
+                
+                if 'user_stories' in results:
+                    response_data['user_stories'] = results['user_stories']
+                    response_data['generation_info'] = results['generation_info']
+                if 'summary' in results:
+                    response_data['summary'] = results['summary']
+                    response_data['summary_info'] = results['summary_info']
+                
+                response_data['timings'] = results['timings']
+                if 'output_errors' in results:
+                    response_data['output_errors'] = results['output_errors']
+                _attach_stage_timings(response_data)
+                emit({'type': 'result', 'data': response_data})
+            except Exception as e:
+                emit({'type': 'result', 'data': {
+                    'success': False,
+                    'error': f'Erro interno: {str(e)}'
+                }})
+            finally:
+                events.put(None)
+        
+        # Cópia do contexto: o worker registra os tempos por etapa no detalhamento desta requisição
+        threading.Thread(target=contextvars.copy_context().run, args=(worker,), daemon=True).start()
+        
+        def event_stream():
+            while True:
+                try:
+                    event = events.get(timeout=15)
+                except queue.Empty:
+                    # Comentário SSE mantém a conexão viva durante validações longas
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                event_type = event.pop('type')
+                payload = event.get('data', event)
+                yield f"event: {event_type}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+        
+        return Response(
+            event_stream(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
     @app.route('/api/regenerate-hus', methods=['POST'])
     def regenerate_hus():
         """
@@ -419,6 +860,8 @@ def create_app() -> Flask:
             current_hus = request.form.get('current_hus', '')
             provider = 'zello'
             max_attempts = int(request.form.get('max_attempts', '3'))
+            # force_fresh=true ignora o cache de completions e força uma nova amostra
+            force_fresh = request.form.get('force_fresh', 'false').strip().lower() == 'true'
             
             print(f"[DEBUG] ========== REGENERANDO HUs ==========")
             print(f"[DEBUG] Tamanho do texto original: {len(original_text)} caracteres")
@@ -445,15 +888,20 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
             
             print(f"[DEBUG] Observações contextualizadas: {len(contextualized_observations) if contextualized_observations else 0} caracteres")
             
-            generation_result = generation_service.generate_with_auto_correction(
-                text=original_text,
+            prompt_text, compaction = _compact_text(original_text, _compaction_requested(transcript=request.form.get('source_type') == 'transcript'))
+            generation_result = generation_service.generate_user_stories(
+                text=prompt_text,
                 provider=provider,
                 max_attempts=max_attempts,
-                observations=contextualized_observations
+                observations=contextualized_observations,
+                use_cache=not force_fresh,
+                endpoint='regenerate-hus'
             )
             
             if not generation_result['success']:
-                return jsonify(generation_result), 500
+                return jsonify(generation_result), _failure_status(generation_result)
+            if compaction is not None:
+                generation_result['compaction'] = compaction
             
             return jsonify({
                 'success': True,
@@ -566,8 +1014,10 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
             if not doc_result.get('success'):
                 return jsonify({
                     'success': False,
-                    'error': doc_result.get('error', 'Erro ao gerar documento')
-                }), 500
+                    'error': doc_result.get('error', 'Erro ao gerar documento'),
+                    'error_type': doc_result.get('error_type'),
+                    'retry_after': doc_result.get('retry_after')
+                }), _failure_status(doc_result)
             
             file_path = doc_result['file_path']
             filename = doc_result['filename']
@@ -635,8 +1085,10 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
             if not doc_result.get('success'):
                 return jsonify({
                     'success': False,
-                    'error': doc_result.get('error', 'Erro ao gerar documento')
-                }), 500
+                    'error': doc_result.get('error', 'Erro ao gerar documento'),
+                    'error_type': doc_result.get('error_type'),
+                    'retry_after': doc_result.get('retry_after')
+                }), _failure_status(doc_result)
             
             file_path = doc_result['file_path']
             filename = doc_result['filename']
@@ -746,8 +1198,10 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
             if not doc_result.get('success'):
                 return jsonify({
                     'success': False,
-                    'error': doc_result.get('error', 'Erro ao gerar documento')
-                }), 500
+                    'error': doc_result.get('error', 'Erro ao gerar documento'),
+                    'error_type': doc_result.get('error_type'),
+                    'retry_after': doc_result.get('retry_after')
+                }), _failure_status(doc_result)
             
             file_path = doc_result['file_path']
             filename = doc_result['filename']
@@ -826,6 +1280,8 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
             observations = request.form.get('observations', '').strip()
             current_summary = request.form.get('current_summary', '')
             provider = 'zello'
+            # force_fresh=true ignora o cache de completions e força uma nova amostra
+            force_fresh = request.form.get('force_fresh', 'false').strip().lower() == 'true'
             
             print(f"[DEBUG] ========== REGENERANDO RESUMO ==========")
             print(f"[DEBUG] Tamanho do texto original: {len(original_text)} caracteres")
@@ -851,14 +1307,18 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
             
             print(f"[DEBUG] Observações contextualizadas: {len(contextualized_observations) if contextualized_observations else 0} caracteres")
             
+            prompt_text, compaction = _compact_text(original_text, _compaction_requested(transcript=request.form.get('source_type') == 'transcript'))
             summary_result = generation_service.generate_summary(
-                text=original_text,
+                text=prompt_text,
                 provider=provider,
-                observations=contextualized_observations
+                observations=contextualized_observations,
+                use_cache=not force_fresh
             )
             
             if not summary_result['success']:
-                return jsonify(summary_result), 500
+                return jsonify(summary_result), _failure_status(summary_result)
+            if compaction is not None:
+                summary_result['compaction'] = compaction
             
             return jsonify({
                 'success': True,
@@ -873,6 +1333,19 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
                 'error': f'Erro interno: {str(e)}'
             }), 500
 
+    def _job_file_hash(job: TranscriptionJob):
+        """
+        SHA-256 calculado pelo monitor para o arquivo do job, se ainda for válido.
+        
+        O hash só é reaproveitado se o arquivo não foi alterado depois da
+        criação do job; caso contrário, o FileService calcula de novo.
+        """
+        try:
+            modified = __import__('datetime').datetime.utcfromtimestamp(os.path.getmtime(job.source_uri))
+        except OSError:
+            return None
+        return job.source_hash if job.source_hash and job.created_at and modified <= job.created_at else None
+
     @app.route('/api/process-file/<int:job_id>', methods=['POST'])
     def process_single_job(job_id: int):
         """
@@ -891,32 +1364,48 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
             job.updated_at = __import__('datetime').datetime.utcnow()
             session.commit()
 
-            # Extrair texto do arquivo
-            text_result = file_service.extract_text_from_file(job.source_uri)
+            # Extrair texto do arquivo (retentativas do job reaproveitam o texto pelo hash do monitor)
+            text_result = file_service.extract_text_from_file(job.source_uri, file_hash=_job_file_hash(job))
             if not text_result.get('success'):
                 job.status = JobStatus.FAILED
                 job.updated_at = __import__('datetime').datetime.utcnow()
                 session.commit()
-                return jsonify({'success': False, 'error': text_result.get('error', 'Falha ao extrair texto') }), 400
+                return jsonify({
+                    'success': False,
+                    'error': text_result.get('error', 'Falha ao extrair texto'),
+                    'error_type': text_result.get('error_type'),
+                    'retry_after': text_result.get('retry_after')
+                }), _failure_status(text_result, 400)
 
-            extracted_text = text_result['text']
+            # Jobs do monitor são transcrições de reuniões (anotações do Gemini)
+            compact = _compaction_requested(transcript=True)
+            extracted_text, compaction = _compact_text(text_result['text'], compact)
 
             # Gerar HU com auto-correção (usa apenas Zello MIND)
             provider = request.args.get('provider', 'zello')
             max_attempts = int(request.args.get('max_attempts', '3'))
-            generation_result = generation_service.generate_with_auto_correction(
-                text=extracted_text,
-                provider=provider,
-                max_attempts=max_attempts
-            )
+            # Tokens consumidos na geração são contabilizados para o job e o colaborador
+            with usage_context(job_id=job.id, collaborator_email=job.collaborator_email):
+                generation_result = generation_service.generate_user_stories(
+                    text=extracted_text,
+                    provider=provider,
+                    max_attempts=max_attempts,
+                    endpoint='process-file'
+                )
 
             if not generation_result.get('success'):
                 job.status = JobStatus.FAILED
                 job.updated_at = __import__('datetime').datetime.utcnow()
                 session.commit()
-                return jsonify({'success': False, 'error': generation_result.get('error', 'Falha na geração')}), 500
+                return jsonify({
+                    'success': False,
+                    'error': generation_result.get('error', 'Falha na geração'),
+                    'error_type': generation_result.get('error_type')
+                }), _failure_status(generation_result)
 
             user_stories = generation_result['content']
+            if compaction is not None:
+                generation_result['compaction'] = compaction
 
             # Salvar artefato JSON em disco
             artifacts_dir = os.path.join('artifacts')
@@ -932,6 +1421,10 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
                     _json.dump({
                         'job_id': job.id,
                         'source_uri': job.source_uri,
+                        # Reaproveitamento por uploads do mesmo arquivo só com os mesmos parâmetros
+                        'generation_params': _generation_params(
+                            extractor_signature(file_service.get_file_extension(job.source_uri)), compact, 'process-file', max_attempts
+                        ),
                         'user_stories': user_stories,
                         'generation_info': generation_result
                     }, f, ensure_ascii=False, indent=2)
@@ -1045,16 +1538,102 @@ IMPORTANTE: Estas observações são instruções específicas para adaptar ou m
     @app.route('/api/test-llm-connection', methods=['GET'])
     def test_llm_connection():
         """
-        Testa conectividade com Zello MIND.
+        Informa a disponibilidade da Zello MIND pelo estado do circuit breaker.
+        
+        Não faz uma completion real: o estado reflete as chamadas recentes
+        (closed = operando, half_open = em teste, open = indisponível).
+        """
+        circuit = llm_service.get_circuit_stats()
+        zello = {'ok': circuit['state'] != 'open', 'circuit': circuit}
+        if circuit['state'] == 'open':
+            zello['error'] = f"Circuito aberto; nova tentativa em {circuit['retry_in_seconds']:.0f}s"
+            if circuit['last_error']:
+                zello['error'] += f" (última falha: {circuit['last_error']})"
+        return jsonify({'success': True, 'results': {'zello': zello}})
+    
+    @app.route('/api/metrics', methods=['GET'])
+    def get_metrics():
+        """
+        Retorna métricas internas do processo (pool de conexões e cache da LLM, etc.).
+        
+        Returns:
+            JSON com métricas
         """
-        results = {}
-        # teste Zello
         try:
-            llm_service.get_completion('zello', [{"role": "user", "content": "ping"}])
-            results['zello'] = {'ok': True}
+            return jsonify({
+                'success': True,
+                'llm_pool': llm_service.get_pool_stats(),
+                'llm_cache': llm_service.get_cache_stats(),
+                'llm_rate_limiter': llm_service.get_rate_limiter_stats(),
+                'llm_inflight_merge': llm_service.get_coalescer_stats(),
+                'llm_circuit': llm_service.get_circuit_stats(),
+                'llm_latency': llm_service.get_latency_stats(),
+                'llm_usage': llm_service.get_usage_stats(),
+                'summary_digests': generation_service.get_digest_stats(),
+                'validation': generation_service.get_validation_stats(),
+                'speculative': generation_service.get_speculative_stats(),
+                'stage_timings': get_shared_timing_registry().get_stats(),
+                'transcript_compaction': get_shared_transcript_compactor().get_stats(),
+                'prompt_budget': generation_service.get_prompt_budget_stats(),
+                'extraction_cache': file_service.get_extraction_stats(),
+                'result_cache': get_shared_result_cache().get_stats(),
+                'cpu_pool': file_service.get_cpu_pool_stats()
+            })
         except Exception as e:
-            results['zello'] = {'ok': False, 'error': str(e)}
-        return jsonify({'success': True, 'results': results})
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 500
+    
+    @app.route('/api/metrics/stages', methods=['GET'])
+    def get_stage_metrics():
+        """
+        Exporta os histogramas de tempo por etapa do processamento.
+        
+        Query params:
+            format: 'json' (padrão) ou 'prometheus' (formato texto de exposição)
+            
+        Returns:
+            JSON com os histogramas resumidos, ou texto no formato do Prometheus
+        """
+        registry = get_shared_timing_registry()
+        if request.args.get('format', 'json').lower() == 'prometheus':
+            return Response(registry.export_prometheus(), mimetype='text/plain; version=0.0.4')
+        return jsonify({
+            'success': True,
+            'stage_timings': registry.get_stats()
+        })
+    
+    @app.route('/api/usage', methods=['GET'])
+    def get_llm_usage():
+        """
+        Retorna o consumo de tokens da LLM.
+        
+        Query params:
+            job_id: Detalha o consumo de um job, por etapa
+            days: Dias dos totais diários (padrão 7)
+            collaborator_email: Filtra os totais diários por colaborador
+        
+        Returns:
+            JSON com o consumo solicitado
+        """
+        try:
+            usage_recorder = llm_service.usage_recorder
+            job_id = request.args.get('job_id', type=int)
+            if job_id is not None:
+                return jsonify({'success': True, 'job': usage_recorder.query_job(job_id)})
+            days = request.args.get('days', 7, type=int)
+            collaborator_email = request.args.get('collaborator_email') or None
+            return jsonify({
+                'success': True,
+                'days': days,
+                'daily': usage_recorder.query_daily(days, collaborator_email)
+            })
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 500
     
     @app.route('/api/validate-config', methods=['GET'])
     def validate_config():
@@ -0,0 +1,127 @@
+"""
+Benchmark da extração de texto de DOCX.
+
+Gera DOCX sintéticos (python-docx) em que metade do conteúdo está em
+tabelas, como nos documentos de requisitos, e compara:
+
+- python-docx: Document(...).paragraphs, como o FileService fazia (ignora tabelas);
+- streaming: services/docx_extractor.py (parser incremental sobre o word/document.xml).
+
+Cada medição roda em um processo próprio e informa tempo, vazão (MB/s do
+arquivo) e o pico de RSS acima da memória do processo antes da extração
+(Linux: VmHWM após zerar o pico em /proc/self/clear_refs).
+
+Uso:
+    python benchmarks/bench_docx_extraction.py --sections 100,1000,5000 --repeat 3
+
+Requer python-docx.
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_docx(path: str, sections: int) -> None:
+    from docx import Document
+
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = "Documento de requisitos - uso interno"
+    for section in range(sections):
+        document.add_heading(f"Requisito {section + 1}", level=2)
+        document.add_paragraph(f"O usuário precisa cadastrar clientes e emitir relatórios mensais ({section + 1}).")
+        document.add_paragraph("Critérios de aceitação e regras de negócio estão na tabela abaixo.")
+        table = document.add_table(rows=3, cols=3)
+        for row in range(3):
+            for column in range(3):
+                table.cell(row, column).text = f"Regra {section + 1}.{row + 1}.{column + 1}: validar campo obrigatório"
+    document.save(path)
+
+
+def python_docx_text(path: str) -> str:
+    from docx import Document
+    return "\n".join(paragraph.text for paragraph in Document(path).paragraphs).strip()
+
+
+def streaming_text(path: str) -> str:
+    from services.docx_extractor import extract_docx_text
+    return extract_docx_text(path)["text"]
+
+
+METHODS = {"python-docx": python_docx_text, "streaming": streaming_text}
+
+
+def _current_rss_kb() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def _peak_rss_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _measure(method: str, path: str, connection) -> None:
+    function = METHODS[method]
+    # Importa as bibliotecas antes de medir: o pico reflete só a extração
+    __import__("docx")
+    __import__("services.docx_extractor")
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        baseline = _current_rss_kb()
+    except OSError:
+        baseline = None
+    started = time.perf_counter()
+    text = function(path)
+    elapsed = time.perf_counter() - started
+    peak = _peak_rss_kb() - baseline if baseline is not None else None
+    connection.send((elapsed, peak, len(text)))
+    connection.close()
+
+
+def measure(method: str, path: str, repeat: int):
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    durations, peaks, chars = [], [], 0
+    for _ in range(repeat):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_measure, args=(method, path, sender))
+        process.start()
+        elapsed, peak, chars = receiver.recv()
+        process.join()
+        durations.append(elapsed)
+        if peak is not None:
+            peaks.append(peak)
+    return statistics.median(durations), (max(peaks) if peaks else None), chars
+
+
+def run_benchmark(args: argparse.Namespace) -> None:
+    print("=" * 72)
+    print(f"BENCHMARK EXTRAÇÃO DE DOCX (mediana de {args.repeat}, um processo por medição)")
+    print("=" * 72)
+    with tempfile.TemporaryDirectory() as directory:
+        for sections in [int(value) for value in args.sections.split(",")]:
+            path = os.path.join(directory, f"bench_{sections}.docx")
+            build_docx(path, sections)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"{sections} seções ({size_mb * 1024:.0f} KB, {sections * 3} parágrafos + {sections} tabelas 3x3)")
+            for method in METHODS:
+                elapsed, peak, chars = measure(method, path, args.repeat)
+                peak_label = f"{peak / 1024:7.1f} MB" if peak is not None else "     n/d"
+                print(f"  {method:<12} {elapsed * 1000:9.1f} ms | {size_mb / elapsed:6.2f} MB/s | pico RSS +{peak_label} | {chars} caracteres")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da extração de texto de DOCX")
+    parser.add_argument("--sections", default="100,1000,5000", help="seções por documento (título, 2 parágrafos e 1 tabela), separadas por vírgula")
+    parser.add_argument("--repeat", type=int, default=3, help="execuções por medição (mediana do tempo, maior pico)")
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,100 @@
+"""
+Benchmark de vazão do GenerationService contra o servidor local da Zello MIND.
+
+Executa jobs de geração com auto-correção em paralelo (geração + validação,
+repetidas até a aprovação) e mede jobs/s, latência por job e quantas
+requisições chegaram ao servidor, incluindo 429, erros e respostas truncadas.
+
+Uso:
+    python benchmarks/bench_generation.py --jobs 40 --workers 8 \\
+        --latency lognormal:400:0.6 --approve-after 2 --burst-every 30 --burst-length 3
+
+Cada job usa um texto diferente e o servidor marca cada resposta de geração
+com o hash do prompt (vary_replies), de modo que as validações e correções
+também diferem entre jobs: cache e agrupamento de requisições idênticas não
+mascaram a carga (o resumo do agrupador é impresso para conferência).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.zello_stand_in import ZelloStandIn
+
+
+def run_benchmark(args: argparse.Namespace) -> None:
+    server = ZelloStandIn(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        retry_after=args.retry_after,
+        truncate_rate=args.truncate_rate,
+        approve_after=args.approve_after,
+        vary_replies=True,
+        seed=args.seed
+    ).start()
+
+    os.environ["ZELLO_BASE_URL"] = server.base_url
+    os.environ.setdefault("ZELLO_API_KEY", "benchmark")
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["LLM_USAGE_TRACKING_ENABLED"] = "false"
+
+    from config import config
+    from services.generation_service import GenerationService
+    from services.llm_service import LLMService
+
+    config.ZELLO_BASE_URL = server.base_url
+    llm_service = LLMService(zello_api_key="benchmark")
+    generation_service = GenerationService(llm_service)
+
+    def run_job(index: int):
+        text = f"Reunião {index}: o usuário quer entrar com e-mail e senha e recuperar a senha por e-mail."
+        start = time.perf_counter()
+        result = generation_service.generate_with_auto_correction(text, max_attempts=args.max_attempts, use_cache=False)
+        return time.perf_counter() - start, result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        outcomes = list(executor.map(run_job, range(args.jobs)))
+    elapsed = time.perf_counter() - started
+    server.stop()
+
+    durations = sorted(duration for duration, _ in outcomes)
+    succeeded = sum(1 for _, result in outcomes if result.get("success"))
+    attempts = [len(result.get("attempts", [])) for _, result in outcomes if result.get("attempts")]
+    server_stats = server.get_stats()
+
+    print("=" * 60)
+    print(f"BENCHMARK GERAÇÃO ({args.jobs} jobs, {args.workers} em paralelo, latência {args.latency})")
+    print("=" * 60)
+    print(f"Tempo total: {elapsed:.2f} s | vazão {args.jobs / elapsed:.2f} jobs/s | sucesso {succeeded}/{args.jobs}")
+    print(f"Por job: média {statistics.mean(durations) * 1000:.0f} ms | p50 {durations[len(durations) // 2] * 1000:.0f} ms | máx {durations[-1] * 1000:.0f} ms")
+    if attempts:
+        print(f"Tentativas de geração por job: média {statistics.mean(attempts):.2f}")
+    print(f"Servidor: {server_stats}")
+    print(f"Limitador: {llm_service.get_rate_limiter_stats()}")
+    print(f"Agrupamento: {llm_service.get_coalescer_stats()}")
+    print(f"Circuito: {llm_service.get_circuit_stats()['state']}")
+    print(f"Validação: {generation_service.get_validation_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de vazão do GenerationService")
+    parser.add_argument("--jobs", type=int, default=40, help="jobs de geração")
+    parser.add_argument("--workers", type=int, default=8, help="jobs simultâneos")
+    parser.add_argument("--max-attempts", type=int, default=3, help="tentativas de auto-correção por job")
+    parser.add_argument("--latency", default="lognormal:400:0.6", help="distribuição de latência do servidor")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 500")
+    parser.add_argument("--burst-every", type=int, default=0, help="rajada de 429 a cada N requisições")
+    parser.add_argument("--burst-length", type=int, default=0, help="requisições com 429 por rajada")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After dos 429 (s)")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="fração de respostas truncadas")
+    parser.add_argument("--approve-after", type=int, default=2, help="aprova a cada N validações")
+    parser.add_argument("--seed", type=int, default=42)
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,92 @@
+"""
+Benchmark do pool de conexões keep-alive do LLMService.
+
+Sobe o servidor local que imita a Zello MIND (benchmarks/zello_stand_in.py) e
+compara a latência por chamada entre `requests.post` isolado (uma conexão nova
+por chamada) e o LLMService usando o pool compartilhado.
+
+Uso:
+    python benchmarks/bench_llm_pool.py --calls 200 --handshake-ms 30
+
+`--handshake-ms` simula o custo de abertura de conexão (TCP + TLS) que existe
+contra o endpoint real, mas não em localhost.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.zello_stand_in import ZelloStandIn
+
+
+def run_benchmark(calls: int, handshake_ms: float) -> None:
+    server = ZelloStandIn(handshake_ms=handshake_ms).start()
+    base_url = server.base_url
+
+    os.environ["ZELLO_BASE_URL"] = base_url
+    os.environ.setdefault("ZELLO_API_KEY", "benchmark")
+    # Sem cache de completions nem limite de taxa: mede apenas o custo de conexão
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["LLM_RATE_LIMIT_PER_SECOND"] = "0"
+
+    import requests
+    from config import config
+    from services.http_pool import HTTPSessionPool
+    from services.llm_service import LLMService
+
+    config.ZELLO_BASE_URL = base_url
+    messages = [{"role": "user", "content": "ping"}]
+
+    # Sem pool: uma conexão nova por chamada
+    unpooled = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = requests.post(
+            f"{base_url}/api/v1/chat/completions",
+            headers={"zello_mind_key": "benchmark", "Content-Type": "application/json"},
+            json={"messages": messages},
+            timeout=(30, 60)
+        )
+        response.raise_for_status()
+        unpooled.append(time.perf_counter() - start)
+
+    # Com pool: LLMService reaproveitando conexões
+    pool = HTTPSessionPool()
+    service = LLMService(zello_api_key="benchmark", session_pool=pool)
+    pooled = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        service.get_completion("zello", messages)
+        pooled.append(time.perf_counter() - start)
+
+    server.stop()
+
+    def describe(samples):
+        ordered = sorted(samples)
+        return {
+            "mean_ms": statistics.mean(samples) * 1000,
+            "p50_ms": ordered[len(ordered) // 2] * 1000,
+            "p95_ms": ordered[int(len(ordered) * 0.95) - 1] * 1000
+        }
+
+    without_pool = describe(unpooled)
+    with_pool = describe(pooled)
+    print("=" * 60)
+    print(f"BENCHMARK POOL KEEP-ALIVE ({calls} chamadas, handshake simulado {handshake_ms} ms)")
+    print("=" * 60)
+    print(f"Sem pool : média {without_pool['mean_ms']:.2f} ms | p50 {without_pool['p50_ms']:.2f} ms | p95 {without_pool['p95_ms']:.2f} ms")
+    print(f"Com pool : média {with_pool['mean_ms']:.2f} ms | p50 {with_pool['p50_ms']:.2f} ms | p95 {with_pool['p95_ms']:.2f} ms")
+    print(f"Economia por chamada: {without_pool['mean_ms'] - with_pool['mean_ms']:.2f} ms")
+    print(f"Estatísticas do pool: {pool.get_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do pool keep-alive do LLMService")
+    parser.add_argument("--calls", type=int, default=200, help="número de chamadas por cenário")
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="atraso simulado por conexão nova")
+    args = parser.parse_args()
+    run_benchmark(args.calls, args.handshake_ms)
@@ -0,0 +1,106 @@
+"""
+Benchmark da extração de texto de PDFs.
+
+Gera PDFs sintéticos (reportlab) com 10, 100 e 1000 páginas e compara:
+
+- loop original: PdfReader.pages na thread atual com text += ...;
+- extrator sequencial: uma única tarefa do pool de CPU, texto montado com um único join;
+- extrator em paralelo: faixas de páginas em paralelo no pool de CPU;
+- extrator com orçamento: para ao atingir --max-tokens tokens estimados.
+
+Uso:
+    python benchmarks/bench_pdf_extraction.py --pages 10,100,1000 --workers 4 --repeat 3
+
+Requer PyPDF2 e reportlab.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_pdf(path: str, pages: int, lines_per_page: int) -> None:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path, pagesize=A4)
+    for page in range(pages):
+        y = 800
+        for line in range(lines_per_page):
+            pdf.drawString(40, y, f"Página {page + 1}, linha {line + 1}: o usuário precisa cadastrar clientes e emitir relatórios.")
+            y -= 14
+        pdf.showPage()
+    pdf.save()
+
+
+def legacy_extract(file_path: str) -> str:
+    import PyPDF2
+    with open(file_path, "rb") as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        text = ""
+        for page in pdf_reader.pages:
+            text += page.extract_text() + "\n"
+    return text.strip()
+
+
+def measure(function, repeat: int):
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations), result
+
+
+def run_benchmark(args: argparse.Namespace) -> None:
+    from config import config
+    from services.cpu_pool import get_shared_cpu_pool
+    from services.pdf_extractor import extract_pdf_text
+
+    config.CPU_POOL_WORKERS = args.workers
+    config.PDF_EXTRACTION_WORKERS = args.workers
+    config.PDF_PAGES_PER_TASK = args.pages_per_task
+    pool = get_shared_cpu_pool()
+    # Sobe os processos antes das medições (o custo de criação é pago uma vez por worker)
+    for future in [pool.submit("warmup", len, "") for _ in range(args.workers)]:
+        future.result()
+
+    print("=" * 72)
+    print(f"BENCHMARK EXTRAÇÃO DE PDF ({args.workers} processos, {args.pages_per_task} páginas por faixa, mediana de {args.repeat})")
+    print("=" * 72)
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in [int(value) for value in args.pages.split(",")]:
+            path = os.path.join(directory, f"bench_{pages}.pdf")
+            build_pdf(path, pages, args.lines_per_page)
+
+            legacy_time, legacy_text = measure(lambda: legacy_extract(path), args.repeat)
+            config.PDF_EXTRACTION_WORKERS = 1
+            sequential_time, sequential = measure(lambda: extract_pdf_text(path), args.repeat)
+            config.PDF_EXTRACTION_WORKERS = args.workers
+            parallel_time, parallel = measure(lambda: extract_pdf_text(path), args.repeat)
+            budget_time, budget = measure(lambda: extract_pdf_text(path, max_tokens=args.max_tokens), args.repeat)
+
+            same = sequential["text"] == legacy_text and parallel["text"] == legacy_text
+            print(f"{pages} páginas ({os.path.getsize(path) / 1024:.0f} KB, texto idêntico: {'sim' if same else 'NÃO'})")
+            print(f"  loop original (+=):     {legacy_time * 1000:8.1f} ms")
+            print(f"  extrator sequencial:    {sequential_time * 1000:8.1f} ms")
+            print(f"  extrator em paralelo:   {parallel_time * 1000:8.1f} ms | {legacy_time / parallel_time:.2f}x (paralelo: {parallel['parallel']})")
+            print(f"  orçamento {args.max_tokens} tokens: {budget_time * 1000:8.1f} ms | {budget['pages_extracted']}/{pages} páginas, truncado: {budget['truncated']}")
+    print(f"Pool de CPU: {pool.get_stats()['tasks'].get('pdf')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da extração de texto de PDFs")
+    parser.add_argument("--pages", default="10,100,1000", help="tamanhos de PDF (páginas, separados por vírgula)")
+    parser.add_argument("--workers", type=int, default=4, help="processos do pool")
+    parser.add_argument("--pages-per-task", type=int, default=16, help="páginas por faixa")
+    parser.add_argument("--lines-per-page", type=int, default=40, help="linhas de texto por página")
+    parser.add_argument("--max-tokens", type=int, default=8000, help="orçamento de tokens do modo com orçamento")
+    parser.add_argument("--repeat", type=int, default=3, help="execuções por medição (mediana)")
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,132 @@
+"""
+Verificação de regressão da pré-validação das Histórias de Usuário.
+
+Confere services/story_prevalidator.py contra saídas no formato obrigatório
+de prompts/user_story_prompts.py (seções "## 1. **Nome da História de
+Usuário**" ... "## 10. **Cenários de Teste**" em cada história), com e sem
+título numerado por história e com variações de marcação que os modelos
+produzem: histórias corretas devem ser aprovadas, defeitos claros (sem
+critérios) reprovados e estruturas que as regras não reconhecem (numeração
+fora de sequência, nenhuma frase "Como ..., quero ...") ficar "incertas",
+isto é, passadas à validação pela LLM.
+
+Uso:
+    python benchmarks/check_story_prevalidator.py
+
+Sai com código 1 se algum caso falhar.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.story_prevalidator import prevalidate_user_stories
+
+
+def template_story(name: str, statement: str, criteria: bool = True) -> str:
+    """Uma história com as dez seções do formato obrigatório."""
+    sections = [
+        f"## 1. **Nome da História de Usuário**\n{name}",
+        f"## 2. **Padrão de História de Usuário**\n> {statement}",
+        "## 3. **Tipo**\nFeature",
+    ]
+    if criteria:
+        sections.append(
+            "## 4. **Critérios de Aceitação**\n"
+            "1. O sistema deve salvar o registro com todos os campos obrigatórios.\n"
+            "2. O sistema deve exibir mensagem de sucesso após salvar."
+        )
+    sections += [
+        "## 5. **Permissões e Acessos**\n- **Manter Entregas**: restrita (somente Gestor).\n- **Consultar Entregas**: liberada (Leitor e Alta gestão).",
+        "## 6. **Regras de Negócios**\n- A data de término não pode ser anterior à data de início.",
+        "## 7. **Requisitos Técnicos**\nNenhum requisito técnico foi identificado.",
+        "## 8. **Regras de Interface**\n- O botão Salvar fica desabilitado até os campos obrigatórios serem preenchidos.",
+        "## 9. **Campos e Componentes de UI**\n\n| Campo | Tipo | Obrigatório | Regra/Restrição |\n|-------|------|-------------|------------------|\n| Nome | Texto curto | Sim | Máximo 100 caracteres |",
+        "## 10. **Cenários de Teste**\n* **Dado** que sou Gestor\n* **Quando** salvo o formulário completo\n* **Então** a entrega aparece na lista",
+    ]
+    return "\n\n".join(sections)
+
+
+STORIES = [
+    ("Entrega – Cadastro de nova entrega", "Como gestor, quero cadastrar uma nova entrega para acompanhar o andamento do projeto."),
+    ("Entrega – Edição de entrega", "Como gestor, quero editar uma entrega existente para corrigir prazos e responsáveis."),
+    ("Entrega – Consulta de entregas", "Como leitor, quero consultar as entregas do órgão para acompanhar os resultados."),
+]
+
+
+def with_titles(numbers, criteria: bool = True) -> str:
+    """Histórias com título "# História N – ..." antes das seções."""
+    return "\n\n---\n\n".join(
+        f"# História {number} – {name}\n\n{template_story(name, statement, criteria)}"
+        for number, (name, statement) in zip(numbers, STORIES)
+    )
+
+
+def without_titles() -> str:
+    """Histórias só com as seções numeradas, separadas por ---."""
+    return "\n\n---\n\n".join(template_story(name, statement) for name, statement in STORIES)
+
+
+def with_statements(statements) -> str:
+    """Histórias "# História N – ..." com as frases dadas no lugar das padrão."""
+    return "\n\n---\n\n".join(
+        f"# História {number} – {name}\n\n{template_story(name, statement)}"
+        for number, ((name, _), statement) in enumerate(zip(STORIES, statements), start=1)
+    )
+
+
+def with_suggested_tasks() -> str:
+    """Histórias "# N. ..." seguidas das tasks sugeridas numeradas que o prompt pede."""
+    stories = "\n\n---\n\n".join(
+        f"# {number}. {name}\n\n{template_story(name, statement)}"
+        for number, (name, statement) in enumerate(STORIES[:2], start=1)
+    )
+    return (
+        f"{stories}\n\n---\n\n## Tasks sugeridas\n\n"
+        "### 1. Backend\n- Endpoint de cadastro e edição de entregas.\n\n"
+        "### 2. Frontend\n- Formulário de entrega com validação dos campos obrigatórios."
+    )
+
+
+CASES = [
+    ("modelo, 2 histórias com título", with_titles([1, 2]), "aprovado"),
+    ("modelo, 3 histórias com título", with_titles([1, 2, 3]), "aprovado"),
+    ("modelo, 3 histórias sem título", without_titles(), "aprovado"),
+    ("frase com negrito (**Como** ... **quero** ... **para**)", with_statements([
+        "**Como** gestor, **quero** exportar relatórios **para** acompanhar os indicadores.",
+        "**Como** leitor, **quero** consultar as entregas **para** acompanhar os resultados.",
+    ]), "aprovado"),
+    ('rótulo e "Eu, como" (**História:** Eu, como ...)', with_statements([
+        "**História:** Eu, como gestor, quero exportar relatórios para acompanhar os indicadores.",
+        "**História:** Eu, como leitor, quero consultar as entregas para acompanhar os resultados.",
+    ]), "aprovado"),
+    ("títulos # 1., # 2. e tasks sugeridas ### 1., ### 2.", with_suggested_tasks(), "aprovado"),
+    ("numeração fora de sequência", with_titles([1, 3, 2]), "incerto"),
+    ('nenhuma frase "Como ..., quero ..."', with_statements(["Gestor exporta relatórios.", "Leitor consulta entregas."]), "incerto"),
+    ("sem critérios de aceitação", with_titles([1, 2], criteria=False), "reprovado"),
+]
+
+
+def outcome(verdict) -> str:
+    """Desfecho da pré-validação: aprovado, reprovado ou incerto (vai para a LLM)."""
+    if verdict["approved"]:
+        return "aprovado"
+    return "incerto" if verdict.get("uncertain") else "reprovado"
+
+
+def main() -> int:
+    failures = 0
+    for label, content, expected in CASES:
+        verdict = prevalidate_user_stories(content)
+        result = outcome(verdict)
+        ok = result == expected
+        failures += 0 if ok else 1
+        status = "ok   " if ok else "FALHA"
+        print(f"{status} {label}: {result} {verdict['issues'] if not ok else ''}".rstrip())
+    print(f"{len(CASES) - failures}/{len(CASES)} casos corretos")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
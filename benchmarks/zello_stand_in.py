@@ -0,0 +1,425 @@
+"""
+Servidor local que substitui a Zello MIND em testes e benchmarks.
+
+Implementa POST /api/v1/chat/completions (JSON completo ou SSE com
+"stream": true) com comportamento configurável:
+
+- latência por resposta: fixa, uniforme, log-normal ou exponencial;
+- atraso de abertura de conexão (simula TCP + TLS do endpoint real);
+- taxa de erros 500 e rajadas de 429 com Retry-After;
+- respostas truncadas (conexão cortada no meio do corpo, ou finish_reason
+  "length" com o texto pela metade);
+- respostas fixas por etapa (generation, validation, summary) e veredito de
+  validação (linha VEREDITO + bloco JSON) por regra: aprovado a cada N-ésima
+  validação, reprovado antes;
+- opcionalmente (vary_replies), respostas de geração e resumo marcadas com um
+  hash do prompt, para que jobs diferentes não produzam prompts de validação
+  idênticos (que o agrupamento de requisições juntaria).
+
+Também expõe GET /stats (contadores) e POST /reset.
+
+Uso isolado:
+    python benchmarks/zello_stand_in.py --port 8089 --latency lognormal:800:0.5 \\
+        --error-rate 0.02 --burst-every 50 --burst-length 5 --approve-after 2
+
+e depois ZELLO_BASE_URL=http://127.0.0.1:8089 na aplicação.
+
+Uso em benchmarks:
+    with ZelloStandIn(latency="fixed:200", approve_after=2) as server:
+        os.environ["ZELLO_BASE_URL"] = server.base_url
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, List, Optional
+
+
+CHAT_COMPLETIONS_PATH = "/api/v1/chat/completions"
+
+DEFAULT_REPLIES = {
+    "generation": (
+        "## 1. **Autenticação por e-mail**\n"
+        "Como usuário cadastrado, quero entrar com e-mail e senha para acessar minha conta.\n\n"
+        "**Critérios de Aceitação:**\n"
+        "- Dado um e-mail e senha válidos, quando eu enviar o formulário, então devo acessar o painel.\n"
+        "- Dado uma senha inválida, quando eu enviar o formulário, então devo ver uma mensagem de erro.\n"
+    ),
+    # Como numa revisão real, a aprovação cita problemas menores e sugestões de melhoria
+    "validation_approved": (
+        "As Histórias de Usuário estão no formato correto e os critérios de aceitação são testáveis. "
+        "Nenhum problema bloqueante. Como melhorias opcionais, faltam exemplos de erros de validação "
+        "e vale melhorar a mensagem de erro do login.\n\n"
+        "VEREDITO: APROVADO\n"
+        "```json\n"
+        '{"aprovado": true, "nota": 8, "historias": [{"historia": "Autenticação por e-mail", "aprovada": true, "problemas": []}]}\n'
+        "```"
+    ),
+    "validation_rejected": (
+        "Faltam critérios de aceitação mensuráveis e os cenários de erro não estão descritos.\n\n"
+        "VEREDITO: REPROVADO\n"
+        "```json\n"
+        '{"aprovado": false, "nota": 4, "historias": [{"historia": "Autenticação por e-mail", "aprovada": false, '
+        '"problemas": ["Incluir critério mensurável de tempo de resposta do login", "Descrever o cenário de bloqueio após tentativas inválidas"]}]}\n'
+        "```"
+    ),
+    "summary": (
+        "# Resumo Executivo\n\n"
+        "**Decisões:** login por e-mail e senha.\n\n"
+        "**Próximos passos:** detalhar requisitos de segurança."
+    ),
+    "default": "ok"
+}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Converte a especificação de latência em um amostrador (segundos).
+
+    Formatos (valores em ms):
+        fixed:200
+        uniform:100:400
+        lognormal:800:0.5   (mediana, sigma)
+        exp:300             (média)
+
+    Args:
+        spec: Especificação da distribuição
+
+    Returns:
+        Função que recebe um random.Random e retorna a latência em segundos
+    """
+    kind, _, params = (spec or "fixed:0").partition(":")
+    values = [float(value) for value in params.split(":") if value]
+    if kind == "fixed":
+        return lambda rng: values[0] / 1000.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000.0
+    if kind == "lognormal":
+        median, sigma = values[0], values[1]
+        return lambda rng: rng.lognormvariate(math.log(median), sigma) / 1000.0
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / values[0]) / 1000.0
+    raise ValueError(f"Distribuição de latência desconhecida: {spec}")
+
+
+def classify_request(messages: List[Dict[str, str]]) -> str:
+    """
+    Identifica a etapa do pipeline pela mensagem de sistema enviada pelo GenerationService.
+
+    Args:
+        messages: Mensagens da requisição
+
+    Returns:
+        'validation', 'generation', 'summary' ou 'default'
+    """
+    system = " ".join(m.get("content") or "" for m in messages if m.get("role") == "system").lower()
+    if "validação" in system:
+        return "validation"
+    if "histórias de usuário" in system:
+        return "generation"
+    if "resumo" in system or "reuni" in system:
+        return "summary"
+    return "default"
+
+
+def estimate_tokens(text: str) -> int:
+    return max(len(text or "") // 4, 1)
+
+
+class ZelloStandIn:
+    """Servidor HTTP local com o contrato de chat da Zello MIND."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "fixed:0",
+        handshake_ms: float = 0.0,
+        error_rate: float = 0.0,
+        burst_every: int = 0,
+        burst_length: int = 0,
+        retry_after: float = 1.0,
+        truncate_rate: float = 0.0,
+        truncate_mode: str = "connection",
+        approve_after: int = 1,
+        replies: Dict[str, str] = None,
+        stream_chunk_chars: int = 16,
+        vary_replies: bool = False,
+        seed: int = None
+    ):
+        """
+        Configura o servidor (inicie com start() ou como context manager).
+
+        Args:
+            host: Endereço de escuta
+            port: Porta (0 escolhe uma livre)
+            latency: Distribuição da latência de cada resposta (ver parse_latency)
+            handshake_ms: Atraso por conexão TCP nova
+            error_rate: Fração de respostas HTTP 500
+            burst_every: A cada N requisições inicia uma rajada de 429 (0 desativa)
+            burst_length: Requisições respondidas com 429 em cada rajada
+            retry_after: Valor do cabeçalho Retry-After dos 429, em segundos
+            truncate_rate: Fração de respostas truncadas
+            truncate_mode: 'connection' (corta a conexão) ou 'length' (finish_reason length)
+            approve_after: A validação é aprovada a cada N chamadas (1 = sempre aprova)
+            replies: Respostas fixas por etapa (sobrepõe DEFAULT_REPLIES)
+            stream_chunk_chars: Tamanho dos trechos SSE
+            vary_replies: Acrescenta às respostas de geração e resumo uma linha com
+                o hash do prompt (respostas distintas por job)
+            seed: Semente do gerador aleatório (reprodutibilidade)
+        """
+        self.host = host
+        self.port = port
+        self.sample_latency = parse_latency(latency)
+        self.handshake_seconds = handshake_ms / 1000.0
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.truncate_rate = truncate_rate
+        self.truncate_mode = truncate_mode
+        self.approve_after = max(approve_after, 1)
+        self.replies = {**DEFAULT_REPLIES, **(replies or {})}
+        self.stream_chunk_chars = max(stream_chunk_chars, 1)
+        self.vary_replies = vary_replies
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counters: Counter = Counter()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """URL a ser usada em ZELLO_BASE_URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ZelloStandIn":
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="zello-stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "ZelloStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset(self) -> None:
+        """Zera os contadores (inclusive o de validações para approve_after)."""
+        with self._lock:
+            self._counters.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def _plan(self, stage: str, messages: List[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Decide, sob lock, o desfecho da próxima requisição."""
+        with self._lock:
+            self._counters["requests"] += 1
+            sequence = self._counters["requests"]
+            latency = self.sample_latency(self._rng)
+            if self.burst_every and self.burst_length and (sequence - 1) % self.burst_every < self.burst_length:
+                self._counters["throttled"] += 1
+                return {"status": 429, "latency": 0.0}
+            if self._rng.random() < self.error_rate:
+                self._counters["errors"] += 1
+                return {"status": 500, "latency": latency}
+            truncated = self._rng.random() < self.truncate_rate
+            if truncated:
+                self._counters["truncated"] += 1
+            self._counters[stage] += 1
+            if stage == "validation":
+                approved = self._counters["validation"] % self.approve_after == 0
+                self._counters["approved" if approved else "rejected"] += 1
+                content = self.replies["validation_approved" if approved else "validation_rejected"]
+            else:
+                content = self.replies.get(stage, self.replies["default"])
+                if self.vary_replies:
+                    digest = hashlib.sha256(json.dumps(messages or [], sort_keys=True).encode("utf-8")).hexdigest()[:12]
+                    content = f"{content}\n\n_Referência: {digest}_"
+            return {"status": 200, "latency": latency, "content": content, "truncated": truncated}
+
+    def _make_handler(self):
+        stand_in = self
+
+        class StandInHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                # Executado uma vez por conexão TCP: simula o handshake
+                if stand_in.handshake_seconds:
+                    time.sleep(stand_in.handshake_seconds)
+                super().setup()
+                # Evita o atraso de Nagle + ACK atrasado entre cabeçalhos e corpo
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _send_json(self, status: int, data: Dict[str, Any], headers: Dict[str, str] = None):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/stats":
+                    self._send_json(200, stand_in.get_stats())
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", "0"))
+                raw = self.rfile.read(length)
+                if self.path == "/reset":
+                    stand_in.reset()
+                    self._send_json(200, {"reset": True})
+                    return
+                if self.path != CHAT_COMPLETIONS_PATH:
+                    self._send_json(404, {"error": "not found"})
+                    return
+                try:
+                    payload = json.loads(raw or b"{}")
+                except ValueError:
+                    self._send_json(400, {"error": "invalid json"})
+                    return
+
+                messages = payload.get("messages") or []
+                plan = stand_in._plan(classify_request(messages), messages)
+                if plan["latency"]:
+                    time.sleep(plan["latency"])
+                if plan["status"] == 429:
+                    self._send_json(429, {"error": "rate limited"}, {"Retry-After": f"{stand_in.retry_after:g}"})
+                    return
+                if plan["status"] != 200:
+                    self._send_json(plan["status"], {"error": "stand-in failure"})
+                    return
+
+                content = plan["content"]
+                finish_reason = "stop"
+                cut_connection = plan["truncated"] and stand_in.truncate_mode == "connection"
+                if plan["truncated"] and not cut_connection:
+                    content, finish_reason = content[:len(content) // 2], "length"
+                usage = {
+                    "prompt_tokens": sum(estimate_tokens(m.get("content")) for m in messages),
+                    "completion_tokens": estimate_tokens(content)
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+                if payload.get("stream"):
+                    self._stream(content, finish_reason, usage, cut_connection)
+                    return
+
+                body = json.dumps({
+                    "choices": [{"message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+                    "model": payload.get("model"),
+                    "usage": usage
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if cut_connection:
+                    # Content-Length anuncia o corpo inteiro, mas só metade é enviada
+                    self.wfile.write(body[:len(body) // 2])
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                self.wfile.write(body)
+
+            def _stream(self, content: str, finish_reason: str, usage: Dict[str, int], cut_connection: bool):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                size = stand_in.stream_chunk_chars
+                chunks = [content[i:i + size] for i in range(0, len(content), size)]
+                if cut_connection:
+                    chunks = chunks[:max(len(chunks) // 2, 1)]
+                for chunk in chunks:
+                    event = {"choices": [{"delta": {"content": chunk}}]}
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                if cut_connection:
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                final = {"choices": [{"delta": {}, "finish_reason": finish_reason}], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return StandInHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor local que substitui a Zello MIND")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:MS | uniform:MIN:MAX | lognormal:MEDIANA:SIGMA | exp:MEDIA")
+    parser.add_argument("--handshake-ms", type=float, default=0.0, help="atraso por conexão nova")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 500")
+    parser.add_argument("--burst-every", type=int, default=0, help="inicia uma rajada de 429 a cada N requisições")
+    parser.add_argument("--burst-length", type=int, default=0, help="requisições com 429 por rajada")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After dos 429 (s)")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="fração de respostas truncadas")
+    parser.add_argument("--truncate-mode", choices=["connection", "length"], default="connection")
+    parser.add_argument("--approve-after", type=int, default=1, help="aprova a cada N validações")
+    parser.add_argument("--replies", help="arquivo JSON com respostas por etapa")
+    parser.add_argument("--vary-replies", action="store_true", help="marca as respostas de geração e resumo com o hash do prompt")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    replies = None
+    if args.replies:
+        with open(args.replies, "r", encoding="utf-8") as f:
+            replies = json.load(f)
+
+    server = ZelloStandIn(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        handshake_ms=args.handshake_ms,
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        retry_after=args.retry_after,
+        truncate_rate=args.truncate_rate,
+        truncate_mode=args.truncate_mode,
+        approve_after=args.approve_after,
+        replies=replies,
+        vary_replies=args.vary_replies,
+        seed=args.seed
+    ).start()
+    print(f"Zello MIND stand-in em {server.base_url} (Ctrl+C para encerrar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
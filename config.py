@@ -29,6 +29,109 @@ class Config:
     ZELLO_API_KEY: Optional[str] = os.getenv('ZELLO_API_KEY')
     ZELLO_BASE_URL: str = os.getenv('ZELLO_BASE_URL', 'https://smartdocs-api-hlg.zello.space')
     
+    # Pool de conexões HTTP keep-alive para a LLM
+    LLM_HTTP_POOL_SIZE: int = int(os.getenv('LLM_HTTP_POOL_SIZE', '10'))  # conexões mantidas por host
+    LLM_HTTP_KEEPALIVE_SECONDS: float = float(os.getenv('LLM_HTTP_KEEPALIVE_SECONDS', '120'))  # ociosidade máxima antes de reciclar
+    LLM_ASYNC_MAX_CONNECTIONS: int = int(os.getenv('LLM_ASYNC_MAX_CONNECTIONS', '50'))  # conexões simultâneas do cliente assíncrono
+    BATCH_MAX_IN_FLIGHT: int = int(os.getenv('BATCH_MAX_IN_FLIGHT', '20'))  # jobs em andamento no processamento em lote
+    
+    # Limitador de taxa compartilhado (todas as chamadas à Zello MIND do processo)
+    LLM_RATE_LIMIT_PER_SECOND: float = float(os.getenv('LLM_RATE_LIMIT_PER_SECOND', '5'))  # 0 desativa
+    LLM_RATE_LIMIT_BURST: int = int(os.getenv('LLM_RATE_LIMIT_BURST', '10'))
+    LLM_MAX_IN_FLIGHT: int = int(os.getenv('LLM_MAX_IN_FLIGHT', '8'))  # requisições simultâneas; 0 desativa
+    LLM_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv('LLM_QUEUE_TIMEOUT_SECONDS', '120'))  # espera máxima na fila
+    LLM_MERGE_IN_FLIGHT: bool = os.getenv('LLM_MERGE_IN_FLIGHT', 'true').lower() == 'true'  # agrupa requisições idênticas simultâneas
+    
+    # Circuit breaker da Zello MIND (falha imediata enquanto o backend estiver fora)
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv('LLM_BREAKER_FAILURE_THRESHOLD', '5'))  # falhas seguidas para abrir
+    LLM_BREAKER_RECOVERY_SECONDS: float = float(os.getenv('LLM_BREAKER_RECOVERY_SECONDS', '30'))  # tempo aberto antes do teste
+    LLM_BREAKER_HALF_OPEN_MAX_CALLS: int = int(os.getenv('LLM_BREAKER_HALF_OPEN_MAX_CALLS', '1'))  # chamadas de teste simultâneas
+    
+    # Timeouts adaptativos e requisições hedged (latência por etapa, modelo e tamanho da entrada)
+    LLM_READ_TIMEOUT_SECONDS: float = float(os.getenv('LLM_READ_TIMEOUT_SECONDS', '60'))  # padrão sem amostras suficientes
+    LLM_ADAPTIVE_TIMEOUTS: bool = os.getenv('LLM_ADAPTIVE_TIMEOUTS', 'true').lower() == 'true'
+    LLM_TIMEOUT_MIN_SECONDS: float = float(os.getenv('LLM_TIMEOUT_MIN_SECONDS', '10'))
+    LLM_TIMEOUT_MAX_SECONDS: float = float(os.getenv('LLM_TIMEOUT_MAX_SECONDS', '180'))
+    LLM_TIMEOUT_MULTIPLIER: float = float(os.getenv('LLM_TIMEOUT_MULTIPLIER', '2'))  # margem sobre o p99
+    LLM_LATENCY_WINDOW: int = int(os.getenv('LLM_LATENCY_WINDOW', '200'))  # amostras mantidas por classe
+    LLM_LATENCY_MIN_SAMPLES: int = int(os.getenv('LLM_LATENCY_MIN_SAMPLES', '20'))  # amostras antes de adaptar
+    LLM_HEDGE_ENABLED: bool = os.getenv('LLM_HEDGE_ENABLED', 'false').lower() == 'true'
+    LLM_HEDGE_BUDGET: float = float(os.getenv('LLM_HEDGE_BUDGET', '0.05'))  # fração máxima de requisições extras
+    
+    # Cache de completions (memória + SQLite compartilhado entre workers)
+    LLM_CACHE_ENABLED: bool = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_DB_PATH: str = os.getenv('LLM_CACHE_DB_PATH', 'cache/llm_completions.sqlite3')
+    LLM_CACHE_MEMORY_ENTRIES: int = int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', '256'))
+    LLM_CACHE_TTL_SECONDS: float = float(os.getenv('LLM_CACHE_TTL_SECONDS', '86400'))  # 24h
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv('LLM_CACHE_MAX_BYTES', '104857600'))  # 100MB
+    
+    # Cache do texto extraído de PDF/DOCX/DOC/áudio (chave: SHA-256 do arquivo + versão do extrator)
+    EXTRACTION_CACHE_ENABLED: bool = os.getenv('EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true'
+    EXTRACTION_CACHE_DB_PATH: str = os.getenv('EXTRACTION_CACHE_DB_PATH', 'cache/extractions.sqlite3')
+    EXTRACTION_CACHE_MEMORY_ENTRIES: int = int(os.getenv('EXTRACTION_CACHE_MEMORY_ENTRIES', '16'))
+    EXTRACTION_CACHE_TTL_SECONDS: float = float(os.getenv('EXTRACTION_CACHE_TTL_SECONDS', '2592000'))  # 30 dias
+    EXTRACTION_CACHE_MAX_BYTES: int = int(os.getenv('EXTRACTION_CACHE_MAX_BYTES', '209715200'))  # 200MB
+    
+    # Resultados de geração por arquivo enviado (chave: SHA-256 do upload + opções da requisição)
+    RESULT_CACHE_ENABLED: bool = os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+    RESULT_CACHE_DB_PATH: str = os.getenv('RESULT_CACHE_DB_PATH', 'cache/results.sqlite3')
+    RESULT_CACHE_MEMORY_ENTRIES: int = int(os.getenv('RESULT_CACHE_MEMORY_ENTRIES', '64'))
+    RESULT_CACHE_TTL_SECONDS: float = float(os.getenv('RESULT_CACHE_TTL_SECONDS', '604800'))  # 7 dias
+    RESULT_CACHE_MAX_BYTES: int = int(os.getenv('RESULT_CACHE_MAX_BYTES', '52428800'))  # 50MB
+    
+    # Pool de processos para PDF, DOCX, geração de documentos e Whisper (fora das threads das requisições)
+    CPU_POOL_WORKERS: int = int(os.getenv('CPU_POOL_WORKERS', str(min(os.cpu_count() or 1, 4))))  # 0 = tudo na thread da requisição
+    CPU_POOL_MAX_QUEUE: int = int(os.getenv('CPU_POOL_MAX_QUEUE', '8'))  # tarefas aguardando além das em execução; acima disso, 503
+    CPU_POOL_TASKS: str = os.getenv('CPU_POOL_TASKS', 'pdf,docx,render,audio')  # operações enviadas ao pool
+    
+    # Extração de PDFs por faixas de páginas no pool de CPU
+    PDF_EXTRACTION_WORKERS: int = int(os.getenv('PDF_EXTRACTION_WORKERS', str(min(os.cpu_count() or 1, 4))))  # faixas simultâneas por PDF (1 = uma tarefa)
+    PDF_PAGES_PER_TASK: int = int(os.getenv('PDF_PAGES_PER_TASK', '16'))
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '24'))  # primeiras páginas em uma tarefa; PDFs menores não se dividem
+    PDF_EXTRACTION_MAX_TOKENS: int = int(os.getenv('PDF_EXTRACTION_MAX_TOKENS', '0'))  # para ao atingir N tokens estimados (0 = extrai tudo)
+    
+    # Contabilização de tokens por chamada, job e colaborador
+    LLM_USAGE_TRACKING_ENABLED: bool = os.getenv('LLM_USAGE_TRACKING_ENABLED', 'true').lower() == 'true'
+    LLM_USAGE_FLUSH_SECONDS: float = float(os.getenv('LLM_USAGE_FLUSH_SECONDS', '5'))  # intervalo de gravação no banco
+    LLM_USAGE_BATCH_SIZE: int = int(os.getenv('LLM_USAGE_BATCH_SIZE', '100'))  # registros por gravação
+    
+    # Resumo map-reduce de transcrições longas (trechos resumidos em paralelo e combinados)
+    SUMMARY_CHUNKING_ENABLED: bool = os.getenv('SUMMARY_CHUNKING_ENABLED', 'true').lower() == 'true'
+    SUMMARY_CHUNK_THRESHOLD_TOKENS: int = int(os.getenv('SUMMARY_CHUNK_THRESHOLD_TOKENS', '12000'))  # acima disso, usa map-reduce
+    SUMMARY_CHUNK_TOKENS: int = int(os.getenv('SUMMARY_CHUNK_TOKENS', '4000'))  # orçamento de cada trecho
+    
+    # Orçamento de tokens do prompt por modelo (contexto × margem − resposta); acima disso não chega à API
+    LLM_CONTEXT_TOKENS: str = os.getenv('LLM_CONTEXT_TOKENS', 'gpt-4o-mini:128000,zello-mind:32000,zello-mind-pro:128000')  # modelo:tokens
+    LLM_DEFAULT_CONTEXT_TOKENS: int = int(os.getenv('LLM_DEFAULT_CONTEXT_TOKENS', '32000'))  # modelos fora da lista
+    PROMPT_BUDGET_SAFETY: float = float(os.getenv('PROMPT_BUDGET_SAFETY', '0.9'))  # fração do contexto usável (a estimativa é aproximada)
+    PROMPT_OVERSIZE_POLICY: str = os.getenv('PROMPT_OVERSIZE_POLICY', 'chunk')  # chunk (processa por trechos) ou reject
+    SUMMARY_MAP_CONCURRENCY: int = int(os.getenv('SUMMARY_MAP_CONCURRENCY', '4'))  # trechos resumidos ao mesmo tempo
+    SUMMARY_DIGESTS_ENABLED: bool = os.getenv('SUMMARY_DIGESTS_ENABLED', 'true').lower() == 'true'  # reaproveita resumos de trechos
+    SUMMARY_DIGEST_DB_PATH: str = os.getenv('SUMMARY_DIGEST_DB_PATH', 'cache/summary_digests.sqlite3')
+    SUMMARY_DIGEST_MEMORY_ENTRIES: int = int(os.getenv('SUMMARY_DIGEST_MEMORY_ENTRIES', '32'))
+    SUMMARY_DIGEST_TTL_SECONDS: float = float(os.getenv('SUMMARY_DIGEST_TTL_SECONDS', '604800'))  # 7 dias
+    SUMMARY_DIGEST_MAX_BYTES: int = int(os.getenv('SUMMARY_DIGEST_MAX_BYTES', '52428800'))  # 50MB
+    
+    # Validação com veredito estruturado (nota de 0 a 10 usada quando a LLM não informa "aprovado")
+    VALIDATION_APPROVAL_SCORE: float = float(os.getenv('VALIDATION_APPROVAL_SCORE', '7'))
+    # Pré-validação local da estrutura (Como/Quero/Para, critérios, numeração) antes da LLM
+    PREVALIDATION_ENABLED: bool = os.getenv('PREVALIDATION_ENABLED', 'true').lower() == 'true'
+    PREVALIDATION_SKIP_LLM: bool = os.getenv('PREVALIDATION_SKIP_LLM', 'false').lower() == 'true'  # aprova sem LLM se a estrutura passar
+    # Correção na auto-correção: 'followup' envia a versão anterior + feedback (prompt limitado); 'full' reenvia os requisitos com todo o feedback acumulado
+    CORRECTION_MODE: str = os.getenv('CORRECTION_MODE', 'followup')
+    CORRECTION_PROMPT_MAX_TOKENS: int = int(os.getenv('CORRECTION_PROMPT_MAX_TOKENS', '8000'))  # tokens estimados por prompt de correção
+    
+    # Geração especulativa: K candidatas em paralelo, vence a primeira aprovada (endpoints separados por vírgula, ex.: process-stream,process)
+    SPECULATIVE_ENDPOINTS: str = os.getenv('SPECULATIVE_ENDPOINTS', '')
+    SPECULATIVE_CANDIDATES: int = int(os.getenv('SPECULATIVE_CANDIDATES', '3'))
+    SPECULATIVE_TEMPERATURES: str = os.getenv('SPECULATIVE_TEMPERATURES', '0.4,0.7,1.0')
+    SPECULATIVE_MAX_WORKERS: int = int(os.getenv('SPECULATIVE_MAX_WORKERS', '12'))  # threads para candidatas (cliente síncrono)
+    
+    # Compactação da transcrição antes dos prompts (desligável por requisição com compact_transcript=false)
+    TRANSCRIPT_COMPACTION_ENABLED: bool = os.getenv('TRANSCRIPT_COMPACTION_ENABLED', 'true').lower() == 'true'
+    TRANSCRIPT_COMPACTION_STEPS: str = os.getenv('TRANSCRIPT_COMPACTION_STEPS', 'boilerplate,speakers,timestamps,fillers,duplicates,whitespace')
+    TRANSCRIPT_DEDUP_MIN_CHARS: int = int(os.getenv('TRANSCRIPT_DEDUP_MIN_CHARS', '40'))  # linhas menores nunca são tratadas como duplicadas
+    
     # Configurações de e-mail
     SMTP_SERVER: str = os.getenv('EMAIL_SMTP_SERVER', 'smtp.gmail.com')
     SMTP_PORT: int = int(os.getenv('EMAIL_SMTP_PORT', '587'))
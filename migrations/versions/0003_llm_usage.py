@@ -0,0 +1,62 @@
+"""add llm usage accounting tables
+
+Revision ID: 0003_llm_usage
+Revises: 0002_gmail_gdrive_fields
+Create Date: 2026-10-17 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003_llm_usage'
+down_revision = '0002_gmail_gdrive_fields'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_usage_records',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('job_id', sa.Integer(), sa.ForeignKey('transcription_jobs.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('collaborator_email', sa.String(length=255), nullable=True),
+        sa.Column('prompt_class', sa.String(length=32), nullable=False),
+        sa.Column('model', sa.String(length=64), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('latency_ms', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('tokens_per_second', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('streamed', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('estimated', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_llm_usage_records_job_id', 'llm_usage_records', ['job_id'])
+    op.create_index('ix_llm_usage_records_collaborator_email', 'llm_usage_records', ['collaborator_email'])
+    op.create_index('ix_llm_usage_records_created_at', 'llm_usage_records', ['created_at'])
+
+    op.create_table(
+        'llm_usage_daily',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('collaborator_email', sa.String(length=255), nullable=False, server_default=''),
+        sa.Column('prompt_class', sa.String(length=32), nullable=False),
+        sa.Column('model', sa.String(length=64), nullable=False),
+        sa.Column('calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('prompt_tokens', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('completion_tokens', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_latency_ms', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.UniqueConstraint('day', 'collaborator_email', 'prompt_class', 'model', name='uq_llm_usage_daily_key'),
+    )
+    op.create_index('ix_llm_usage_daily_day', 'llm_usage_daily', ['day'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_llm_usage_daily_day', table_name='llm_usage_daily')
+    op.drop_table('llm_usage_daily')
+
+    op.drop_index('ix_llm_usage_records_created_at', table_name='llm_usage_records')
+    op.drop_index('ix_llm_usage_records_collaborator_email', table_name='llm_usage_records')
+    op.drop_index('ix_llm_usage_records_job_id', table_name='llm_usage_records')
+    op.drop_table('llm_usage_records')
@@ -2,10 +2,10 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import String, Integer, DateTime, Enum as SAEnum, ForeignKey, BigInteger
+from sqlalchemy import String, Integer, DateTime, Date, Float, Boolean, Enum as SAEnum, ForeignKey, BigInteger, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database import Base
@@ -66,11 +66,51 @@ class ProcessingLog(Base):
     job: Mapped["TranscriptionJob"] = relationship(back_populates="logs")
 
 
+class LLMUsageRecord(Base):
+    """Uso de tokens de uma chamada à LLM (uma linha por requisição enviada à API)."""
+
+    __tablename__ = "llm_usage_records"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job_id: Mapped[Optional[int]] = mapped_column(ForeignKey("transcription_jobs.id", ondelete="SET NULL"), nullable=True, index=True)
+    collaborator_email: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
+    prompt_class: Mapped[str] = mapped_column(String(32), nullable=False)  # generation, validation, summary...
+    model: Mapped[str] = mapped_column(String(64), nullable=False)
+    prompt_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    latency_ms: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tokens_per_second: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    streamed: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    estimated: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)  # API não informou usage
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class LLMUsageDaily(Base):
+    """Totais diários de uso da LLM por colaborador, etapa e modelo."""
+
+    __tablename__ = "llm_usage_daily"
+    __table_args__ = (
+        UniqueConstraint("day", "collaborator_email", "prompt_class", "model", name="uq_llm_usage_daily_key"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    collaborator_email: Mapped[str] = mapped_column(String(255), nullable=False, default="")  # "" = sem colaborador
+    prompt_class: Mapped[str] = mapped_column(String(32), nullable=False)
+    model: Mapped[str] = mapped_column(String(64), nullable=False)
+    calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    prompt_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    completion_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    total_latency_ms: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
 __all__ = [
     "JobStatus",
     "TranscriptionJob",
     "ProcessingArtifact",
     "ProcessingLog",
+    "LLMUsageRecord",
+    "LLMUsageDaily",
 ]
 
 
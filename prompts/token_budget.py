@@ -0,0 +1,191 @@
+"""
+Estimativa de tokens e orçamento de prompt por modelo.
+
+O estimador é compartilhado pelos templates (UserStoryPrompts), pelo
+GenerationService e pelos clientes de LLM. Antes de cada envio, o prompt é
+conferido contra o orçamento do modelo:
+
+    orçamento = contexto do modelo × PROMPT_BUDGET_SAFETY − tokens da resposta
+
+Um prompt acima do orçamento levanta PromptTooLargeError sem chegar à API,
+em vez de esperar o timeout de leitura ou a rejeição e repetir a chamada.
+O GenerationService usa o mesmo orçamento para desviar entradas grandes
+para o processamento por trechos (PROMPT_OVERSIZE_POLICY=chunk).
+"""
+
+import threading
+from typing import Dict, Any, List, Optional
+
+from config import config
+
+
+# Aproximação usada quando não há tokenizador: ~4 caracteres por token
+CHARS_PER_TOKEN = 4
+
+# Tokens de formatação por mensagem do chat (papel e delimitadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima a quantidade de tokens de um texto.
+
+    Args:
+        text: Texto de entrada ou saída
+
+    Returns:
+        Número aproximado de tokens (caracteres / 4)
+    """
+    if not text:
+        return 0
+    return max(len(text) // CHARS_PER_TOKEN, 1)
+
+
+def messages_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    Estima os tokens de prompt de uma lista de mensagens do chat.
+
+    Args:
+        messages: Mensagens no formato [{"role": ..., "content": ...}]
+
+    Returns:
+        Tokens estimados do conteúdo mais a formatação de cada mensagem
+    """
+    return sum(estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def context_tokens(model: str) -> int:
+    """
+    Tamanho de contexto configurado para um modelo.
+
+    Args:
+        model: Nome do modelo
+
+    Returns:
+        Tokens de contexto (LLM_CONTEXT_TOKENS ou LLM_DEFAULT_CONTEXT_TOKENS)
+    """
+    for item in config.LLM_CONTEXT_TOKENS.split(","):
+        name, _, tokens = item.partition(":")
+        if name.strip() == model and tokens.strip():
+            return int(tokens)
+    return config.LLM_DEFAULT_CONTEXT_TOKENS
+
+
+def prompt_budget(model: str, max_output_tokens: int) -> int:
+    """
+    Calcula o orçamento de tokens do prompt para um modelo.
+
+    Args:
+        model: Nome do modelo
+        max_output_tokens: Tokens reservados para a resposta
+
+    Returns:
+        Tokens estimados que o prompt pode ocupar
+    """
+    return int(context_tokens(model) * config.PROMPT_BUDGET_SAFETY) - max_output_tokens
+
+
+class PromptTooLargeError(Exception):
+    """Prompt acima do orçamento do modelo; não adianta repetir a chamada."""
+
+    error_type = "prompt_too_large"
+
+    def __init__(self, tokens: int, budget: int, model: str, stage: str = None):
+        self.tokens = tokens
+        self.budget = budget
+        self.model = model
+        self.stage = stage
+        super().__init__(
+            f"Entrada grande demais para o modelo {model}: ~{tokens} tokens estimados no prompt"
+            f"{f' ({stage})' if stage else ''}, limite de {budget}. Divida o documento ou reduza a transcrição."
+        )
+
+    def details(self) -> Dict[str, Any]:
+        """Dados do orçamento para o corpo das respostas de erro."""
+        return {"tokens": self.tokens, "budget": self.budget, "model": self.model, "stage": self.stage}
+
+
+def check_prompt(messages: List[Dict[str, str]], model: str, max_output_tokens: int, stage: str = None) -> int:
+    """
+    Confere um prompt contra o orçamento do modelo antes do envio.
+
+    Args:
+        messages: Mensagens do chat
+        model: Modelo de destino
+        max_output_tokens: Tokens reservados para a resposta
+        stage: Etapa do pipeline (para métricas e mensagens de erro)
+
+    Returns:
+        Tokens estimados do prompt
+
+    Raises:
+        PromptTooLargeError: Se o prompt exceder o orçamento
+    """
+    tokens = messages_tokens(messages)
+    budget = prompt_budget(model, max_output_tokens)
+    stats = get_shared_prompt_budget_stats()
+    if tokens > budget:
+        stats.record(stage, "rejected", tokens)
+        raise PromptTooLargeError(tokens, budget, model, stage)
+    stats.record(stage, "sent", tokens)
+    return tokens
+
+
+class PromptBudgetStats:
+    """Contadores de prompts conferidos, desviados para trechos e rejeitados, por etapa."""
+
+    OUTCOMES = ("sent", "chunked", "rejected")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, int]] = {}
+
+    def record(self, stage: Optional[str], outcome: str, tokens: int) -> None:
+        """
+        Registra o desfecho da conferência de um prompt.
+
+        Args:
+            stage: Etapa do pipeline (None vira 'other')
+            outcome: 'sent', 'chunked' ou 'rejected'
+            tokens: Tokens estimados do prompt
+        """
+        with self._lock:
+            entry = self._stages.setdefault(stage or "other", {**{outcome: 0 for outcome in self.OUTCOMES}, "max_tokens": 0})
+            entry[outcome] += 1
+            entry["max_tokens"] = max(entry["max_tokens"], tokens)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores por etapa e os orçamentos configurados.
+
+        Returns:
+            Dicionário com 'stages' ({etapa: {sent, chunked, rejected, max_tokens}}),
+            totais e a política para entradas grandes
+        """
+        with self._lock:
+            stages = {stage: dict(entry) for stage, entry in sorted(self._stages.items())}
+        totals = {outcome: sum(entry[outcome] for entry in stages.values()) for outcome in self.OUTCOMES}
+        return {
+            "stages": stages,
+            "totals": totals,
+            "oversize_policy": config.PROMPT_OVERSIZE_POLICY,
+            "safety": config.PROMPT_BUDGET_SAFETY
+        }
+
+
+_shared_stats: Optional[PromptBudgetStats] = None
+_shared_stats_lock = threading.Lock()
+
+
+def get_shared_prompt_budget_stats() -> PromptBudgetStats:
+    """
+    Retorna os contadores de orçamento de prompt compartilhados pelo processo.
+
+    Returns:
+        Instância única de PromptBudgetStats
+    """
+    global _shared_stats
+    with _shared_stats_lock:
+        if _shared_stats is None:
+            _shared_stats = PromptBudgetStats()
+        return _shared_stats
@@ -2,7 +2,84 @@
 Templates de prompts para geração e análise de Histórias de Usuário.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+
+# Estrutura do resumo executivo (compartilhada pelo resumo direto e pelo map-reduce)
+MEETING_SUMMARY_FORMAT = """# FORMATO OBRIGATÓRIO PARA O RESUMO
+
+## 1. **Resumo Executivo**
+- Breve visão geral da reunião (2-3 parágrafos)
+- Objetivo principal da reunião
+- Duração e participantes principais
+
+## 2. **Pontos Principais Discutidos**
+- Lista numerada dos tópicos mais importantes abordados
+- Contexto de cada ponto
+- Destaque para questões críticas ou urgentes
+
+## 3. **Decisões Tomadas**
+- Lista clara de todas as decisões tomadas durante a reunião
+- Responsáveis por cada decisão (se mencionado)
+- Prazos ou marcos associados (se mencionado)
+
+## 4. **Ações Pendentes**
+- Lista de ações identificadas que precisam ser executadas
+- Responsável por cada ação (se mencionado)
+- Prazo ou data limite (se mencionado)
+- Prioridade (Alta/Média/Baixa - inferir se não mencionado)
+
+## 5. **Participantes Relevantes**
+- Lista dos participantes que tiveram participação ativa
+- Papel ou função de cada um (se identificável)
+- Principais contribuições de cada participante
+
+## 6. **Próximos Passos**
+- Resumo das próximas ações planejadas
+- Próxima reunião ou follow-up (se mencionado)
+- Marcos ou entregas esperadas
+
+## 7. **Observações Adicionais**
+- Informações relevantes que não se encaixam nas categorias acima
+- Riscos ou preocupações levantadas
+- Oportunidades identificadas
+- Dependências ou bloqueadores mencionados
+
+---
+
+# DIRETRIZES PARA O RESUMO
+
+1. **Concisão e Clareza**: Seja objetivo, mas completo. Evite redundâncias.
+2. **Foco em Ações**: Destaque informações acionáveis e decisões tomadas.
+3. **Organização**: Use formatação clara (listas, seções) para facilitar leitura.
+4. **Precisão**: Mantenha fidelidade ao conteúdo da transcrição. Não invente informações.
+5. **Priorização**: Destaque informações mais importantes primeiro.
+6. **Linguagem Profissional**: Use linguagem formal e clara, adequada para documentação executiva.
+7. **Estruturação**: Organize o resumo de forma lógica e fácil de navegar.
+
+---
+
+"""
+
+
+# Veredito da validação: lido por services/validation_verdict.py (não alterar as chaves)
+VALIDATION_VERDICT_FORMAT = """# VEREDITO
+
+Ao final da análise, escreva a linha "VEREDITO: APROVADO" ou "VEREDITO: REPROVADO" e, em seguida, um bloco JSON exatamente neste formato:
+
+```json
+{
+  "aprovado": true,
+  "nota": 8,
+  "historias": [
+    {"historia": "Nome da História", "aprovada": true, "problemas": []}
+  ]
+}
+```
+
+- "nota": de 0 a 10 para o conjunto das histórias.
+- "aprovado": true se as histórias podem seguir para o time sem retrabalho; sugestões opcionais de melhoria não reprovam.
+- "problemas": apenas problemas que impedem a aprovação, cada um em uma frase objetiva e acionável."""
 
 
 class UserStoryPrompts:
@@ -171,6 +248,44 @@ Para cada História de Usuário gerada, você deve fornecer:
 Agora, analise o conteúdo fornecido e gere todas as Histórias de Usuário seguindo rigorosamente este formato.
         """.strip()
     
+    @staticmethod
+    def extract_requirements_from_chunk(chunk: str, index: int, total: int) -> str:
+        """
+        Gera prompt para extrair os requisitos de um trecho de uma entrada grande demais para um único prompt.
+        
+        As anotações de todos os trechos substituem o texto original no prompt
+        de geração de Histórias de Usuário.
+        
+        Args:
+            chunk: Trecho da transcrição/requisitos
+            index: Posição do trecho (1, 2, ...)
+            total: Quantidade de trechos
+            
+        Returns:
+            Prompt formatado
+        """
+        return f"""
+Você está analisando o trecho {index} de {total} de uma transcrição/documento de requisitos longo. As anotações de todos os trechos serão usadas depois para escrever as Histórias de Usuário do sistema.
+
+# TRECHO {index}/{total}:
+
+{chunk}
+
+---
+
+# O QUE EXTRAIR DESTE TRECHO
+
+Liste de forma objetiva, sem introdução:
+- **Funcionalidades e telas** solicitadas ou impactadas, com o comportamento esperado
+- **Perfis de usuário** envolvidos e suas permissões
+- **Regras de negócio**, validações e restrições
+- **Campos, dados e integrações** mencionados
+- **Critérios de aceitação** ou exemplos de uso citados
+- **Decisões e pendências** que afetam o escopo
+
+Mantenha nomes, números, regras e valores exatamente como aparecem. Não invente informações: se algo não aparece no trecho, omita.
+        """.strip()
+    
     @staticmethod
     def analyze_existing_user_stories(user_stories: str) -> str:
         """
@@ -218,6 +333,65 @@ ANÁLISE SOLICITADA:
 Forneça uma análise detalhada e construtiva:
         """.strip()
     
+    @staticmethod
+    def validate_user_stories(user_stories: str) -> str:
+        """
+        Gera prompt de validação com veredito estruturado (usado na auto-correção).
+        
+        Args:
+            user_stories: Texto das Histórias de Usuário
+            
+        Returns:
+            Prompt formatado
+        """
+        return f"""
+{UserStoryPrompts.analyze_existing_user_stories(user_stories)}
+
+{VALIDATION_VERDICT_FORMAT}
+        """.strip()
+    
+    @staticmethod
+    def correction_context(requirements: str = None) -> str:
+        """
+        Gera a primeira mensagem da correção: os requisitos ou o aviso de que foram omitidos.
+        
+        Args:
+            requirements: Requisitos/transcrição (ou trecho), quando o feedback exigir consultá-los
+            
+        Returns:
+            Prompt formatado
+        """
+        if requirements:
+            return f"""
+Gere as Histórias de Usuário para os requisitos abaixo.
+
+REQUISITOS:
+{requirements}
+            """.strip()
+        return "Gere as Histórias de Usuário para os requisitos do usuário (requisitos omitidos nesta correção; eles já foram considerados na versão anterior)."
+    
+    @staticmethod
+    def correct_user_stories(feedback: str, observations: str = None) -> str:
+        """
+        Gera o pedido de correção enviado após a resposta anterior (turno de continuação).
+        
+        Args:
+            feedback: Problemas apontados na validação
+            observations: Observações adicionais do usuário (opcional)
+            
+        Returns:
+            Prompt formatado
+        """
+        observations_block = f"\n\nOBSERVAÇÕES DO USUÁRIO (continuam valendo):\n{observations.strip()}" if observations and observations.strip() else ""
+        return f"""
+A versão anterior das Histórias de Usuário foi reprovada na validação.
+
+PROBLEMAS APONTADOS:
+{feedback}{observations_block}
+
+Corrija apenas o que os problemas apontam e mantenha o restante como está. Responda com a versão completa e corrigida de TODAS as Histórias de Usuário, no mesmo formato (numeração, "Como ..., quero ... para ...", critérios de aceitação e demais seções), sem comentários sobre as alterações.
+        """.strip()
+    
     @staticmethod
     def refine_user_story(user_story: str) -> str:
         """
@@ -399,66 +573,84 @@ Sua missão é **criar um resumo executivo completo e estruturado** da transcri
 
 ---
 
-# FORMATO OBRIGATÓRIO PARA O RESUMO
+{MEETING_SUMMARY_FORMAT}# SAÍDA ESPERADA
 
-## 1. **Resumo Executivo**
-- Breve visão geral da reunião (2-3 parágrafos)
-- Objetivo principal da reunião
-- Duração e participantes principais
+Forneça um resumo completo seguindo rigorosamente o formato acima, garantindo que todas as seções sejam preenchidas com informações relevantes extraídas da transcrição.
 
-## 2. **Pontos Principais Discutidos**
-- Lista numerada dos tópicos mais importantes abordados
-- Contexto de cada ponto
-- Destaque para questões críticas ou urgentes
+Se alguma seção não tiver informações na transcrição, indique claramente: "Nenhuma informação disponível nesta seção."
 
-## 3. **Decisões Tomadas**
-- Lista clara de todas as decisões tomadas durante a reunião
-- Responsáveis por cada decisão (se mencionado)
-- Prazos ou marcos associados (se mencionado)
+Agora, analise a transcrição fornecida e gere o resumo executivo completo.
+        """.strip()
+    
+    @staticmethod
+    def summarize_transcript_chunk(chunk: str, index: int, total: int) -> str:
+        """
+        Gera prompt para resumir um trecho de transcrição longa (etapa map).
+        
+        Args:
+            chunk: Trecho da transcrição
+            index: Posição do trecho (1, 2, ...)
+            total: Quantidade de trechos
+            
+        Returns:
+            Prompt formatado
+        """
+        return f"""
+Você está analisando o trecho {index} de {total} de uma transcrição de reunião longa. Os resumos de todos os trechos serão combinados depois em um único resumo executivo.
 
-## 4. **Ações Pendentes**
-- Lista de ações identificadas que precisam ser executadas
-- Responsável por cada ação (se mencionado)
-- Prazo ou data limite (se mencionado)
-- Prioridade (Alta/Média/Baixa - inferir se não mencionado)
+# TRECHO {index}/{total} DA TRANSCRIÇÃO:
 
-## 5. **Participantes Relevantes**
-- Lista dos participantes que tiveram participação ativa
-- Papel ou função de cada um (se identificável)
-- Principais contribuições de cada participante
+{chunk}
 
-## 6. **Próximos Passos**
-- Resumo das próximas ações planejadas
-- Próxima reunião ou follow-up (se mencionado)
-- Marcos ou entregas esperadas
+---
 
-## 7. **Observações Adicionais**
-- Informações relevantes que não se encaixam nas categorias acima
-- Riscos ou preocupações levantadas
-- Oportunidades identificadas
-- Dependências ou bloqueadores mencionados
+# O QUE EXTRAIR DESTE TRECHO
 
----
+Liste de forma objetiva, sem introdução:
+- **Tópicos discutidos**, com o contexto essencial
+- **Decisões tomadas** e quem decidiu (se mencionado)
+- **Ações** com responsável e prazo (se mencionados)
+- **Participantes** ativos e suas principais contribuições
+- **Riscos, bloqueios, dependências ou oportunidades** mencionados
 
-# DIRETRIZES PARA O RESUMO
+Mantenha nomes, números, datas e prazos exatamente como aparecem. Não invente informações: se algo não aparece no trecho, omita.
+        """.strip()
+    
+    @staticmethod
+    def combine_meeting_summaries(partial_summaries: List[str]) -> str:
+        """
+        Gera prompt para combinar os resumos parciais em um resumo executivo (etapa reduce).
+        
+        Args:
+            partial_summaries: Resumos dos trechos, na ordem da reunião
+            
+        Returns:
+            Prompt formatado
+        """
+        total = len(partial_summaries)
+        partials = "\n\n".join(
+            f"## Trecho {index}/{total}\n\n{summary.strip()}"
+            for index, summary in enumerate(partial_summaries, start=1)
+        )
+        return f"""
+# CONTEXTO E OBJETIVO DO AGENTE
+Você é um **especialista em análise de reuniões e documentação executiva**, com ampla experiência em síntese de informações, identificação de decisões estratégicas e organização de ações.
 
-1. **Concisão e Clareza**: Seja objetivo, mas completo. Evite redundâncias.
-2. **Foco em Ações**: Destaque informações acionáveis e decisões tomadas.
-3. **Organização**: Use formatação clara (listas, seções) para facilitar leitura.
-4. **Precisão**: Mantenha fidelidade ao conteúdo da transcrição. Não invente informações.
-5. **Priorização**: Destaque informações mais importantes primeiro.
-6. **Linguagem Profissional**: Use linguagem formal e clara, adequada para documentação executiva.
-7. **Estruturação**: Organize o resumo de forma lógica e fácil de navegar.
+A transcrição da reunião era longa e foi analisada em {total} trechos consecutivos. Sua missão é **combinar as anotações dos trechos em um único resumo executivo completo e estruturado**, eliminando repetições e preservando decisões, ações, responsáveis e prazos.
 
 ---
 
-# SAÍDA ESPERADA
+# ANOTAÇÕES DOS TRECHOS (em ordem cronológica):
 
-Forneça um resumo completo seguindo rigorosamente o formato acima, garantindo que todas as seções sejam preenchidas com informações relevantes extraídas da transcrição.
+{partials}
 
-Se alguma seção não tiver informações na transcrição, indique claramente: "Nenhuma informação disponível nesta seção."
+---
 
-Agora, analise a transcrição fornecida e gere o resumo executivo completo.
+{MEETING_SUMMARY_FORMAT}# SAÍDA ESPERADA
+
+Forneça um resumo completo seguindo rigorosamente o formato acima. Quando o mesmo tópico aparecer em vários trechos, consolide-o em um único item; em caso de informações conflitantes, prevalece a mais recente.
+
+Se alguma seção não tiver informações nas anotações, indique claramente: "Nenhuma informação disponível nesta seção."
         """.strip()
     
     @staticmethod
@@ -471,9 +663,14 @@ Agora, analise a transcrição fornecida e gere o resumo executivo completo.
         """
         return {
             "generate_from_requirements": "Gerar Histórias de Usuário a partir de requisitos",
+            "extract_requirements_from_chunk": "Extrair requisitos de um trecho de entrada grande (HUs por trechos)",
             "analyze_existing": "Analisar Histórias de Usuário existentes",
+            "validate_user_stories": "Validar Histórias de Usuário com veredito estruturado",
+            "correct_user_stories": "Corrigir Histórias de Usuário a partir do feedback da validação",
             "refine_story": "Refinar uma História de Usuário específica",
             "generate_acceptance_criteria": "Gerar critérios de aceitação",
             "estimate_effort": "Estimar esforço de desenvolvimento",
-            "generate_meeting_summary": "Gerar resumo executivo de reunião"
+            "generate_meeting_summary": "Gerar resumo executivo de reunião",
+            "summarize_transcript_chunk": "Resumir trecho de transcrição longa (map)",
+            "combine_meeting_summaries": "Combinar resumos de trechos em resumo executivo (reduce)"
         }
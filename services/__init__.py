@@ -3,9 +3,11 @@ Pacote de serviços para automação de Histórias de Usuário.
 """
 
 from .llm_service import LLMService
+from .async_llm_service import AsyncLLMService
 from .email_service import EmailService
 from .file_service import FileService
 from .generation_service import GenerationService
 from .repository_monitor import RepositoryMonitor
+from .batch_processor import BatchProcessor
 
-__all__ = ['LLMService', 'EmailService', 'FileService', 'GenerationService', 'RepositoryMonitor']
+__all__ = ['LLMService', 'AsyncLLMService', 'EmailService', 'FileService', 'GenerationService', 'RepositoryMonitor', 'BatchProcessor']
@@ -0,0 +1,468 @@
+"""
+Cliente assíncrono (httpx) para a Zello MIND LLM.
+
+Mantém o mesmo contrato de mensagens e resposta do LLMService, mas permite que
+um único event loop mantenha dezenas de completions em andamento sem ocupar uma
+thread do sistema operacional por requisição.
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
+
+import httpx
+
+from config import config
+from services.completion_cache import CompletionCache, get_shared_completion_cache, make_completion_key
+from services.rate_limiter import RateLimiter, get_shared_rate_limiter, throttle_delay
+from services.request_coalescer import MergedRequestAbandoned, RequestCoalescer, get_shared_request_coalescer
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, get_shared_circuit_breaker
+from services.latency_tracker import LatencyTracker, get_shared_latency_tracker
+from services.usage_tracker import UsageRecorder, get_shared_usage_recorder
+from prompts.token_budget import check_prompt
+from services.llm_service import (
+    CHAT_COMPLETIONS_PATH,
+    CONNECT_TIMEOUT_SECONDS,
+    DEFAULT_CHAT_MODEL,
+    DEFAULT_MAX_TOKENS,
+    DEFAULT_TEMPERATURE,
+    MAX_RETRIES,
+    build_chat_headers,
+    build_chat_payload,
+    extract_chat_content,
+    extract_stream_delta,
+    extract_stream_usage,
+    extract_usage,
+    get_zello_base_url,
+    is_event_stream,
+    is_server_failure,
+    resolve_usage,
+)
+
+# Exceções que indicam backend indisponível (contam para o circuit breaker)
+BACKEND_FAILURES = (httpx.TransportError,)
+
+
+class AsyncLLMService:
+    """Serviço assíncrono para comunicação com Zello MIND LLM."""
+
+    def __init__(
+        self,
+        zello_api_key: str = None,
+        max_connections: int = None,
+        cache: CompletionCache = None,
+        rate_limiter: RateLimiter = None,
+        coalescer: RequestCoalescer = None,
+        circuit_breaker: CircuitBreaker = None,
+        latency_tracker: LatencyTracker = None,
+        usage_recorder: UsageRecorder = None
+    ):
+        """
+        Inicializa o serviço assíncrono de LLM.
+
+        Args:
+            zello_api_key: Chave de API da Zello (opcional, usa config se não fornecida)
+            max_connections: Máximo de conexões simultâneas (opcional, usa config se não fornecido)
+            cache: Cache de completions (opcional, usa o cache compartilhado do processo)
+            rate_limiter: Limitador de taxa (opcional, usa o limitador compartilhado do processo)
+            coalescer: Agrupador de requisições idênticas (opcional, usa o do processo)
+            circuit_breaker: Circuit breaker da Zello (opcional, usa o do processo)
+            latency_tracker: Rastreador de latência para timeouts adaptativos (opcional, usa o do processo)
+            usage_recorder: Contabilizador de tokens por job/colaborador (opcional, usa o do processo)
+        """
+        self.zello_api_key = zello_api_key or config.ZELLO_API_KEY
+        self.max_connections = max_connections or config.LLM_ASYNC_MAX_CONNECTIONS
+        self.cache = cache or get_shared_completion_cache()
+        self.rate_limiter = rate_limiter or get_shared_rate_limiter()
+        self.coalescer = coalescer or get_shared_request_coalescer()
+        self.circuit_breaker = circuit_breaker or get_shared_circuit_breaker()
+        self.latency_tracker = latency_tracker or get_shared_latency_tracker()
+        self.usage_recorder = usage_recorder or get_shared_usage_recorder()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Obtém o cliente httpx do event loop atual, criando-o se necessário.
+
+        O cliente é recriado quando usado a partir de outro loop (ex.: chamadas
+        sucessivas de `asyncio.run`), pois suas conexões pertencem ao loop original.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=config.LLM_HTTP_POOL_SIZE,
+                keepalive_expiry=config.LLM_HTTP_KEEPALIVE_SECONDS
+            )
+            self._client = httpx.AsyncClient(
+                limits=limits,
+                # padrão; cada requisição usa o timeout de leitura da sua classe de prompt
+                timeout=httpx.Timeout(config.LLM_READ_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS)
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def get_completion(
+        self,
+        provider: str,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_CHAT_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        use_cache: bool = True,
+        prompt_class: str = None
+    ) -> str:
+        """
+        Obtém uma resposta de completão da Zello MIND LLM sem bloquear o event loop.
+
+        Args:
+            provider: Provedor da LLM (apenas 'zello' é suportado)
+            messages: Lista de mensagens no formato [{"role": "user", "content": "texto"}]
+            model: Modelo a ser usado
+            temperature: Temperatura de amostragem
+            max_tokens: Limite de tokens da resposta
+            use_cache: Se False, ignora o cache e força uma nova amostra
+            prompt_class: Classe do prompt (etapa do pipeline), usada nos timeouts adaptativos
+
+        Returns:
+            Conteúdo da resposta da IA
+
+        Raises:
+            PromptTooLargeError: Se o prompt exceder o orçamento do modelo (sem chamar a API)
+            Exception: Se houver erro na comunicação com a API
+        """
+        # Apenas Zello MIND é suportado
+        if provider != 'zello':
+            provider = 'zello'
+
+        if not self.zello_api_key:
+            raise Exception("Zello API key não configurada")
+
+        # Prompt acima do orçamento do modelo falha aqui, sem chamada nem retries
+        check_prompt(messages, model, max_tokens, prompt_class)
+
+        # O nível em disco do cache é SQLite: consultas rodam fora do event loop
+        cache_key = make_completion_key(messages, model, temperature, max_tokens)
+        if use_cache:
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return cached
+        else:
+            self.cache.record_bypass()
+
+        payload = build_chat_payload(messages, model, temperature, max_tokens)
+        latency_key = self.latency_tracker.bucket_key(prompt_class, model, messages)
+
+        async def request() -> str:
+            content = await self._request_completion(payload, latency_key, prompt_class)
+            await asyncio.to_thread(self.cache.set, cache_key, content)
+            return content
+
+        # Registro compartilhado com o cliente síncrono: agrupa também entre threads e loops
+        if config.LLM_MERGE_IN_FLIGHT:
+            return await self.coalescer.arun(cache_key, request)
+        return await request()
+
+    async def stream_completion(
+        self,
+        provider: str,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_CHAT_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        use_cache: bool = True,
+        prompt_class: str = None
+    ) -> AsyncIterator[str]:
+        """
+        Versão assíncrona de LLMService.stream_completion.
+
+        Yields:
+            Trechos de texto da resposta
+        """
+        if provider != 'zello':
+            provider = 'zello'
+        if not self.zello_api_key:
+            raise Exception("Zello API key não configurada")
+
+        # Prompt acima do orçamento do modelo falha aqui, sem chamada nem retries
+        check_prompt(messages, model, max_tokens, prompt_class)
+
+        cache_key = make_completion_key(messages, model, temperature, max_tokens)
+        if use_cache:
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                yield cached
+                return
+        else:
+            self.cache.record_bypass()
+
+        leader, future = True, None
+        if config.LLM_MERGE_IN_FLIGHT:
+            leader, future = self.coalescer.claim(cache_key)
+        if not leader:
+            try:
+                content = await self.coalescer.await_result(future)
+            except MergedRequestAbandoned:
+                async for chunk in self.stream_completion(provider, messages, model, temperature, max_tokens, use_cache, prompt_class):
+                    yield chunk
+                return
+            yield content
+            return
+
+        payload = build_chat_payload(messages, model, temperature, max_tokens)
+        payload["stream"] = True
+        parts = []
+        latency_key = self.latency_tracker.bucket_key(prompt_class, model, messages)
+        try:
+            async for chunk in self._request_stream(payload, latency_key, prompt_class):
+                parts.append(chunk)
+                yield chunk
+        except BaseException as e:
+            if future is not None:
+                self.coalescer.resolve(cache_key, future, error=e)
+            raise
+        content = "".join(parts)
+        await asyncio.to_thread(self.cache.set, cache_key, content)
+        if future is not None:
+            self.coalescer.resolve(cache_key, future, result=content)
+
+    async def _request_stream(
+        self,
+        payload: Dict[str, Any],
+        latency_key: str = None,
+        prompt_class: str = None
+    ) -> AsyncIterator[str]:
+        """
+        Envia a requisição em streaming; só há nova tentativa se nenhum trecho foi recebido.
+
+        Args:
+            payload: Corpo da requisição com "stream": True
+            latency_key: Classe de prompt do LatencyTracker (opcional)
+            prompt_class: Etapa do pipeline, para a contabilização de tokens (opcional)
+
+        Yields:
+            Trechos de texto da resposta
+        """
+        headers = build_chat_headers(self.zello_api_key)
+        base_url = get_zello_base_url()
+        client = self._get_client()
+        latency_key = latency_key or self.latency_tracker.bucket_key(None, payload.get("model"), payload["messages"])
+        timeout = httpx.Timeout(self.latency_tracker.read_timeout(latency_key), connect=CONNECT_TIMEOUT_SECONDS)
+
+        emitted = False
+        last_err = None
+        for attempt in range(MAX_RETRIES):
+            started = time.monotonic()
+            parts = []
+            usage = None
+            try:
+                with self.circuit_breaker.guard(BACKEND_FAILURES) as outcome:
+                    async with self.rate_limiter.aslot():
+                        async with client.stream("POST", f"{base_url}{CHAT_COMPLETIONS_PATH}", headers=headers, json=payload, timeout=timeout) as response:
+                            delay = throttle_delay(response.status_code, response.headers, attempt)
+                            if delay is not None:
+                                self.rate_limiter.penalize(delay)
+                                last_err = Exception(f"HTTP {response.status_code} (aguardando {delay:.1f}s)")
+                                continue
+                            if is_server_failure(response.status_code):
+                                outcome.fail(f"HTTP {response.status_code}")
+                            response.raise_for_status()
+                            if not is_event_stream(response.headers.get("Content-Type")):
+                                await response.aread()
+                                data = response.json()
+                                usage = extract_usage(data)
+                                content = extract_chat_content(data)
+                                parts.append(content)
+                                if content:
+                                    yield content
+                            else:
+                                async for line in response.aiter_lines():
+                                    chunk = extract_stream_delta(line)
+                                    if chunk:
+                                        emitted = True
+                                        parts.append(chunk)
+                                        yield chunk
+                                    usage = extract_stream_usage(line) or usage
+                elapsed = time.monotonic() - started
+                self.latency_tracker.record(latency_key, elapsed)
+                self._record_usage(payload, prompt_class, "".join(parts), usage, elapsed, streamed=emitted)
+                return
+            except httpx.HTTPError as e:
+                if emitted:
+                    raise Exception(f"Streaming da Zello interrompido: {str(e)}")
+                last_err = e
+                print(f"Erro no streaming assíncrono (tentativa {attempt + 1}): {str(e)}")
+                if attempt < MAX_RETRIES - 1:
+                    await asyncio.sleep(2 * (2 ** attempt))
+        raise Exception(f"Erro na requisição Zello após {MAX_RETRIES} retries: {str(last_err)}. Verifique a conectividade para {config.ZELLO_BASE_URL}.")
+
+    async def _request_completion(
+        self,
+        payload: Dict[str, Any],
+        latency_key: str = None,
+        prompt_class: str = None
+    ) -> str:
+        """
+        Envia a requisição de chat completion com retries.
+
+        Args:
+            payload: Corpo da requisição (ver build_chat_payload)
+            latency_key: Classe de prompt do LatencyTracker (opcional, derivada do payload)
+            prompt_class: Etapa do pipeline, para a contabilização de tokens (opcional)
+
+        Returns:
+            Conteúdo da resposta da IA
+        """
+        try:
+            headers = build_chat_headers(self.zello_api_key)
+            url = f"{get_zello_base_url()}{CHAT_COMPLETIONS_PATH}"
+            latency_key = latency_key or self.latency_tracker.bucket_key(None, payload.get("model"), payload["messages"])
+
+            # retries com backoff exponencial (mesma política do cliente síncrono)
+            last_err = None
+            for attempt in range(MAX_RETRIES):
+                try:
+                    started = time.monotonic()
+                    response = await self._post_hedged(url, headers, payload, latency_key)
+                    delay = throttle_delay(response.status_code, response.headers, attempt)
+                    if delay is not None:
+                        self.rate_limiter.penalize(delay)
+                        last_err = Exception(f"HTTP {response.status_code} (aguardando {delay:.1f}s)")
+                        print(f"Zello MIND limitou a taxa (tentativa assíncrona {attempt + 1}): aguardando {delay:.1f}s na fila")
+                        continue
+                    response.raise_for_status()
+                    data = response.json()
+                    content = extract_chat_content(data)
+                    self._record_usage(payload, prompt_class, content, extract_usage(data), time.monotonic() - started)
+                    return content
+                except httpx.TimeoutException as e:
+                    last_err = e
+                    print(f"Timeout na tentativa assíncrona {attempt + 1}: {str(e)}")
+                except httpx.HTTPError as e:
+                    last_err = e
+                    print(f"Erro na tentativa assíncrona {attempt + 1}: {str(e)}")
+                if attempt < MAX_RETRIES - 1:
+                    await asyncio.sleep(2 * (2 ** attempt))
+            raise Exception(f"Erro na requisição Zello após {MAX_RETRIES} retries: {str(last_err)}. Verifique a conectividade para {config.ZELLO_BASE_URL}.")
+
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            raise Exception(f"Erro ao processar resposta Zello: {str(e)}")
+
+    def _record_usage(
+        self,
+        payload: Dict[str, Any],
+        prompt_class: Optional[str],
+        content: str,
+        usage: Optional[Tuple[int, int]],
+        latency_seconds: float,
+        streamed: bool = False
+    ) -> None:
+        """Registra os tokens de uma resposta (não bloqueia: a gravação no banco é feita em segundo plano)."""
+        prompt_tokens, completion_tokens, estimated = resolve_usage(payload, content, usage)
+        self.usage_recorder.record(
+            prompt_class,
+            payload.get("model"),
+            prompt_tokens,
+            completion_tokens,
+            latency_seconds,
+            streamed=streamed,
+            estimated=estimated
+        )
+
+    async def _post_once(self, url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: httpx.Timeout) -> httpx.Response:
+        """Envia um POST protegido pelo circuit breaker e pelo limitador de taxa."""
+        client = self._get_client()
+        # Circuit breaker e fila FIFO compartilhados com o cliente síncrono
+        with self.circuit_breaker.guard(BACKEND_FAILURES) as outcome:
+            async with self.rate_limiter.aslot():
+                response = await client.post(url, headers=headers, json=payload, timeout=timeout)
+            if is_server_failure(response.status_code) and throttle_delay(response.status_code, response.headers, 0) is None:
+                outcome.fail(f"HTTP {response.status_code}")
+        return response
+
+    async def _post_hedged(self, url: str, headers: Dict[str, str], payload: Dict[str, Any], latency_key: str) -> httpx.Response:
+        """
+        Envia a requisição e, se ela passar do p95 da classe, uma segunda em paralelo.
+
+        Vence a primeira resposta bem-sucedida; a outra é cancelada. O hedge só é
+        enviado dentro do orçamento configurado (LLM_HEDGE_BUDGET).
+
+        Returns:
+            Resposta HTTP vencedora
+        """
+        timeout = httpx.Timeout(self.latency_tracker.read_timeout(latency_key), connect=CONNECT_TIMEOUT_SECONDS)
+        hedge_after = self.latency_tracker.hedge_delay(latency_key)
+        self.latency_tracker.record_request()
+        started = time.monotonic()
+
+        if hedge_after is None:
+            response = await self._post_once(url, headers, payload, timeout)
+        else:
+            primary = asyncio.ensure_future(self._post_once(url, headers, payload, timeout))
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if done or not self.latency_tracker.try_hedge():
+                response = await primary
+            else:
+                print(f"Resposta acima do p95 ({hedge_after * 1000:.0f} ms): enviando requisição hedge")
+                hedge = asyncio.ensure_future(self._post_once(url, headers, payload, timeout))
+                response = await self._first_success({primary, hedge}, hedge)
+
+        if response.is_success:
+            self.latency_tracker.record(latency_key, time.monotonic() - started)
+        return response
+
+    async def _first_success(self, pending: set, hedge: asyncio.Future) -> httpx.Response:
+        """
+        Aguarda as requisições concorrentes, retorna a primeira resposta 2xx e cancela a outra.
+
+        Sem nenhuma 2xx, retorna a última resposta recebida ou repassa o primeiro erro.
+        """
+        first_error = None
+        last_response = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        first_error = first_error or e
+                        continue
+                    if response.is_success:
+                        if task is hedge:
+                            self.latency_tracker.record_hedge_win()
+                        return response
+                    last_response = response
+        finally:
+            for task in pending:
+                task.cancel()
+        if last_response is not None:
+            return last_response
+        raise first_error
+
+    async def aclose(self) -> None:
+        """Fecha o cliente HTTP e suas conexões."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    async def __aenter__(self) -> "AsyncLLMService":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    def get_available_models(self) -> Dict[str, List[str]]:
+        """
+        Retorna os modelos disponíveis para Zello MIND.
+
+        Returns:
+            Dicionário com listas de modelos disponíveis
+        """
+        return {
+            "zello": ["zello-mind", "zello-mind-pro"]
+        }
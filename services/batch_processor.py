@@ -1,10 +1,72 @@
 """Batch processor service (v2.0)
 
-Orquestra processamentos em lote: consome a fila de transcrições pendentes,
-invoca geração/validação e persiste resultados/metadados.
+Orquestra processamentos em lote: invoca geração/validação para várias
+transcrições a partir de um único event loop, usando o AsyncLLMService para
+manter dezenas de completions em andamento sem uma thread por requisição.
 
-Observação: Arquivo criado como placeholder. Implementação virá em etapa
-posterior.
+Observação: consumo da fila de transcrições e persistência de resultados virão
+em etapa posterior.
 """
 
+import asyncio
+from typing import Dict, Any, List, Optional
 
+from config import config
+from services.async_llm_service import AsyncLLMService
+from services.generation_service import GenerationService
+
+
+class BatchProcessor:
+    """Processa lotes de textos com geração e auto-correção assíncronas."""
+
+    def __init__(self, generation_service: Optional[GenerationService] = None, max_in_flight: int = None):
+        """
+        Inicializa o processador em lote.
+
+        Args:
+            generation_service: Serviço de geração (opcional, cria um com AsyncLLMService)
+            max_in_flight: Máximo de textos processados ao mesmo tempo (opcional, usa config)
+        """
+        self.generation_service = generation_service or GenerationService(AsyncLLMService())
+        self.max_in_flight = max_in_flight or config.BATCH_MAX_IN_FLIGHT
+
+    async def process_texts(self, texts: List[str], provider: str = "zello", max_attempts: int = 3) -> List[Dict[str, Any]]:
+        """
+        Gera Histórias de Usuário para vários textos concorrentemente.
+
+        Args:
+            texts: Textos de entrada
+            provider: Provedor da LLM (apenas 'zello' é suportado)
+            max_attempts: Número máximo de tentativas de auto-correção por texto
+
+        Returns:
+            Lista de resultados na mesma ordem dos textos
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def process_one(text: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.generation_service.agenerate_with_auto_correction(
+                        text=text,
+                        provider=provider,
+                        max_attempts=max_attempts
+                    )
+                except Exception as e:
+                    return {"success": False, "error": f"Erro no processamento em lote: {str(e)}"}
+
+        try:
+            return await asyncio.gather(*(process_one(text) for text in texts))
+        finally:
+            llm_service = self.generation_service.llm_service
+            if isinstance(llm_service, AsyncLLMService):
+                await llm_service.aclose()
+
+    def run(self, texts: List[str], provider: str = "zello", max_attempts: int = 3) -> List[Dict[str, Any]]:
+        """
+        Executa process_texts em um novo event loop (uso fora de código assíncrono).
+
+        Returns:
+            Lista de resultados na mesma ordem dos textos
+        """
+        return asyncio.run(self.process_texts(texts, provider, max_attempts))
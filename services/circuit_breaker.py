@@ -0,0 +1,235 @@
+"""
+Circuit breaker para o backend da LLM.
+
+Estados:
+- closed: chamadas passam normalmente; falhas consecutivas são contadas.
+- open: após `failure_threshold` falhas seguidas, chamadas falham na hora com
+  CircuitOpenError, sem ocupar threads com timeouts e backoffs.
+- half_open: passado `recovery_timeout`, até `half_open_max_calls` chamadas de
+  teste são liberadas; um sucesso fecha o circuito, uma falha o reabre.
+
+Só contam como falha indisponibilidades do backend (timeout, erro de conexão,
+5xx). Respostas 4xx e limitação de taxa mostram que o serviço está de pé.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple, Type
+
+from config import config
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito do backend está aberto."""
+
+    def __init__(self, name: str, retry_in: float, last_error: Optional[str] = None):
+        self.name = name
+        self.retry_in = retry_in
+        self.last_error = last_error
+        message = f"{name} indisponível (circuito aberto); nova tentativa em {retry_in:.0f}s"
+        if last_error:
+            message += f". Última falha: {last_error}"
+        super().__init__(message)
+
+
+class CallOutcome:
+    """Resultado de uma chamada protegida; permite marcar falhas sem exceção (ex.: HTTP 5xx)."""
+
+    def __init__(self):
+        self.failure: Optional[str] = None
+
+    def fail(self, reason: str) -> None:
+        self.failure = reason
+
+
+class CircuitBreaker:
+    """Circuit breaker thread-safe com estados closed, open e half_open."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str = "Zello MIND",
+        failure_threshold: int = None,
+        recovery_timeout: float = None,
+        half_open_max_calls: int = None
+    ):
+        """
+        Inicializa o circuit breaker.
+
+        Args:
+            name: Nome do backend (usado nas mensagens de erro)
+            failure_threshold: Falhas consecutivas para abrir o circuito (opcional, usa config)
+            recovery_timeout: Segundos em aberto antes de liberar chamadas de teste (opcional, usa config)
+            half_open_max_calls: Chamadas de teste simultâneas em half_open (opcional, usa config)
+        """
+        self.name = name
+        self.failure_threshold = max(failure_threshold or config.LLM_BREAKER_FAILURE_THRESHOLD, 1)
+        self.recovery_timeout = recovery_timeout if recovery_timeout is not None else config.LLM_BREAKER_RECOVERY_SECONDS
+        self.half_open_max_calls = max(half_open_max_calls or config.LLM_BREAKER_HALF_OPEN_MAX_CALLS, 1)
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trials_in_flight = 0
+        self._last_error: Optional[str] = None
+        self._state_changed_at = time.time()
+        self._stats = {
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "times_opened": 0
+        }
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            print(f"Circuit breaker {self.name}: {self._state} -> {state}")
+            self._state = state
+            self._state_changed_at = time.time()
+
+    def _refresh(self, now: float) -> None:
+        """Passa de open para half_open quando o tempo de recuperação termina."""
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._set_state(self.HALF_OPEN)
+            self._trials_in_flight = 0
+
+    def before_call(self) -> None:
+        """
+        Autoriza uma chamada ao backend.
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto ou sem vagas de teste
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            if self._state == self.OPEN:
+                self._stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.recovery_timeout - (now - self._opened_at), self._last_error)
+            if self._state == self.HALF_OPEN:
+                if self._trials_in_flight >= self.half_open_max_calls:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, 0.0, self._last_error)
+                self._trials_in_flight += 1
+
+    def record_success(self) -> None:
+        """Registra uma chamada bem-sucedida (fecha o circuito se estiver em teste)."""
+        with self._lock:
+            self._stats["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state == self.HALF_OPEN:
+                self._trials_in_flight = max(self._trials_in_flight - 1, 0)
+                self._set_state(self.CLOSED)
+
+    def record_failure(self, reason: str) -> None:
+        """
+        Registra uma falha do backend.
+
+        Args:
+            reason: Descrição da falha (exibida enquanto o circuito estiver aberto)
+        """
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_error = reason
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._trials_in_flight = 0
+                self._opened_at = time.monotonic()
+                self._stats["times_opened"] += 1
+                self._set_state(self.OPEN)
+
+    def _release(self) -> None:
+        """Encerra uma chamada sem veredito (ex.: erro 4xx, cancelamento)."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trials_in_flight = max(self._trials_in_flight - 1, 0)
+
+    @contextmanager
+    def guard(self, failure_types: Tuple[Type[BaseException], ...] = ()):
+        """
+        Protege uma chamada ao backend.
+
+        Exceções de `failure_types` contam como falha; outras exceções não
+        alteram o estado. Sem exceção, a chamada é um sucesso, salvo se marcada
+        com `outcome.fail(...)`.
+
+        Args:
+            failure_types: Exceções que indicam indisponibilidade do backend
+
+        Yields:
+            CallOutcome da chamada
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto
+        """
+        self.before_call()
+        outcome = CallOutcome()
+        try:
+            yield outcome
+        except failure_types as e:
+            self.record_failure(outcome.failure or str(e))
+            raise
+        except BaseException:
+            if outcome.failure:
+                self.record_failure(outcome.failure)
+            else:
+                self._release()
+            raise
+        if outcome.failure:
+            self.record_failure(outcome.failure)
+        else:
+            self.record_success()
+
+    @property
+    def state(self) -> str:
+        """Estado atual do circuito."""
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna o estado do circuito e seus contadores.
+
+        Returns:
+            Dicionário com estado, falhas consecutivas, tempo até nova tentativa e contadores
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            retry_in = max(self.recovery_timeout - (now - self._opened_at), 0.0) if self._state == self.OPEN else 0.0
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout_seconds": self.recovery_timeout,
+                "retry_in_seconds": round(retry_in, 1),
+                "last_error": self._last_error,
+                "state_changed_at": self._state_changed_at,
+                **self._stats
+            }
+
+
+_shared_breaker: Optional[CircuitBreaker] = None
+_shared_breaker_lock = threading.Lock()
+
+
+def get_shared_circuit_breaker() -> CircuitBreaker:
+    """
+    Retorna o circuit breaker da Zello MIND compartilhado pelo processo.
+
+    Returns:
+        Instância única de CircuitBreaker
+    """
+    global _shared_breaker
+    with _shared_breaker_lock:
+        if _shared_breaker is None:
+            _shared_breaker = CircuitBreaker()
+        return _shared_breaker
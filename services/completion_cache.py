@@ -0,0 +1,277 @@
+"""
+Cache de completions da LLM em dois níveis.
+
+- Memória: LRU por processo, para repetições imediatas.
+- Disco: SQLite compartilhado por todos os workers do Gunicorn, com TTL e
+  limite de tamanho (remove primeiro as entradas menos acessadas).
+
+A chave é o hash SHA-256 de mensagens, modelo, temperatura e max_tokens.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List
+
+from config import config
+
+
+def make_completion_key(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int) -> str:
+    """
+    Calcula a chave de cache de uma completion.
+
+    Args:
+        messages: Mensagens enviadas à LLM
+        model: Modelo utilizado
+        temperature: Temperatura de amostragem
+        max_tokens: Limite de tokens da resposta
+
+    Returns:
+        Hash SHA-256 hexadecimal
+    """
+    material = json.dumps(
+        {"messages": messages, "model": model, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Cache LRU em memória com segundo nível SQLite compartilhado entre processos."""
+
+    def __init__(
+        self,
+        db_path: str = None,
+        memory_entries: int = None,
+        ttl_seconds: float = None,
+        max_disk_bytes: int = None,
+        enabled: bool = None
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            db_path: Caminho do arquivo SQLite (opcional, usa config se não fornecido)
+            memory_entries: Máximo de entradas no nível em memória (opcional)
+            ttl_seconds: Tempo de vida das entradas (opcional)
+            max_disk_bytes: Tamanho máximo do conteúdo no disco (opcional)
+            enabled: Liga/desliga o cache (opcional)
+        """
+        self.db_path = db_path or config.LLM_CACHE_DB_PATH
+        self.memory_entries = memory_entries if memory_entries is not None else config.LLM_CACHE_MEMORY_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else config.LLM_CACHE_TTL_SECONDS
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else config.LLM_CACHE_MAX_BYTES
+        self.enabled = config.LLM_CACHE_ENABLED if enabled is None else enabled
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "errors": 0
+        }
+        self._disk_ready = False
+        if self.enabled:
+            self._init_disk()
+
+    @contextmanager
+    def _connect(self):
+        """Abre uma conexão SQLite transacional (uma por operação, segura entre threads e processos)."""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_disk(self) -> None:
+        """Cria o arquivo e a tabela do nível em disco."""
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS completions (
+                        key TEXT PRIMARY KEY,
+                        content TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_completions_last_access ON completions (last_access)")
+            self._disk_ready = True
+        except Exception as e:
+            print(f"Aviso: cache de completions em disco indisponível ({self.db_path}): {str(e)}")
+            self._disk_ready = False
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Busca uma completion no cache (memória, depois disco).
+
+        Args:
+            key: Chave gerada por make_completion_key
+
+        Returns:
+            Conteúdo armazenado ou None se ausente/expirado
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                content, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return content
+                del self._memory[key]
+
+        if self._disk_ready:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT content, expires_at FROM completions WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        content, expires_at = row
+                        if expires_at > now:
+                            conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+                            self._remember(key, content, expires_at)
+                            self._count("disk_hits")
+                            return content
+                        conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            except Exception as e:
+                print(f"Aviso: falha ao ler cache de completions: {str(e)}")
+                self._count("errors")
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, content: str) -> None:
+        """
+        Armazena uma completion nos dois níveis.
+
+        Args:
+            key: Chave gerada por make_completion_key
+            content: Texto da resposta
+        """
+        if not self.enabled or not content:
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, content, expires_at)
+        self._count("stores")
+
+        if self._disk_ready:
+            try:
+                size = len(content.encode("utf-8"))
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO completions (key, content, size, created_at, last_access, expires_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, content, size, now, now, expires_at)
+                    )
+                    self._evict_disk(conn, now)
+            except Exception as e:
+                print(f"Aviso: falha ao gravar cache de completions: {str(e)}")
+                self._count("errors")
+
+    def record_bypass(self) -> None:
+        """Contabiliza uma consulta que ignorou o cache por pedido do usuário."""
+        self._count("bypassed")
+
+    def _remember(self, key: str, content: str, expires_at: float) -> None:
+        """Insere no LRU em memória, descartando as entradas mais antigas."""
+        if self.memory_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (content, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+                self._stats["memory_evictions"] += 1
+
+    def _evict_disk(self, conn: sqlite3.Connection, now: float) -> None:
+        """Remove entradas expiradas e, acima do limite de tamanho, as menos acessadas."""
+        removed = conn.execute("DELETE FROM completions WHERE expires_at <= ?", (now,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total > self.max_disk_bytes:
+            excess = total - self.max_disk_bytes
+            freed = 0
+            keys = []
+            for key, size in conn.execute("SELECT key, size FROM completions ORDER BY last_access ASC"):
+                keys.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM completions WHERE key = ?", keys)
+            removed += len(keys)
+        if removed:
+            with self._lock:
+                self._stats["disk_evictions"] += removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores de acertos/falhas do cache.
+
+        Returns:
+            Dicionário com contadores e ocupação dos níveis
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["enabled"] = self.enabled
+        stats["disk_entries"] = 0
+        stats["disk_bytes"] = 0
+        if self._disk_ready:
+            try:
+                with self._connect() as conn:
+                    count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions").fetchone()
+                    stats["disk_entries"] = count
+                    stats["disk_bytes"] = size
+            except Exception:
+                pass
+        return stats
+
+
+_shared_cache: Optional[CompletionCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_completion_cache() -> CompletionCache:
+    """
+    Retorna o cache de completions compartilhado pelo processo.
+
+    Returns:
+        Instância única de CompletionCache
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = CompletionCache()
+        return _shared_cache
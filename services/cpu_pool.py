@@ -0,0 +1,273 @@
+"""
+Pool de processos para as operações de CPU do FileService.
+
+Leitura de PDF (PyPDF2) e DOCX (XML do documento), geração de documentos
+(reportlab/python-docx) e transcrição (Whisper) são Python puro ou seguram o
+GIL: executadas nas threads das requisições, um PDF grande deixa lentas
+todas as outras requisições do worker. Aqui elas rodam em um
+ProcessPoolExecutor compartilhado; a thread da requisição só espera o
+resultado (sem o GIL).
+
+A fila é limitada: com CPU_POOL_WORKERS tarefas em execução e
+CPU_POOL_MAX_QUEUE aguardando, novas tarefas são recusadas na hora com
+CpuPoolBusyError (o app responde 503 com Retry-After) em vez de acumular
+espera. Cada tarefa informa o tempo de CPU gasto no processo, o tempo de
+fila e o tempo total, agregados por tipo em get_stats().
+
+Operações fora de CPU_POOL_TASKS (ou com CPU_POOL_WORKERS=0) rodam na
+própria thread, com as mesmas métricas.
+
+Os processos do pool são criados por um forkserver (spawn onde não há
+forkserver), nunca por fork do worker do Flask/Gunicorn: o processo do app
+tem várias threads (limitador, gravação de uso, SSE, caches SQLite) e um
+filho criado por fork pode herdar um lock preso por outra thread (inclusive
+o de stdout) e travar. Cada processo do pool importa os módulos das
+tarefas uma vez, na primeira tarefa que recebe.
+"""
+
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from config import config
+
+# Início dos processos do pool: nunca fork (ver docstring do módulo)
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class CpuPoolBusyError(Exception):
+    """Tarefa recusada porque a fila do pool de CPU está cheia."""
+
+    error_type = "cpu_pool_busy"
+
+    def __init__(self, task: str, in_flight: int, limit: int, retry_after: int):
+        self.task = task
+        self.in_flight = in_flight
+        self.limit = limit
+        self.retry_after = retry_after
+        super().__init__(
+            f"Servidor ocupado processando outros arquivos ({in_flight} tarefas em andamento ou na fila, "
+            f"limite {limit}); {task} não foi iniciado. Tente novamente em {retry_after}s."
+        )
+
+
+def _run_task(function: Callable, args: Tuple, submitted_at: float) -> Tuple[Any, float, float]:
+    """Executa a tarefa no processo do pool e mede CPU e fila (retorna resultado, CPU em s, fila em s)."""
+    queue_seconds = max(time.time() - submitted_at, 0.0)
+    cpu_started = time.process_time()
+    result = function(*args)
+    return result, time.process_time() - cpu_started, queue_seconds
+
+
+class CpuPool:
+    """ProcessPoolExecutor com fila limitada e métricas de CPU por tipo de tarefa."""
+
+    def __init__(self, workers: int = None, max_queue: int = None, tasks: str = None):
+        """
+        Inicializa o pool (os processos são criados no primeiro uso).
+
+        Args:
+            workers: Processos do pool (opcional, usa CPU_POOL_WORKERS; 0 = tudo na thread)
+            max_queue: Tarefas aguardando além das em execução (opcional, usa CPU_POOL_MAX_QUEUE)
+            tasks: Tipos de tarefa enviados ao pool, separados por vírgula (opcional, usa CPU_POOL_TASKS)
+        """
+        self.workers = config.CPU_POOL_WORKERS if workers is None else workers
+        self.max_queue = config.CPU_POOL_MAX_QUEUE if max_queue is None else max_queue
+        tasks = config.CPU_POOL_TASKS if tasks is None else tasks
+        self.tasks = {task.strip() for task in tasks.split(",") if task.strip()}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._rejected = 0
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def limit(self) -> int:
+        """Máximo de tarefas em execução ou na fila."""
+        return self.workers + self.max_queue
+
+    def uses_pool(self, task: str) -> bool:
+        """
+        Indica se um tipo de tarefa roda no pool.
+
+        Args:
+            task: Tipo da tarefa (ex.: 'pdf', 'docx', 'render', 'audio')
+
+        Returns:
+            True se a tarefa vai para um processo do pool
+        """
+        return self.workers > 0 and task in self.tasks
+
+    def submit(self, task: str, function: Callable, *args, admitted: bool = False) -> Future:
+        """
+        Envia uma tarefa ao pool.
+
+        Args:
+            task: Tipo da tarefa (agrupa as métricas)
+            function: Função de nível de módulo (precisa ser serializável)
+            *args: Argumentos da função
+            admitted: Se True, não confere o limite da fila (continuação de uma
+                tarefa já aceita, ex.: faixas de páginas de um PDF aceito)
+
+        Returns:
+            Future com a tupla (resultado, CPU em s, fila em s)
+
+        Raises:
+            CpuPoolBusyError: Se a fila estiver cheia
+        """
+        with self._lock:
+            if not admitted and self._in_flight >= self.limit:
+                self._rejected += 1
+                self._entry(task)["rejected"] += 1
+                raise CpuPoolBusyError(task, self._in_flight, self.limit, self._retry_after())
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max(self.workers, 1),
+                    mp_context=multiprocessing.get_context(START_METHOD)
+                )
+            executor = self._executor
+        started = time.perf_counter()
+        try:
+            future = executor.submit(_run_task, function, args, time.time())
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(lambda done: self._finished(task, done, time.perf_counter() - started))
+        return future
+
+    def run(self, task: str, function: Callable, *args) -> Any:
+        """
+        Executa uma tarefa e espera o resultado.
+
+        No pool se o tipo estiver em CPU_POOL_TASKS; caso contrário (ou se um
+        processo do pool morrer), na própria thread.
+
+        Args:
+            task: Tipo da tarefa
+            function: Função de nível de módulo
+            *args: Argumentos da função
+
+        Returns:
+            Retorno da função
+
+        Raises:
+            CpuPoolBusyError: Se a fila estiver cheia
+        """
+        if self.uses_pool(task):
+            try:
+                return self.submit(task, function, *args).result()[0]
+            except BrokenProcessPool as e:
+                self.reset()
+                print(f"Aviso: pool de CPU indisponível ({str(e)}); executando {task} na thread atual")
+        return self._run_inline(task, function, *args)
+
+    def reset(self) -> None:
+        """Descarta o executor após a morte de um processo (o próximo uso cria outro)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna a ocupação do pool e o tempo de CPU por tipo de tarefa.
+
+        Returns:
+            Dicionário com processos, limite, tarefas em andamento (atual e pico),
+            recusas e, por tipo: tarefas, erros, recusas, execuções na thread,
+            CPU total/média e fila/total médios (ms)
+        """
+        with self._lock:
+            tasks = {}
+            for task, entry in sorted(self._stats.items()):
+                completed = entry["tasks"] + entry["errors"]
+                tasks[task] = {
+                    "tasks": int(entry["tasks"]),
+                    "errors": int(entry["errors"]),
+                    "rejected": int(entry["rejected"]),
+                    "inline": int(entry["inline"]),
+                    "cpu_ms_total": round(entry["cpu_ms"], 1),
+                    "cpu_ms_mean": round(entry["cpu_ms"] / entry["tasks"], 1) if entry["tasks"] else 0.0,
+                    "queue_ms_mean": round(entry["queue_ms"] / entry["tasks"], 1) if entry["tasks"] else 0.0,
+                    "wall_ms_mean": round(entry["wall_ms"] / completed, 1) if completed else 0.0
+                }
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "limit": self.limit,
+                "pooled_tasks": sorted(self.tasks),
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak_in_flight,
+                "rejected": self._rejected,
+                "tasks": tasks
+            }
+
+    def _run_inline(self, task: str, function: Callable, *args) -> Any:
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            result = function(*args)
+        except Exception:
+            self._record(task, error=True, wall=time.perf_counter() - started, inline=True)
+            raise
+        self._record(task, cpu=time.thread_time() - cpu_started, wall=time.perf_counter() - started, inline=True)
+        return result
+
+    def _finished(self, task: str, future: Future, wall: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self._record(task, error=True, wall=wall)
+        else:
+            _, cpu, queue = future.result()
+            self._record(task, cpu=cpu, queue=queue, wall=wall)
+
+    def _entry(self, task: str) -> Dict[str, float]:
+        return self._stats.setdefault(task, {
+            "tasks": 0, "errors": 0, "rejected": 0, "inline": 0,
+            "cpu_ms": 0.0, "queue_ms": 0.0, "wall_ms": 0.0
+        })
+
+    def _record(self, task: str, cpu: float = 0.0, queue: float = 0.0, wall: float = 0.0, error: bool = False, inline: bool = False) -> None:
+        with self._lock:
+            entry = self._entry(task)
+            entry["errors" if error else "tasks"] += 1
+            entry["inline"] += 1 if inline else 0
+            entry["cpu_ms"] += cpu * 1000
+            entry["queue_ms"] += queue * 1000
+            entry["wall_ms"] += wall * 1000
+
+    def _retry_after(self) -> int:
+        """Segundos sugeridos para nova tentativa: tempo médio das tarefas × filas à frente (chamado com o lock)."""
+        tasks = sum(entry["tasks"] for entry in self._stats.values())
+        wall_ms = sum(entry["wall_ms"] for entry in self._stats.values())
+        mean_seconds = wall_ms / tasks / 1000 if tasks else 1.0
+        return max(int(math.ceil(mean_seconds * self._in_flight / max(self.workers, 1))), 1)
+
+
+_shared_pool: Optional[CpuPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_cpu_pool() -> CpuPool:
+    """
+    Retorna o pool de CPU compartilhado pelo processo.
+
+    Returns:
+        Instância única de CpuPool
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = CpuPool()
+        return _shared_pool
@@ -0,0 +1,171 @@
+"""
+Extração de texto de DOCX em streaming.
+
+O python-docx carrega o documento inteiro no modelo de objetos e
+Document.paragraphs ignora tabelas (onde os documentos de requisitos
+guardam metade do conteúdo), controles de conteúdo e cabeçalhos.
+
+Aqui o XML das partes é lido direto do zip, em blocos de FEED_BYTES, por
+um parser incremental com alvo próprio (XMLParser(target=...)): nenhuma
+árvore é montada e cada bloco de texto (parágrafo ou linha de tabela) é
+produzido assim que termina, de modo que a memória fica limitada ao trecho
+lido e aos blocos concluídos nele. A saída segue a ordem do documento:
+
+- cabeçalhos (word/header*.xml), uma vez cada, antes do corpo;
+- parágrafos do corpo (inclusive dentro de controles de conteúdo);
+- tabelas: uma linha por linha da tabela, células separadas por " | "
+  (tabelas aninhadas entram na célula que as contém).
+
+O conteúdo de mc:Fallback (cópia de caixas de texto para leitores
+antigos) é ignorado para não duplicar texto.
+"""
+
+import re
+import zipfile
+from typing import Dict, Any, Iterator, List
+from xml.etree.ElementTree import XMLParser
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+# Partes que contêm o texto, na ordem de saída
+DOCUMENT_PART = "word/document.xml"
+HEADER_PART = re.compile(r"^word/header(\d*)\.xml$")
+
+# Elementos de uma execução de texto (w:r) que viram caracteres
+RUN_CHARACTERS = {f"{W}tab": "\t", f"{W}br": "\n", f"{W}cr": "\n"}
+
+CELL_SEPARATOR = " | "
+
+# Leitura da parte XML descompactada
+FEED_BYTES = 64 * 1024
+
+
+def iter_docx_blocks(file_path: str) -> Iterator[str]:
+    """
+    Produz o texto de um DOCX bloco a bloco, na ordem do documento.
+
+    Args:
+        file_path: Caminho do DOCX
+
+    Yields:
+        Texto de cada parágrafo (vazio para parágrafos em branco) ou de cada
+        linha de tabela
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        names = archive.namelist()
+        headers = sorted(
+            (name for name in names if HEADER_PART.match(name)),
+            key=lambda name: int(HEADER_PART.match(name).group(1) or 0)
+        )
+        seen_headers = set()
+        for name in headers:
+            text = "\n".join(block for block in _iter_part_blocks(archive, name) if block.strip())
+            # A mesma parte costuma se repetir (primeira página, pares/ímpares)
+            if text and text not in seen_headers:
+                seen_headers.add(text)
+                yield text
+        yield from _iter_part_blocks(archive, DOCUMENT_PART)
+
+
+def extract_docx_text(file_path: str) -> Dict[str, Any]:
+    """
+    Extrai o texto de um DOCX (executada no pool de CPU).
+
+    Args:
+        file_path: Caminho do arquivo
+
+    Returns:
+        Dicionário com o texto extraído e o número de blocos lidos
+    """
+    try:
+        blocks = list(iter_docx_blocks(file_path))
+    except (zipfile.BadZipFile, KeyError) as e:
+        return {
+            "success": False,
+            "error": f"Arquivo DOCX inválido: {str(e)}"
+        }
+    return {
+        "success": True,
+        "text": "\n".join(blocks).strip(),
+        "method": "docx_stream_extraction",
+        "blocks": len(blocks)
+    }
+
+
+def _iter_part_blocks(archive: zipfile.ZipFile, name: str) -> Iterator[str]:
+    """Lê uma parte XML em streaming e produz os parágrafos e linhas de tabela de nível superior."""
+    collector = _BlockCollector()
+    parser = XMLParser(target=collector)
+    with archive.open(name) as stream:
+        for chunk in iter(lambda: stream.read(FEED_BYTES), b""):
+            parser.feed(chunk)
+            if collector.blocks:
+                blocks, collector.blocks = collector.blocks, []
+                yield from blocks
+    parser.close()
+    yield from collector.blocks
+
+
+class _BlockCollector:
+    """Alvo do XMLParser: monta o texto dos parágrafos e tabelas a partir dos eventos do parser."""
+
+    def __init__(self):
+        self.blocks: List[str] = []       # blocos concluídos, ainda não entregues
+        self.paragraphs: List[List[str]] = []  # parágrafos abertos (caixas de texto abrem um dentro de outro)
+        self.rows: List[List[str]] = []   # linhas de tabela abertas (tabelas aninhadas)
+        self.cells: List[List[str]] = []  # células abertas
+        self.runs = 0
+        self.fallback = 0
+        self.in_text = False
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag == f"{W}t":
+            self.in_text = bool(self.paragraphs) and self.runs > 0 and not self.fallback
+        elif tag == f"{W}r":
+            self.runs += 1
+        elif tag == f"{W}p":
+            self.paragraphs.append([])
+        elif tag in RUN_CHARACTERS:
+            if self.paragraphs and self.runs and not self.fallback:
+                self.paragraphs[-1].append(RUN_CHARACTERS[tag])
+        elif tag == f"{W}tc":
+            self.cells.append([])
+        elif tag == f"{W}tr":
+            self.rows.append([])
+        elif tag == MC_FALLBACK:
+            self.fallback += 1
+
+    def data(self, text: str) -> None:
+        if self.in_text:
+            self.paragraphs[-1].append(text)
+
+    def end(self, tag: str) -> None:
+        if tag == f"{W}t":
+            self.in_text = False
+        elif tag == f"{W}r":
+            self.runs -= 1
+        elif tag == f"{W}p":
+            text = "".join(self.paragraphs.pop())
+            if self.fallback:
+                return
+            if self.cells:
+                if text.strip():
+                    self.cells[-1].append(text.strip())
+            else:
+                self.blocks.append(text)
+        elif tag == f"{W}tc":
+            self.rows[-1].append(" ".join(self.cells.pop()))
+        elif tag == f"{W}tr":
+            row = self.rows.pop()
+            if any(row) and not self.fallback:
+                line = CELL_SEPARATOR.join(row)
+                if self.cells:
+                    self.cells[-1].append(line)
+                else:
+                    self.blocks.append(line)
+        elif tag == MC_FALLBACK:
+            self.fallback -= 1
+
+    def close(self) -> None:
+        return None
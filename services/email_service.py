@@ -11,6 +11,7 @@ from email.mime.base import MIMEBase
 from email import encoders
 from typing import List, Optional, Dict, Any
 from config import config
+from services.timing import timed_stage
 
 
 class EmailService:
@@ -24,6 +25,7 @@ class EmailService:
         self.password = config.SMTP_PASSWORD
         self.from_email = config.EMAIL_FROM
     
+    @timed_stage("email.send")
     def send_email(
         self,
         to_emails: List[str],
@@ -121,6 +123,7 @@ class EmailService:
         )
         msg.attach(part)
     
+    @timed_stage("email.user_stories")
     def send_user_stories_email(
         self,
         to_emails: List[str],
@@ -387,6 +390,7 @@ Enviado automaticamente pelo Sistema de Automação de Histórias de Usuário
         
         return '\n'.join(clean_lines)
     
+    @timed_stage("email.user_stories_attachment")
     def send_user_stories_with_attachment(
         self,
         to_emails: List[str],
@@ -0,0 +1,198 @@
+"""
+Cache do texto extraído de arquivos (PDF, DOCX, DOC e áudio).
+
+Reprocessar um job em /api/process-file/<job_id> ou reenviar o mesmo arquivo
+repetia a extração inteira (a transcrição de áudio leva minutos). O texto
+extraído fica em um CompletionCache próprio (memória + SQLite compartilhado
+pelos workers, com TTL e limite de tamanho que remove primeiro as entradas
+menos acessadas), indexado pelo SHA-256 do arquivo e pela versão do extrator.
+
+O SHA-256 é o mesmo calculado pelo RepositoryMonitor (TranscriptionJob.source_hash),
+que pode ser reaproveitado como chave sem reler o arquivo.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, Any, Optional
+
+from config import config
+from services.completion_cache import CompletionCache
+
+# Extensões cuja extração compensa guardar (texto simples é lido mais rápido que o hash)
+CACHEABLE_EXTENSIONS = ("pdf", "docx", "doc", "mp3", "wav")
+
+# Incrementar a versão de um extrator quando a saída dele mudar (invalida o texto salvo)
+EXTRACTOR_VERSIONS = {
+    "pdf": 1,
+    "docx": 2,  # v2: leitura em streaming, inclui tabelas e cabeçalhos
+    "doc": 1,
+    "mp3": 1,
+    "wav": 1
+}
+
+# Leitura do arquivo para o hash
+HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Calcula o SHA-256 de um arquivo, lendo em blocos.
+
+    Args:
+        file_path: Caminho do arquivo
+
+    Returns:
+        Hash SHA-256 hexadecimal
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extractor_signature(extension: str) -> str:
+    """
+    Identifica o extrator de uma extensão e as opções que mudam o texto extraído.
+
+    Também entra na chave do cache de resultados (services/result_cache.py):
+    quando o texto extraído muda, as HUs e resumos gerados a partir dele deixam
+    de ser reaproveitados.
+
+    Args:
+        extension: Extensão do arquivo
+
+    Returns:
+        Assinatura (ex.: 'docx:v2', 'mp3:v1:base', 'pdf:v1:max_tokens=50000')
+    """
+    signature = f"{extension}:v{EXTRACTOR_VERSIONS.get(extension, 1)}"
+    if extension in ("mp3", "wav"):
+        # O texto da transcrição depende do modelo do Whisper
+        signature = f"{signature}:{config.WHISPER_MODEL}"
+    if extension == "pdf" and config.PDF_EXTRACTION_MAX_TOKENS:
+        signature = f"{signature}:max_tokens={config.PDF_EXTRACTION_MAX_TOKENS}"
+    return signature
+
+
+def make_extraction_key(file_hash: str, extension: str) -> str:
+    """
+    Calcula a chave do texto extraído de um arquivo.
+
+    Args:
+        file_hash: SHA-256 do conteúdo do arquivo
+        extension: Extensão do arquivo (define o extrator)
+
+    Returns:
+        Hash SHA-256 hexadecimal
+    """
+    return hashlib.sha256(f"{file_hash}|{extractor_signature(extension)}".encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Guarda o resultado das extrações e mede acertos, bytes e tempo poupados."""
+
+    def __init__(self, cache: CompletionCache = None, enabled: bool = None):
+        """
+        Inicializa o cache.
+
+        Args:
+            cache: Cache subjacente (opcional, cria um com as configurações EXTRACTION_CACHE_*)
+            enabled: Liga/desliga o cache (opcional, usa config)
+        """
+        self.enabled = config.EXTRACTION_CACHE_ENABLED if enabled is None else enabled
+        self.cache = cache or CompletionCache(
+            db_path=config.EXTRACTION_CACHE_DB_PATH,
+            memory_entries=config.EXTRACTION_CACHE_MEMORY_ENTRIES,
+            ttl_seconds=config.EXTRACTION_CACHE_TTL_SECONDS,
+            max_disk_bytes=config.EXTRACTION_CACHE_MAX_BYTES,
+            enabled=self.enabled
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "source_bytes_saved": 0,
+            "text_bytes_served": 0,
+            "extraction_ms_saved": 0.0
+        }
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca o resultado de uma extração.
+
+        Args:
+            key: Chave gerada por make_extraction_key
+
+        Returns:
+            Resultado da extração (como retornado pelo FileService) ou None
+        """
+        if not self.enabled:
+            return None
+        raw = self.cache.get(key)
+        entry = None
+        if raw is not None:
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                entry = None
+        with self._lock:
+            self._stats["lookups"] += 1
+            if entry:
+                self._stats["hits"] += 1
+                self._stats["source_bytes_saved"] += entry.get("source_bytes", 0)
+                self._stats["text_bytes_served"] += len(entry["result"].get("text", "").encode("utf-8"))
+                self._stats["extraction_ms_saved"] += entry.get("extraction_ms", 0.0)
+        return entry["result"] if entry else None
+
+    def set(self, key: str, result: Dict[str, Any], source_bytes: int, extraction_ms: float) -> None:
+        """
+        Salva o resultado de uma extração bem-sucedida.
+
+        Args:
+            key: Chave gerada por make_extraction_key
+            result: Resultado da extração
+            source_bytes: Tamanho do arquivo de origem
+            extraction_ms: Tempo gasto na extração
+        """
+        # Texto truncado por orçamento de extração depende da configuração: não é guardado
+        if self.enabled and result.get("success") and result.get("text") and not result.get("truncated"):
+            entry = {"result": result, "source_bytes": source_bytes, "extraction_ms": round(extraction_ms, 1)}
+            self.cache.set(key, json.dumps(entry, ensure_ascii=False))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna a taxa de acerto, o que foi poupado e a ocupação do cache.
+
+        Returns:
+            Dicionário com consultas, acertos, taxa, bytes e tempo poupados e ocupação
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        cache_stats = self.cache.get_stats()
+        stats["hit_ratio"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["extraction_ms_saved"] = round(stats["extraction_ms_saved"], 1)
+        stats["enabled"] = self.enabled
+        stats["stores"] = cache_stats["stores"]
+        stats["entries"] = cache_stats["disk_entries"] or cache_stats["memory_entries"]
+        stats["disk_bytes"] = cache_stats["disk_bytes"]
+        stats["evictions"] = cache_stats["memory_evictions"] + cache_stats["disk_evictions"]
+        return stats
+
+
+_shared_cache: Optional[ExtractionCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_extraction_cache() -> ExtractionCache:
+    """
+    Retorna o cache de extrações compartilhado pelo processo.
+
+    Returns:
+        Instância única de ExtractionCache
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ExtractionCache()
+        return _shared_cache
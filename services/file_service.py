@@ -4,17 +4,32 @@ Serviço para processamento de arquivos.
 
 import os
 import time
+import hashlib
 import mimetypes
 from typing import Dict, Any, Optional, List
 from werkzeug.utils import secure_filename
 from config import config
+from services.timing import timed, timed_stage
+from services.cpu_pool import CpuPool, CpuPoolBusyError, get_shared_cpu_pool
+from services.docx_extractor import extract_docx_text
+from services.pdf_extractor import extract_pdf_text
+from services.extraction_cache import CACHEABLE_EXTENSIONS, HASH_BLOCK_BYTES, ExtractionCache, file_sha256, get_shared_extraction_cache, make_extraction_key
 
 
 class FileService:
     """Serviço para processamento de arquivos."""
     
-    def __init__(self):
-        """Inicializa o serviço de arquivos."""
+    def __init__(self, extraction_cache: ExtractionCache = None, cpu_pool: CpuPool = None):
+        """
+        Inicializa o serviço de arquivos.
+        
+        Args:
+            extraction_cache: Cache do texto extraído (opcional, usa o do processo)
+            cpu_pool: Pool de processos para extração, geração de documentos e
+                transcrição (opcional, usa o do processo)
+        """
+        self.extraction_cache = extraction_cache or get_shared_extraction_cache()
+        self.cpu_pool = cpu_pool or get_shared_cpu_pool()
         self.upload_folder = config.UPLOAD_FOLDER
         self.allowed_extensions = config.ALLOWED_EXTENSIONS
         self.max_content_length = config.MAX_CONTENT_LENGTH
@@ -66,10 +81,16 @@ class FileService:
         mime_type, _ = mimetypes.guess_type(filename)
         return mime_type or 'application/octet-stream'
     
+    @timed_stage("file.save")
     def save_file(self, file, filename: Optional[str] = None) -> Dict[str, Any]:
         """
         Salva um arquivo no diretório de upload.
         
+        O arquivo é gravado em blocos e o SHA-256 é calculado na mesma
+        leitura ('sha256' no resultado), para reconhecer um arquivo já
+        processado (caches de extração e de resultados, TranscriptionJob.source_hash)
+        sem relê-lo.
+        
         Args:
             file: Objeto de arquivo do Flask
             filename: Nome personalizado (opcional)
@@ -104,15 +125,22 @@ class FileService:
                 file_path = os.path.join(self.upload_folder, f"{name}_{counter}{ext}")
                 counter += 1
             
-            # Salvar arquivo
-            file.save(file_path)
+            # Salvar arquivo calculando o hash durante a gravação
+            digest = hashlib.sha256()
+            size = 0
+            with open(file_path, 'wb') as target:
+                for block in iter(lambda: file.stream.read(HASH_BLOCK_BYTES), b''):
+                    digest.update(block)
+                    target.write(block)
+                    size += len(block)
             
             return {
                 "success": True,
                 "file_path": file_path,
                 "filename": os.path.basename(file_path),
-                "size": os.path.getsize(file_path),
-                "mime_type": self.get_file_mime_type(file_path)
+                "size": size,
+                "mime_type": self.get_file_mime_type(file_path),
+                "sha256": digest.hexdigest()
             }
             
         except Exception as e:
@@ -219,16 +247,73 @@ class FileService:
         except Exception as e:
             return []
     
-    def extract_text_from_file(self, file_path: str) -> Dict[str, Any]:
+    def extract_text_from_file(self, file_path: str, file_hash: str = None) -> Dict[str, Any]:
         """
         Extrai texto de um arquivo de forma inteligente.
         
+        PDF, DOCX, DOC e áudio passam pelo cache de extrações, indexado pelo
+        SHA-256 do arquivo e pela versão do extrator; um acerto retorna o
+        resultado salvo com 'cached': True. O tempo é registrado na etapa
+        'extract.<extensão>' (ex.: extract.pdf, extract.mp3) ou 'extract.cached'.
+        
         Args:
             file_path: Caminho para o arquivo
+            file_hash: SHA-256 do arquivo, se já conhecido (ex.: TranscriptionJob.source_hash)
             
         Returns:
             Dicionário com o texto extraído
         """
+        extension = self.get_file_extension(file_path)
+        key = None
+        if self.extraction_cache.enabled and extension in CACHEABLE_EXTENSIONS and os.path.exists(file_path):
+            try:
+                key = make_extraction_key(file_hash or file_sha256(file_path), extension)
+            except OSError:
+                key = None
+        if key is not None:
+            with timed("extract.cached"):
+                cached = self.extraction_cache.get(key)
+            if cached is not None:
+                print(f"Texto de {os.path.basename(file_path)} obtido do cache de extrações")
+                return {**cached, "cached": True}
+        
+        started = time.perf_counter()
+        with timed(f"extract.{extension or 'unknown'}"):
+            result = self._extract_text_from_file(file_path)
+        if key is not None:
+            self.extraction_cache.set(key, result, os.path.getsize(file_path), (time.perf_counter() - started) * 1000)
+        return result
+    
+    def get_extraction_stats(self) -> Dict[str, Any]:
+        """
+        Retorna as métricas do cache de extrações.
+        
+        Returns:
+            Dicionário com acertos, taxa, bytes e tempo poupados e ocupação
+        """
+        return self.extraction_cache.get_stats()
+    
+    def get_cpu_pool_stats(self) -> Dict[str, Any]:
+        """
+        Retorna as métricas do pool de CPU.
+        
+        Returns:
+            Dicionário com ocupação, recusas e tempo de CPU por tipo de tarefa
+        """
+        return self.cpu_pool.get_stats()
+    
+    @staticmethod
+    def _busy_result(error: CpuPoolBusyError) -> Dict[str, Any]:
+        """Resultado de uma operação recusada pela fila cheia do pool de CPU."""
+        return {
+            "success": False,
+            "error": str(error),
+            "error_type": error.error_type,
+            "retry_after": error.retry_after
+        }
+    
+    def _extract_text_from_file(self, file_path: str) -> Dict[str, Any]:
+        """Extração propriamente dita (ver extract_text_from_file)."""
         try:
             if not os.path.exists(file_path):
                 return {
@@ -252,82 +337,21 @@ class FileService:
             # PDF - requer biblioteca adicional
             elif file_extension == 'pdf':
                 try:
-                    import PyPDF2
-                    with open(file_path, 'rb') as f:
-                        pdf_reader = PyPDF2.PdfReader(f)
-                        text = ""
-                        for page in pdf_reader.pages:
-                            text += page.extract_text() + "\n"
-                    return {
-                        "success": True,
-                        "text": text.strip(),
-                        "method": "pdf_extraction"
-                    }
+                    # Faixas de páginas em paralelo, montadas em ordem (ver services/pdf_extractor.py)
+                    return extract_pdf_text(file_path, max_tokens=config.PDF_EXTRACTION_MAX_TOKENS or None)
                 except ImportError:
                     return {
                         "success": False,
                         "error": "Biblioteca PyPDF2 não instalada para processar PDFs"
                     }
             
-            # DOCX - requer biblioteca adicional
+            # DOCX - leitura em streaming do XML (parágrafos, tabelas e cabeçalhos; ver services/docx_extractor.py)
             elif file_extension == 'docx':
-                try:
-                    from docx import Document
-                    doc = Document(file_path)
-                    text = ""
-                    for paragraph in doc.paragraphs:
-                        text += paragraph.text + "\n"
-                    return {
-                        "success": True,
-                        "text": text.strip(),
-                        "method": "docx_extraction"
-                    }
-                except ImportError:
-                    return {
-                        "success": False,
-                        "error": "Biblioteca python-docx não instalada para processar DOCX"
-                    }
+                return self.cpu_pool.run("docx", extract_docx_text, file_path)
             
             # Áudio - requer Whisper para transcrição
             elif file_extension in ['mp3', 'wav']:
-                try:
-                    from services.transcription_service import TranscriptionService
-                    transcription_service = TranscriptionService()
-                    result = transcription_service.transcribe_audio(file_path)
-                    
-                    if result.get('success'):
-                        return {
-                            "success": True,
-                            "text": result.get('text', ''),
-                            "method": "audio_transcription",
-                            "transcription_info": {
-                                "language": result.get('language', 'pt'),
-                                "segments": result.get('segments', 0)
-                            }
-                        }
-                    else:
-                        return {
-                            "success": False,
-                            "error": result.get('error', 'Erro desconhecido na transcrição'),
-                            "method": "audio_transcription"
-                        }
-                except ImportError:
-                    return {
-                        "success": False,
-                        "error": "Biblioteca openai-whisper não está instalada. Execute: pip install openai-whisper torch"
-                    }
-                except Exception as e:
-                    error_msg = str(e)
-                    # Melhorar mensagens de erro específicas
-                    if "ffmpeg" in error_msg.lower() or "ffprobe" in error_msg.lower():
-                        return {
-                            "success": False,
-                            "error": "FFmpeg não encontrado no sistema. O Whisper requer FFmpeg instalado. Instale FFmpeg e adicione ao PATH do sistema. No Windows: winget install FFmpeg"
-                        }
-                    return {
-                        "success": False,
-                        "error": f"Erro ao transcrever áudio: {error_msg}"
-                    }
+                return self.cpu_pool.run("audio", transcribe_audio_file, file_path)
             
             # DOC - requer biblioteca adicional
             elif file_extension == 'doc':
@@ -387,6 +411,8 @@ class FileService:
                         "error": f"Tipo de arquivo não suportado: {file_extension}"
                     }
                     
+        except CpuPoolBusyError as e:
+            return self._busy_result(e)
         except Exception as e:
             return {
                 "success": False,
@@ -408,6 +434,11 @@ class FileService:
         Returns:
             Dicionário com resultado da criação
         """
+        with timed(f"document.{format_type}"):
+            return self._create_document(content, format_type, filename, user_stories, summary, document_title)
+    
+    def _create_document(self, content: str, format_type: str, filename: str = None, user_stories: str = None, summary: str = None, document_title: str = None) -> Dict[str, Any]:
+        """Geração do documento propriamente dita (ver create_document)."""
         try:
             # Determinar título do documento baseado no conteúdo
             if not document_title:
@@ -453,164 +484,10 @@ class FileService:
             
             file_path = os.path.join(self.upload_folder, f"{filename}.{format_type}")
             
-            if format_type.lower() == 'pdf':
-                try:
-                    from reportlab.lib.pagesizes import letter
-                    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-                    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                    from reportlab.lib.units import inch
-                    from reportlab.lib import colors
-                    import re
-                    
-                    doc = SimpleDocTemplate(file_path, pagesize=letter, 
-                                           rightMargin=72, leftMargin=72,
-                                           topMargin=72, bottomMargin=72)
-                    styles = getSampleStyleSheet()
-                    story = []
-                    
-                    # Estilos customizados
-                    title_style = ParagraphStyle(
-                        'CustomTitle',
-                        parent=styles['Title'],
-                        fontSize=24,
-                        textColor=colors.HexColor('#FF6F00'),
-                        spaceAfter=30,
-                        alignment=1  # Center
-                    )
-                    
-                    heading_style = ParagraphStyle(
-                        'CustomHeading',
-                        parent=styles['Heading1'],
-                        fontSize=18,
-                        textColor=colors.HexColor('#2D2D2D'),
-                        spaceAfter=12,
-                        spaceBefore=20
-                    )
-                    
-                    # Título principal (usar document_title)
-                    title = Paragraph(document_title, title_style)
-                    story.append(title)
-                    story.append(Spacer(1, 20))
-                    
-                    # Processar conteúdo com markdown básico
-                    lines = content.split('\n')
-                    for line in lines:
-                        line = line.strip()
-                        if not line:
-                            story.append(Spacer(1, 6))
-                            continue
-                        
-                        # Títulos
-                        if line.startswith('### '):
-                            text = line[4:].strip()
-                            p = Paragraph(f"<b>{text}</b>", styles['Heading3'])
-                            story.append(p)
-                            story.append(Spacer(1, 6))
-                        elif line.startswith('## '):
-                            text = line[3:].strip()
-                            p = Paragraph(text, heading_style)
-                            story.append(p)
-                            story.append(Spacer(1, 12))
-                        elif line.startswith('# '):
-                            text = line[2:].strip()
-                            p = Paragraph(text, heading_style)
-                            story.append(p)
-                            story.append(Spacer(1, 12))
-                        else:
-                            # Converter markdown básico para HTML
-                            text = line
-                            text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-                            text = re.sub(r'\*(.+?)\*', r'<i>\1</i>', text)
-                            p = Paragraph(text, styles['Normal'])
-                            story.append(p)
-                            story.append(Spacer(1, 6))
-                    
-                    doc.build(story)
-                    
-                    return {
-                        "success": True,
-                        "file_path": file_path,
-                        "filename": f"{filename}.pdf",
-                        "size": os.path.getsize(file_path)
-                    }
-                    
-                except ImportError:
-                    return {
-                        "success": False,
-                        "error": "Biblioteca reportlab não instalada para criar PDFs"
-                    }
-            
-            elif format_type.lower() in ['docx', 'doc']:
-                try:
-                    from docx import Document
-                    from docx.shared import Inches, Pt, RGBColor
-                    from docx.enum.text import WD_ALIGN_PARAGRAPH
-                    import re
-                    
-                    doc = Document()
-                    
-                    # Título principal (usar document_title)
-                    title = doc.add_heading(document_title, 0)
-                    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    title_run = title.runs[0]
-                    title_run.font.color.rgb = RGBColor(255, 111, 0)
-                    
-                    # Processar conteúdo
-                    lines = content.split('\n')
-                    for line in lines:
-                        line = line.strip()
-                        if not line:
-                            doc.add_paragraph()
-                            continue
-                        
-                        # Títulos
-                        if line.startswith('### '):
-                            text = line[4:].strip()
-                            p = doc.add_heading(text, level=3)
-                        elif line.startswith('## '):
-                            text = line[3:].strip()
-                            p = doc.add_heading(text, level=2)
-                        elif line.startswith('# '):
-                            text = line[2:].strip()
-                            p = doc.add_heading(text, level=1)
-                        else:
-                            # Processar markdown básico
-                            para = doc.add_paragraph()
-                            # Dividir por formatação markdown
-                            parts = re.split(r'(\*\*.*?\*\*|\*.*?\*)', line)
-                            for part in parts:
-                                if part.startswith('**') and part.endswith('**'):
-                                    run = para.add_run(part[2:-2])
-                                    run.bold = True
-                                elif part.startswith('*') and part.endswith('*') and not part.startswith('**'):
-                                    run = para.add_run(part[1:-1])
-                                    run.italic = True
-                                elif part:
-                                    para.add_run(part)
-                    
-                    # Salvar como .docx (mesmo se format_type for 'doc')
-                    file_path_docx = file_path.replace('.doc', '.docx') if format_type.lower() == 'doc' else file_path
-                    doc.save(file_path_docx)
-                    
-                    return {
-                        "success": True,
-                        "file_path": file_path_docx,
-                        "filename": f"{filename}.docx",
-                        "size": os.path.getsize(file_path_docx)
-                    }
-                    
-                except ImportError:
-                    return {
-                        "success": False,
-                        "error": "Biblioteca python-docx não instalada para criar DOCX"
-                    }
-            
-            else:
-                return {
-                    "success": False,
-                    "error": f"Formato não suportado: {format_type}. Use 'pdf' ou 'doc'"
-                }
+            return self.cpu_pool.run("render", render_document, file_path, format_type, content, document_title, filename)
                 
+        except CpuPoolBusyError as e:
+            return self._busy_result(e)
         except Exception as e:
             return {
                 "success": False,
@@ -657,3 +534,233 @@ class FileService:
         except Exception as e:
             print(f"[DEBUG] Erro ao extrair título das HUs: {str(e)}")
             return None
+
+
+def transcribe_audio_file(file_path: str) -> Dict[str, Any]:
+    """
+    Transcreve um áudio com o Whisper (executada no pool de CPU).
+    
+    Args:
+        file_path: Caminho do arquivo MP3 ou WAV
+        
+    Returns:
+        Dicionário com a transcrição
+    """
+    try:
+        from services.transcription_service import TranscriptionService
+        transcription_service = TranscriptionService()
+        result = transcription_service.transcribe_audio(file_path)
+
+        if result.get('success'):
+            return {
+                "success": True,
+                "text": result.get('text', ''),
+                "method": "audio_transcription",
+                "transcription_info": {
+                    "language": result.get('language', 'pt'),
+                    "segments": result.get('segments', 0)
+                }
+            }
+        else:
+            return {
+                "success": False,
+                "error": result.get('error', 'Erro desconhecido na transcrição'),
+                "method": "audio_transcription"
+            }
+    except ImportError:
+        return {
+            "success": False,
+            "error": "Biblioteca openai-whisper não está instalada. Execute: pip install openai-whisper torch"
+        }
+    except Exception as e:
+        error_msg = str(e)
+        # Melhorar mensagens de erro específicas
+        if "ffmpeg" in error_msg.lower() or "ffprobe" in error_msg.lower():
+            return {
+                "success": False,
+                "error": "FFmpeg não encontrado no sistema. O Whisper requer FFmpeg instalado. Instale FFmpeg e adicione ao PATH do sistema. No Windows: winget install FFmpeg"
+            }
+        return {
+            "success": False,
+            "error": f"Erro ao transcrever áudio: {error_msg}"
+        }
+
+
+def render_document(file_path: str, format_type: str, content: str, document_title: str, filename: str) -> Dict[str, Any]:
+    """
+    Gera o PDF (reportlab) ou DOCX (python-docx) de um conteúdo em markdown (executada no pool de CPU).
+    
+    Args:
+        file_path: Caminho de destino
+        format_type: 'pdf', 'docx' ou 'doc' (salvo como .docx)
+        content: Conteúdo em markdown
+        document_title: Título do documento
+        filename: Nome do arquivo sem extensão
+        
+    Returns:
+        Dicionário com o caminho, o nome e o tamanho do documento
+    """
+    try:
+        if format_type.lower() == 'pdf':
+            try:
+                from reportlab.lib.pagesizes import letter
+                from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+                from reportlab.lib.units import inch
+                from reportlab.lib import colors
+                import re
+
+                doc = SimpleDocTemplate(file_path, pagesize=letter, 
+                                       rightMargin=72, leftMargin=72,
+                                       topMargin=72, bottomMargin=72)
+                styles = getSampleStyleSheet()
+                story = []
+
+                # Estilos customizados
+                title_style = ParagraphStyle(
+                    'CustomTitle',
+                    parent=styles['Title'],
+                    fontSize=24,
+                    textColor=colors.HexColor('#FF6F00'),
+                    spaceAfter=30,
+                    alignment=1  # Center
+                )
+
+                heading_style = ParagraphStyle(
+                    'CustomHeading',
+                    parent=styles['Heading1'],
+                    fontSize=18,
+                    textColor=colors.HexColor('#2D2D2D'),
+                    spaceAfter=12,
+                    spaceBefore=20
+                )
+
+                # Título principal (usar document_title)
+                title = Paragraph(document_title, title_style)
+                story.append(title)
+                story.append(Spacer(1, 20))
+
+                # Processar conteúdo com markdown básico
+                lines = content.split('\n')
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        story.append(Spacer(1, 6))
+                        continue
+
+                    # Títulos
+                    if line.startswith('### '):
+                        text = line[4:].strip()
+                        p = Paragraph(f"<b>{text}</b>", styles['Heading3'])
+                        story.append(p)
+                        story.append(Spacer(1, 6))
+                    elif line.startswith('## '):
+                        text = line[3:].strip()
+                        p = Paragraph(text, heading_style)
+                        story.append(p)
+                        story.append(Spacer(1, 12))
+                    elif line.startswith('# '):
+                        text = line[2:].strip()
+                        p = Paragraph(text, heading_style)
+                        story.append(p)
+                        story.append(Spacer(1, 12))
+                    else:
+                        # Converter markdown básico para HTML
+                        text = line
+                        text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
+                        text = re.sub(r'\*(.+?)\*', r'<i>\1</i>', text)
+                        p = Paragraph(text, styles['Normal'])
+                        story.append(p)
+                        story.append(Spacer(1, 6))
+
+                doc.build(story)
+
+                return {
+                    "success": True,
+                    "file_path": file_path,
+                    "filename": f"{filename}.pdf",
+                    "size": os.path.getsize(file_path)
+                }
+
+            except ImportError:
+                return {
+                    "success": False,
+                    "error": "Biblioteca reportlab não instalada para criar PDFs"
+                }
+
+        elif format_type.lower() in ['docx', 'doc']:
+            try:
+                from docx import Document
+                from docx.shared import Inches, Pt, RGBColor
+                from docx.enum.text import WD_ALIGN_PARAGRAPH
+                import re
+
+                doc = Document()
+
+                # Título principal (usar document_title)
+                title = doc.add_heading(document_title, 0)
+                title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                title_run = title.runs[0]
+                title_run.font.color.rgb = RGBColor(255, 111, 0)
+
+                # Processar conteúdo
+                lines = content.split('\n')
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        doc.add_paragraph()
+                        continue
+
+                    # Títulos
+                    if line.startswith('### '):
+                        text = line[4:].strip()
+                        p = doc.add_heading(text, level=3)
+                    elif line.startswith('## '):
+                        text = line[3:].strip()
+                        p = doc.add_heading(text, level=2)
+                    elif line.startswith('# '):
+                        text = line[2:].strip()
+                        p = doc.add_heading(text, level=1)
+                    else:
+                        # Processar markdown básico
+                        para = doc.add_paragraph()
+                        # Dividir por formatação markdown
+                        parts = re.split(r'(\*\*.*?\*\*|\*.*?\*)', line)
+                        for part in parts:
+                            if part.startswith('**') and part.endswith('**'):
+                                run = para.add_run(part[2:-2])
+                                run.bold = True
+                            elif part.startswith('*') and part.endswith('*') and not part.startswith('**'):
+                                run = para.add_run(part[1:-1])
+                                run.italic = True
+                            elif part:
+                                para.add_run(part)
+
+                # Salvar como .docx (mesmo se format_type for 'doc')
+                file_path_docx = file_path.replace('.doc', '.docx') if format_type.lower() == 'doc' else file_path
+                doc.save(file_path_docx)
+
+                return {
+                    "success": True,
+                    "file_path": file_path_docx,
+                    "filename": f"{filename}.docx",
+                    "size": os.path.getsize(file_path_docx)
+                }
+
+            except ImportError:
+                return {
+                    "success": False,
+                    "error": "Biblioteca python-docx não instalada para criar DOCX"
+                }
+
+        else:
+            return {
+                "success": False,
+                "error": f"Formato não suportado: {format_type}. Use 'pdf' ou 'doc'"
+            }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Erro ao criar documento: {str(e)}"
+        }
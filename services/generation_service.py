@@ -1,28 +1,305 @@
 """
 Serviço para geração e validação de Histórias de Usuário.
+
+Cada etapa é escrita como um fluxo (gerador) que produz as requisições à LLM e
+recebe as respostas. O mesmo fluxo é executado pelo cliente síncrono
+(LLMService, usado pelo Flask) e pelo assíncrono (AsyncLLMService, usado no
+processamento em lote), de modo que ambos compartilham a mesma lógica.
+
+Um fluxo também pode produzir uma lista de requisições independentes (ex.:
+trechos de um resumo map-reduce); elas são executadas em paralelo e o fluxo
+recebe a lista de respostas na mesma ordem.
 """
 
+import asyncio
+import contextvars
+import inspect
 import json
 import re
-from typing import Dict, Any, List, Tuple
-from services.llm_service import LLMService
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Tuple, Generator, Union, Callable, Optional
+from config import config
+from services.llm_service import DEFAULT_CHAT_MODEL, DEFAULT_MAX_TOKENS, LLMService
+from services.async_llm_service import AsyncLLMService
+from services.timing import timed
+from services.text_chunker import CHARS_PER_TOKEN, estimate_tokens, split_by_token_budget
+from services.summary_digests import SummaryDigestStore, get_shared_summary_digest_store, make_digest_key
+from services.speculation import SpeculativeStats, candidate_temperatures, get_shared_speculative_stats, speculative_endpoints
+from services.story_prevalidator import prevalidate_user_stories
+from services.validation_verdict import ValidationStats, get_shared_validation_stats, keyword_verdict, parse_validation_verdict
 from prompts.user_story_prompts import UserStoryPrompts
+from prompts.token_budget import PromptBudgetStats, PromptTooLargeError, get_shared_prompt_budget_stats, messages_tokens, prompt_budget
+
+
+# Fluxo de uma etapa: produz requisições à LLM (uma ou uma lista), recebe o
+# texto da resposta (ou a lista de textos) e retorna o dicionário de resultado
+Flow = Generator[Union[Dict[str, Any], List[Dict[str, Any]]], Union[str, List[str]], Dict[str, Any]]
+
+# Callback de progresso: recebe eventos {"type": "stage"|"token", "stage": ..., "text": ...}
+EventCallback = Optional[Callable[[Dict[str, Any]], None]]
+
+# Problemas do veredito repassados como feedback para a próxima tentativa
+MAX_FEEDBACK_ISSUES = 5
+
+# Fração do limite do prompt de correção reservada ao feedback (e às observações)
+CORRECTION_FEEDBACK_SHARE = 0.15
+
+# Feedback que exige consultar os requisitos de novo (cobertura, fidelidade ao conteúdo)
+REQUIREMENTS_HINTS = (
+    "lacuna", "cobertura", "não cobre", "não contempla", "não aborda", "não considera",
+    "faltando", "ausente", "omitid", "requisito", "transcrição", "reunião", "inventad", "não mencionad"
+)
+
+
+_parallel_executor: Optional[ThreadPoolExecutor] = None
+_parallel_executor_lock = threading.Lock()
+
+
+def get_parallel_executor() -> ThreadPoolExecutor:
+    """
+    Retorna o pool de threads que executa listas de requisições dos fluxos (cliente síncrono).
+    
+    Returns:
+        Executor compartilhado pelo processo
+    """
+    global _parallel_executor
+    with _parallel_executor_lock:
+        if _parallel_executor is None:
+            _parallel_executor = ThreadPoolExecutor(
+                max_workers=max(config.SUMMARY_MAP_CONCURRENCY, 1),
+                thread_name_prefix="flow-parallel"
+            )
+        return _parallel_executor
+
+
+_speculative_executor: Optional[ThreadPoolExecutor] = None
+_speculative_executor_lock = threading.Lock()
+
+
+def get_speculative_executor() -> ThreadPoolExecutor:
+    """
+    Retorna o pool de threads que executa as candidatas do modo especulativo (cliente síncrono).
+    
+    Returns:
+        Executor compartilhado pelo processo
+    """
+    global _speculative_executor
+    with _speculative_executor_lock:
+        if _speculative_executor is None:
+            _speculative_executor = ThreadPoolExecutor(
+                max_workers=max(config.SPECULATIVE_MAX_WORKERS, 1),
+                thread_name_prefix="speculative"
+            )
+        return _speculative_executor
+
+
+class FlowCancelled(Exception):
+    """Fluxo interrompido porque outra candidata especulativa já venceu."""
 
 
 class GenerationService:
     """Serviço para geração e validação de Histórias de Usuário."""
     
-    def __init__(self, llm_service: LLMService):
+    def __init__(self, llm_service: Union[LLMService, AsyncLLMService], digest_store: SummaryDigestStore = None, validation_stats: ValidationStats = None, speculative_stats: SpeculativeStats = None, prompt_budget_stats: PromptBudgetStats = None):
         """
         Inicializa o serviço de geração.
         
         Args:
-            llm_service: Instância do serviço de LLM
+            llm_service: Instância do serviço de LLM (síncrono ou assíncrono)
+            digest_store: Resumos parciais de transcrições longas (opcional, usa o do processo)
+            validation_stats: Métricas de validação (opcional, usa as do processo)
+            speculative_stats: Métricas do modo especulativo (opcional, usa as do processo)
+            prompt_budget_stats: Contadores do orçamento de prompt (opcional, usa os do processo)
         """
         self.llm_service = llm_service
+        self.digest_store = digest_store or get_shared_summary_digest_store()
+        self.validation_stats = validation_stats or get_shared_validation_stats()
+        self.speculative_stats = speculative_stats or get_shared_speculative_stats()
+        self.prompt_budget_stats = prompt_budget_stats or get_shared_prompt_budget_stats()
         self.prompts = UserStoryPrompts()
     
-    def run_generation(self, text: str, provider: str = "zello", observations: str = None) -> Dict[str, Any]:
+    @property
+    def is_async_client(self) -> bool:
+        """Indica se o cliente de LLM configurado é assíncrono."""
+        return inspect.iscoroutinefunction(self.llm_service.get_completion)
+    
+    @staticmethod
+    def _llm_request(provider: str, messages: List[Dict[str, str]], use_cache: bool = True, stage: str = "generation", stream: bool = False, temperature: float = None) -> Dict[str, Any]:
+        """
+        Monta uma requisição de completion produzida pelos fluxos.
+        
+        Args:
+            provider: Provedor da LLM
+            messages: Mensagens para a LLM
+            use_cache: Se False, força uma nova amostra ignorando o cache
+            stage: Etapa do pipeline ('generation', 'validation', 'summary')
+            stream: Se a resposta pode ser repassada em streaming ao usuário
+            temperature: Temperatura de amostragem (opcional, usa a padrão do cliente)
+            
+        Returns:
+            Dicionário com os argumentos de get_completion e metadados da etapa
+        """
+        request = {"provider": provider, "messages": messages, "use_cache": use_cache, "stage": stage, "stream": stream}
+        if temperature is not None:
+            request["temperature"] = temperature
+        return request
+    
+    def _complete(self, request: Dict[str, Any], on_event: EventCallback = None, cancel: threading.Event = None) -> str:
+        """
+        Executa uma requisição de um fluxo com o cliente síncrono.
+        
+        Com `on_event`, emite o início de cada etapa e, nas etapas com streaming,
+        cada trecho de texto recebido. Com `cancel`, as etapas com streaming
+        são interrompidas (conexão fechada) assim que o evento é sinalizado.
+        
+        Raises:
+            FlowCancelled: Se `cancel` foi sinalizado durante o streaming
+        """
+        request = dict(request)
+        stage = request.pop("stage", None)
+        stream = request.pop("stream", False)
+        request["prompt_class"] = stage  # timeouts adaptativos por etapa
+        if on_event:
+            on_event({"type": "stage", "stage": stage})
+        with timed(f"llm.{stage}"):
+            if stream and (on_event or cancel is not None):
+                parts = []
+                chunks = self.llm_service.stream_completion(**request)
+                for chunk in chunks:
+                    if cancel is not None and cancel.is_set():
+                        chunks.close()
+                        raise FlowCancelled()
+                    parts.append(chunk)
+                    if on_event:
+                        on_event({"type": "token", "stage": stage, "text": chunk})
+                return "".join(parts)
+            return self.llm_service.get_completion(**request)
+    
+    def _complete_many(self, requests: List[Dict[str, Any]], on_event: EventCallback = None) -> List[str]:
+        """
+        Executa requisições independentes em paralelo com o cliente síncrono.
+        
+        Cada tarefa roda com uma cópia do contexto (job/colaborador da
+        contabilização de tokens).
+        
+        Returns:
+            Respostas na ordem das requisições
+            
+        Raises:
+            Exception: O primeiro erro entre as requisições
+        """
+        executor = get_parallel_executor()
+        futures = [
+            executor.submit(contextvars.copy_context().run, self._complete, request, on_event)
+            for request in requests
+        ]
+        return [future.result() for future in futures]
+    
+    async def _acomplete(self, request: Dict[str, Any], on_event: EventCallback = None) -> str:
+        """Versão assíncrona de _complete (cliente síncrono roda em thread auxiliar)."""
+        with timed(f"llm.{request.get('stage')}"):
+            return await self._acomplete_request(request, on_event)
+    
+    async def _acomplete_request(self, request: Dict[str, Any], on_event: EventCallback = None) -> str:
+        """Executa a requisição de _acomplete."""
+        request = dict(request)
+        stage = request.pop("stage", None)
+        stream = request.pop("stream", False)
+        request["prompt_class"] = stage
+        if on_event:
+            on_event({"type": "stage", "stage": stage})
+        if not self.is_async_client:
+            response = await asyncio.to_thread(self.llm_service.get_completion, **request)
+            if stream and on_event:
+                on_event({"type": "token", "stage": stage, "text": response})
+            return response
+        if stream and on_event:
+            parts = []
+            async for chunk in self.llm_service.stream_completion(**request):
+                parts.append(chunk)
+                on_event({"type": "token", "stage": stage, "text": chunk})
+            return "".join(parts)
+        return await self.llm_service.get_completion(**request)
+    
+    async def _acomplete_many(self, requests: List[Dict[str, Any]], on_event: EventCallback = None) -> List[str]:
+        """Versão assíncrona de _complete_many (até SUMMARY_MAP_CONCURRENCY ao mesmo tempo)."""
+        semaphore = asyncio.Semaphore(max(config.SUMMARY_MAP_CONCURRENCY, 1))
+        
+        async def run(request: Dict[str, Any]) -> str:
+            async with semaphore:
+                return await self._acomplete(request, on_event)
+        
+        return list(await asyncio.gather(*(run(request) for request in requests)))
+    
+    def _run_flow(self, flow: Flow, on_event: EventCallback = None, cancel: threading.Event = None) -> Dict[str, Any]:
+        """
+        Executa um fluxo usando o cliente síncrono.
+        
+        Erros da LLM são reenviados ao fluxo, que decide como tratá-los.
+        
+        Args:
+            flow: Fluxo a executar
+            on_event: Callback de progresso/streaming (opcional)
+            cancel: Evento que interrompe o fluxo antes da próxima requisição ou
+                durante um streaming (opcional; usado pelas candidatas especulativas)
+            
+        Returns:
+            Resultado retornado pelo fluxo (com 'cancelled' se foi interrompido)
+        """
+        if self.is_async_client:
+            raise Exception("Cliente de LLM assíncrono configurado: use os métodos com prefixo 'a' (ex.: agenerate_with_auto_correction)")
+        try:
+            request = next(flow)
+            while True:
+                if cancel is not None and cancel.is_set():
+                    flow.close()
+                    return {"success": False, "cancelled": True, "error": "Execução cancelada"}
+                try:
+                    if isinstance(request, list):
+                        response = self._complete_many(request, on_event)
+                    else:
+                        response = self._complete(request, on_event, cancel)
+                except FlowCancelled:
+                    flow.close()
+                    return {"success": False, "cancelled": True, "error": "Execução cancelada"}
+                except Exception as e:
+                    request = flow.throw(e)
+                else:
+                    request = flow.send(response)
+        except StopIteration as stop:
+            return stop.value
+    
+    async def _arun_flow(self, flow: Flow, on_event: EventCallback = None) -> Dict[str, Any]:
+        """
+        Executa um fluxo sem bloquear o event loop.
+        
+        Com cliente síncrono, cada chamada roda em uma thread auxiliar.
+        
+        Args:
+            flow: Fluxo a executar
+            on_event: Callback de progresso/streaming (opcional)
+            
+        Returns:
+            Resultado retornado pelo fluxo
+        """
+        try:
+            request = next(flow)
+            while True:
+                try:
+                    if isinstance(request, list):
+                        response = await self._acomplete_many(request, on_event)
+                    else:
+                        response = await self._acomplete(request, on_event)
+                except Exception as e:
+                    request = flow.throw(e)
+                else:
+                    request = flow.send(response)
+        except StopIteration as stop:
+            return stop.value
+    
+    def run_generation(self, text: str, provider: str = "zello", observations: str = None, use_cache: bool = True, on_event: EventCallback = None) -> Dict[str, Any]:
         """
         Gera Histórias de Usuário a partir de um texto.
         
@@ -30,81 +307,188 @@ class GenerationService:
             text: Texto de entrada para processar
             provider: Provedor da LLM (apenas 'zello' é suportado)
             observations: Observações adicionais do usuário (opcional)
+            use_cache: Se False, ignora o cache de completions e força uma nova amostra
+            on_event: Callback de progresso; recebe os trechos da geração em streaming (opcional)
             
         Returns:
             Dicionário com resultado da geração
         """
+        return self._run_flow(self._generation_flow(text, provider, observations, use_cache), on_event)
+    
+    async def arun_generation(self, text: str, provider: str = "zello", observations: str = None, use_cache: bool = True, on_event: EventCallback = None) -> Dict[str, Any]:
+        """Versão assíncrona de run_generation."""
+        return await self._arun_flow(self._generation_flow(text, provider, observations, use_cache), on_event)
+    
+    def _generation_flow(self, text: str, provider: str, observations: str = None, use_cache: bool = True, temperature: float = None) -> Flow:
+        """Fluxo de geração de Histórias de Usuário (ver run_generation)."""
         try:
             # Gerar prompt para criação de Histórias de Usuário
-            base_prompt = self.prompts.generate_user_stories_from_requirements(text)
+            with timed("prompt.generation"):
+                prompt = self._generation_prompt(text, observations)
             
-            # Adicionar observações se fornecidas
             if observations and observations.strip():
                 print(f"[DEBUG] Observações recebidas na geração: {len(observations)} caracteres")
                 print(f"[DEBUG] Primeiros 200 caracteres das observações: {observations[:200]}...")
-                prompt = f"""{base_prompt}
-
----
-
-# OBSERVAÇÕES E CONTEXTO ADICIONAL DO USUÁRIO
-
-O usuário forneceu as seguintes observações específicas que devem ser aplicadas na geração das Histórias de Usuário:
-
-{observations.strip()}
-
-**INSTRUÇÕES IMPORTANTES:**
-- Considere estas observações como requisitos adicionais ou refinamentos que devem ser incorporados nas Histórias de Usuário geradas.
-- Adapte o conteúdo, estrutura, detalhamento ou foco das Histórias de Usuário conforme as instruções fornecidas nas observações.
-- Se as observações mencionarem aspectos específicos (formato, detalhamento, foco, etc.), priorize esses aspectos na geração.
-- Mantenha a qualidade e o formato padrão das Histórias de Usuário, mas incorpore as adaptações solicitadas nas observações."""
                 print(f"[DEBUG] Prompt final com observações: {len(prompt)} caracteres")
             else:
-                prompt = base_prompt
                 print(f"[DEBUG] Prompt sem observações: {len(prompt)} caracteres")
             
-            # Preparar mensagens para a LLM
-            messages = [
-                {
-                    "role": "system",
-                    "content": "Você é um especialista em análise de requisitos e criação de Histórias de Usuário. Siga rigorosamente as instruções fornecidas."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
+            messages = self._generation_messages(prompt)
             
             # Chamar a LLM (apenas Zello MIND)
-            response = self.llm_service.get_completion(provider, messages)
+            response = yield self._llm_request(provider, messages, use_cache, stage="generation", stream=True, temperature=temperature)
             
             return {
                 "success": True,
                 "content": response,
                 "provider": provider,
-                "prompt_used": prompt
+                "prompt_used": prompt,
+                "prompt_tokens": self._messages_tokens(messages)
             }
             
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"Erro na geração: {str(e)}",
-                "provider": provider
+            return self._flow_error(f"Erro na geração: {str(e)}", provider, e)
+    
+    def _generation_prompt(self, text: str, observations: str = None) -> str:
+        """Prompt de geração de Histórias de Usuário, com as observações do usuário (se houver)."""
+        base_prompt = self.prompts.generate_user_stories_from_requirements(text)
+        if observations and observations.strip():
+            return f"""{base_prompt}
+
+---
+
+# OBSERVAÇÕES E CONTEXTO ADICIONAL DO USUÁRIO
+
+O usuário forneceu as seguintes observações específicas que devem ser aplicadas na geração das Histórias de Usuário:
+
+{observations.strip()}
+
+**INSTRUÇÕES IMPORTANTES:**
+- Considere estas observações como requisitos adicionais ou refinamentos que devem ser incorporados nas Histórias de Usuário geradas.
+- Adapte o conteúdo, estrutura, detalhamento ou foco das Histórias de Usuário conforme as instruções fornecidas nas observações.
+- Se as observações mencionarem aspectos específicos (formato, detalhamento, foco, etc.), priorize esses aspectos na geração.
+- Mantenha a qualidade e o formato padrão das Histórias de Usuário, mas incorpore as adaptações solicitadas nas observações."""
+        return base_prompt
+    
+    @staticmethod
+    def _generation_messages(prompt: str) -> List[Dict[str, str]]:
+        """Mensagens para a LLM nas etapas de geração de Histórias de Usuário."""
+        return [
+            {
+                "role": "system",
+                "content": "Você é um especialista em análise de requisitos e criação de Histórias de Usuário. Siga rigorosamente as instruções fornecidas."
+            },
+            {
+                "role": "user",
+                "content": prompt
             }
+        ]
+    
+    @staticmethod
+    def _flow_error(message: str, provider: str, error: Exception = None) -> Dict[str, Any]:
+        """
+        Monta o resultado de falha de um fluxo.
+        
+        Prompts acima do orçamento do modelo recebem error_type 'prompt_too_large'
+        e os números do orçamento, para o chamador não repetir a requisição.
+        """
+        result = {"success": False, "error": message, "provider": provider}
+        if isinstance(error, PromptTooLargeError):
+            result["error_type"] = PromptTooLargeError.error_type
+            result["prompt_budget"] = error.details()
+        return result
     
-    def run_validation(self, user_stories: str, provider: str = "zello") -> Dict[str, Any]:
+    def _fit_requirements_flow(self, text: str, provider: str, observations: str = None, use_cache: bool = True) -> Flow:
+        """
+        Confere o prompt de geração contra o orçamento do modelo antes da primeira tentativa.
+        
+        Se não couber e PROMPT_OVERSIZE_POLICY=chunk, os requisitos são extraídos
+        por trechos em paralelo (anotações reaproveitadas entre regenerações) e as
+        anotações substituem o texto original; caso contrário, ou se nem as
+        anotações couberem, a geração é rejeitada de imediato.
+        
+        Returns:
+            Dicionário com 'text' (original ou anotações) e 'prompt_budget', ou o resultado de falha
+        """
+        budget = prompt_budget(DEFAULT_CHAT_MODEL, DEFAULT_MAX_TOKENS)
+        tokens = self._messages_tokens(self._generation_messages(self._generation_prompt(text, observations)))
+        info = {"model": DEFAULT_CHAT_MODEL, "budget": budget, "original_tokens": tokens, "tokens": tokens, "mode": "direct"}
+        if tokens <= budget:
+            return {"success": True, "text": text, "prompt_budget": info}
+        
+        error = PromptTooLargeError(tokens, budget, DEFAULT_CHAT_MODEL, "generation")
+        if config.PROMPT_OVERSIZE_POLICY != "chunk":
+            self.prompt_budget_stats.record("generation", "rejected", tokens)
+            return self._flow_error(str(error), provider, error)
+        
+        # Trechos do tamanho do resumo map-reduce, limitados ao que cabe no prompt de extração
+        chunk_overhead = estimate_tokens(self.prompts.extract_requirements_from_chunk("", 1, 1)) + 64
+        chunk_tokens = max(min(config.SUMMARY_CHUNK_TOKENS, budget - chunk_overhead), 1)
+        chunks = split_by_token_budget(text, chunk_tokens)
+        total = len(chunks)
+        digest_key = make_digest_key(text, chunk_tokens, DEFAULT_CHAT_MODEL, kind="requirements")
+        notes = self.digest_store.get(digest_key)
+        if notes is None or len(notes) != total:
+            print(f"[DEBUG] Entrada acima do orçamento (~{tokens} > {budget} tokens): extraindo requisitos de {total} trechos")
+            try:
+                notes = yield [
+                    self._llm_request(
+                        provider,
+                        self._generation_messages(self.prompts.extract_requirements_from_chunk(chunk, index, total)),
+                        use_cache,
+                        stage="requirements_map"
+                    )
+                    for index, chunk in enumerate(chunks, start=1)
+                ]
+            except Exception as e:
+                return self._flow_error(f"Erro na extração de requisitos por trechos: {str(e)}", provider, e)
+            self.digest_store.set(digest_key, notes)
+        else:
+            print(f"[DEBUG] Entrada acima do orçamento: reaproveitando requisitos de {total} trechos")
+        
+        condensed = "\n\n".join(
+            f"## Trecho {index}/{total}\n\n{note.strip()}" for index, note in enumerate(notes, start=1)
+        )
+        condensed_tokens = self._messages_tokens(self._generation_messages(self._generation_prompt(condensed, observations)))
+        if condensed_tokens > budget:
+            self.prompt_budget_stats.record("generation", "rejected", condensed_tokens)
+            error = PromptTooLargeError(condensed_tokens, budget, DEFAULT_CHAT_MODEL, "generation")
+            return self._flow_error(f"{error} (mesmo após extrair os requisitos de {total} trechos)", provider, error)
+        
+        self.prompt_budget_stats.record("generation", "chunked", tokens)
+        info.update({"tokens": condensed_tokens, "mode": "chunked", "chunks": total})
+        return {"success": True, "text": condensed, "prompt_budget": info}
+    
+    def run_validation(self, user_stories: str, provider: str = "zello", on_event: EventCallback = None) -> Dict[str, Any]:
         """
         Valida as Histórias de Usuário geradas.
         
         Args:
             user_stories: Texto das Histórias de Usuário
             provider: Provedor da LLM (apenas 'zello' é suportado)
+            on_event: Callback de progresso (opcional)
             
         Returns:
             Dicionário com resultado da validação
         """
+        return self._run_flow(self._validation_flow(user_stories, provider), on_event)
+    
+    async def arun_validation(self, user_stories: str, provider: str = "zello", on_event: EventCallback = None) -> Dict[str, Any]:
+        """Versão assíncrona de run_validation."""
+        return await self._arun_flow(self._validation_flow(user_stories, provider), on_event)
+    
+    def _validation_flow(self, user_stories: str, provider: str) -> Flow:
+        """
+        Fluxo de validação de Histórias de Usuário (ver run_validation).
+        
+        A LLM responde com a análise seguida de um veredito em JSON (nota,
+        aprovação e problemas por história). O resultado informa de onde o
+        veredito foi lido: 'json', 'marker' (linha VEREDITO) ou 'keywords'.
+        """
         try:
             # Gerar prompt para validação
-            prompt = self.prompts.analyze_existing_user_stories(user_stories)
+            with timed("prompt.validation"):
+                prompt = self.prompts.validate_user_stories(user_stories)
             
             # Preparar mensagens para a LLM
             messages = [
@@ -120,27 +504,28 @@ O usuário forneceu as seguintes observações específicas que devem ser aplica
             
             # Usar provider diretamente (sem fallback)
             # Chamar a LLM
-            response = self.llm_service.get_completion(provider, messages)
+            response = yield self._llm_request(provider, messages, stage="validation")
             
             # Analisar a resposta para determinar se foi aprovada
-            is_approved, feedback = self._analyze_validation_response(response)
+            verdict = self._analyze_validation_response(response)
             
             return {
                 "success": True,
-                "is_approved": is_approved,
-                "feedback": feedback,
+                "is_approved": verdict["approved"],
+                "feedback": verdict["feedback"],
+                "score": verdict["score"],
+                "issues": verdict["issues"],
+                "stories": verdict["stories"],
+                "verdict_source": verdict["source"],
                 "full_response": response,
+                "prompt_tokens": self._messages_tokens(messages),
                 "provider": provider
             }
             
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"Erro na validação: {str(e)}",
-                "provider": provider
-            }
+            return self._flow_error(f"Erro na validação: {str(e)}", provider, e)
     
-    def _analyze_validation_response(self, response: str) -> Tuple[bool, str]:
+    def _analyze_validation_response(self, response: str) -> Dict[str, Any]:
         """
         Analisa a resposta de validação para determinar aprovação.
         
@@ -148,58 +533,57 @@ O usuário forneceu as seguintes observações específicas que devem ser aplica
             response: Resposta da LLM sobre validação
             
         Returns:
-            Tupla com (aprovado, feedback)
-        """
-        # Palavras-chave que indicam aprovação
-        approval_keywords = [
-            "aprovado", "aprovada", "aprovadas",
-            "adequado", "adequada", "adequadas",
-            "correto", "correta", "corretas",
-            "bom", "boa", "boas",
-            "satisfatório", "satisfatória", "satisfatórias",
-            "aceitável", "aceitáveis",
-            "válido", "válida", "válidas"
-        ]
-        
-        # Palavras-chave que indicam reprovação
-        rejection_keywords = [
-            "reprovado", "reprovada", "reprovadas",
-            "inadequado", "inadequada", "inadequadas",
-            "incorreto", "incorreta", "incorretas",
-            "ruim", "ruins",
-            "insatisfatório", "insatisfatória", "insatisfatórias",
-            "inaceitável", "inaceitáveis",
-            "inválido", "inválida", "inválidas",
-            "problema", "problemas",
-            "erro", "erros",
-            "falta", "faltam",
-            "melhorar", "melhorias"
-        ]
+            Veredito (approved, score, stories, issues, source) com o feedback para correção
+        """
+        verdict = parse_validation_verdict(response)
+        self.validation_stats.record_verdict(verdict, keyword_verdict(response))
         
-        response_lower = response.lower()
+        if verdict["issues"] and not verdict["approved"]:
+            # Problemas objetivos do veredito são o melhor insumo para a próxima tentativa
+            verdict["feedback"] = " ".join(verdict["issues"][:MAX_FEEDBACK_ISSUES])
+        else:
+            verdict["feedback"] = self._extract_feedback(response, verdict["approved"])
+        return verdict
+    
+    def _prevalidate(self, user_stories: str, provider: str) -> Optional[Dict[str, Any]]:
+        """
+        Confere a estrutura das histórias por regras, sem chamar a LLM.
         
-        # Contar ocorrências de palavras de aprovação e reprovação
-        approval_count = sum(1 for keyword in approval_keywords if keyword in response_lower)
-        rejection_count = sum(1 for keyword in rejection_keywords if keyword in response_lower)
+        Args:
+            user_stories: Texto das Histórias de Usuário
+            provider: Provedor da LLM (informado no resultado)
+            
+        Returns:
+            Resultado de validação quando a chamada à LLM pode ser dispensada
+            (estrutura reprovada, ou aprovada com PREVALIDATION_SKIP_LLM), ou None
+            (inclusive quando as regras ficam na dúvida: 'uncertain')
+        """
+        if not config.PREVALIDATION_ENABLED:
+            return None
         
-        # Determinar aprovação baseada na contagem e contexto
-        if rejection_count > approval_count:
-            is_approved = False
-        elif approval_count > rejection_count:
-            is_approved = True
+        with timed("prevalidation"):
+            verdict = prevalidate_user_stories(user_stories)
+        if verdict["uncertain"]:
+            skip_llm = False
         else:
-            # Em caso de empate, verificar se há sugestões de melhoria
-            improvement_indicators = [
-                "sugestão", "sugestões", "recomendação", "recomendações",
-                "melhorar", "refinar", "ajustar", "corrigir"
-            ]
-            has_improvements = any(indicator in response_lower for indicator in improvement_indicators)
-            is_approved = not has_improvements
+            skip_llm = not verdict["approved"] or config.PREVALIDATION_SKIP_LLM
+        self.validation_stats.record_prevalidation(verdict["approved"], llm_skipped=skip_llm, uncertain=verdict["uncertain"])
+        if not skip_llm:
+            return None
         
-        # Extrair feedback específico
-        feedback = self._extract_feedback(response, is_approved)
-        
-        return is_approved, feedback
+        self.validation_stats.record_verdict(verdict, keyword_approved=verdict["approved"])
+        feedback = " ".join(verdict["issues"][:MAX_FEEDBACK_ISSUES]) or "Estrutura das Histórias de Usuário conferida por regras locais."
+        return {
+            "success": True,
+            "is_approved": verdict["approved"],
+            "feedback": feedback,
+            "score": verdict["score"],
+            "issues": verdict["issues"],
+            "stories": verdict["stories"],
+            "verdict_source": verdict["source"],
+            "full_response": feedback,
+            "provider": provider
+        }
     
     def _extract_feedback(self, response: str, is_approved: bool) -> str:
         """
@@ -212,6 +596,9 @@ O usuário forneceu as seguintes observações específicas que devem ser aplica
         Returns:
             Feedback específico extraído
         """
+        # O bloco do veredito não é feedback
+        response = re.sub(r"```(?:json)?\s*\{.*?\}\s*```", "", response, flags=re.DOTALL | re.IGNORECASE).strip()
+        
         if is_approved:
             # Procurar por elogios e pontos positivos
             positive_patterns = [
@@ -238,7 +625,7 @@ O usuário forneceu as seguintes observações específicas que devem ser aplica
             # Fallback: retornar as primeiras 200 caracteres da resposta
             return response[:200] + "..." if len(response) > 200 else response
     
-    def generate_with_auto_correction(self, text: str, provider: str = "zello", max_attempts: int = 3, observations: str = None) -> Dict[str, Any]:
+    def generate_with_auto_correction(self, text: str, provider: str = "zello", max_attempts: int = 3, observations: str = None, use_cache: bool = True, on_event: EventCallback = None) -> Dict[str, Any]:
         """
         Gera Histórias de Usuário com auto-correção baseada em validação.
         
@@ -247,32 +634,74 @@ O usuário forneceu as seguintes observações específicas que devem ser aplica
             provider: Provedor da LLM (apenas 'zello' é suportado)
             max_attempts: Número máximo de tentativas
             observations: Observações adicionais do usuário (opcional)
+            use_cache: Se False, as gerações ignoram o cache e forçam uma nova amostra
+            on_event: Callback de progresso; recebe etapas e trechos das gerações em streaming (opcional)
             
         Returns:
             Dicionário com resultado final
         """
+        return self._run_flow(self._auto_correction_flow(text, provider, max_attempts, observations, use_cache), on_event)
+    
+    async def agenerate_with_auto_correction(self, text: str, provider: str = "zello", max_attempts: int = 3, observations: str = None, use_cache: bool = True, on_event: EventCallback = None) -> Dict[str, Any]:
+        """Versão assíncrona de generate_with_auto_correction."""
+        return await self._arun_flow(self._auto_correction_flow(text, provider, max_attempts, observations, use_cache), on_event)
+    
+    def _auto_correction_flow(self, text: str, provider: str, max_attempts: int, observations: str = None, use_cache: bool = True, initial: Tuple[Dict[str, Any], Dict[str, Any]] = None) -> Flow:
+        """
+        Fluxo de geração com auto-correção (ver generate_with_auto_correction).
+        
+        Antes da primeira tentativa, a entrada é conferida contra o orçamento do
+        modelo (ver _fit_requirements_flow); o resultado informa 'prompt_budget'.
+        Com `initial` (geração e validação já feitas, ex.: a melhor candidata
+        especulativa), essa dupla conta como primeira tentativa e a entrada já
+        foi conferida.
+        """
+        budget_info = None
+        if initial is None:
+            fitted = yield from self._fit_requirements_flow(text, provider, observations, use_cache)
+            if not fitted["success"]:
+                return fitted
+            text, budget_info = fitted["text"], fitted["prompt_budget"]
+        result = yield from self._attempts_flow(text, provider, max_attempts, observations, use_cache, initial)
+        if budget_info is not None:
+            result["prompt_budget"] = budget_info
+        return result
+    
+    def _attempts_flow(self, text: str, provider: str, max_attempts: int, observations: str = None, use_cache: bool = True, initial: Tuple[Dict[str, Any], Dict[str, Any]] = None) -> Flow:
+        """Tentativas de geração, validação e correção (ver _auto_correction_flow)."""
         attempts = []
+        followup = config.CORRECTION_MODE == "followup"
+        generation_result = None
+        feedback = None
         
         for attempt in range(max_attempts):
-            # Gerar Histórias de Usuário
-            generation_result = self.run_generation(text, provider, observations)
-            if not generation_result["success"]:
-                return generation_result
-            
-            # Validar resultado
-            validation_result = self.run_validation(generation_result["content"], provider)
-            if not validation_result["success"]:
-                return validation_result
+            if attempt == 0 and initial:
+                generation_result, validation_result = initial
+            else:
+                # Gerar Histórias de Usuário (a partir da 2ª tentativa, corrigir a versão anterior)
+                if attempt and followup:
+                    generation_result = yield from self._correction_flow(text, generation_result["content"], feedback, provider, observations, use_cache)
+                else:
+                    generation_result = yield from self._generation_flow(text, provider, observations, use_cache)
+                if not generation_result["success"]:
+                    return generation_result
+                self.validation_stats.record_attempt_prompt(attempt + 1, generation_result["prompt_tokens"])
+                
+                validation_result = yield from self._check_flow(generation_result["content"], provider)
+                if not validation_result["success"]:
+                    return validation_result
             
             # Registrar tentativa
             attempts.append({
                 "attempt": attempt + 1,
+                "prompt_tokens": generation_result["prompt_tokens"],
                 "generation": generation_result,
                 "validation": validation_result
             })
             
             # Se aprovado, retornar resultado
             if validation_result["is_approved"]:
+                self.validation_stats.record_job(attempt + 1, approved=True)
                 return {
                     "success": True,
                     "content": generation_result["content"],
@@ -285,9 +714,11 @@ O usuário forneceu as seguintes observações específicas que devem ser aplica
             # Se não aprovado e ainda há tentativas, usar feedback para correção
             if attempt < max_attempts - 1:
                 feedback = validation_result["feedback"]
-                text = f"{text}\n\nFeedback para correção: {feedback}"
+                if not followup:
+                    text = f"{text}\n\nFeedback para correção: {feedback}"
         
         # Se chegou aqui, todas as tentativas falharam
+        self.validation_stats.record_job(max_attempts, approved=False)
         return {
             "success": False,
             "error": f"Não foi possível gerar Histórias de Usuário adequadas após {max_attempts} tentativas",
@@ -296,7 +727,335 @@ O usuário forneceu as seguintes observações específicas que devem ser aplica
             "final_validation": validation_result
         }
     
-    def generate_summary(self, text: str, provider: str = "zello", observations: str = None) -> Dict[str, Any]:
+    def _check_flow(self, user_stories: str, provider: str) -> Flow:
+        """Pré-valida a estrutura localmente; a LLM só valida o que passou nas regras."""
+        validation_result = self._prevalidate(user_stories, provider)
+        if validation_result is None:
+            validation_result = yield from self._validation_flow(user_stories, provider)
+        return validation_result
+    
+    def _correction_flow(self, text: str, previous_output: str, feedback: str, provider: str, observations: str = None, use_cache: bool = True) -> Flow:
+        """
+        Fluxo de correção: reenvia a versão anterior e o feedback como turno de continuação.
+        
+        O prompt respeita CORRECTION_PROMPT_MAX_TOKENS. Os requisitos só entram
+        quando o feedback aponta lacunas de conteúdo, e cortados ao espaço que
+        sobrar. Se nem a versão anterior couber, a tentativa volta a ser uma
+        geração completa com o feedback da última validação.
+        """
+        with timed("prompt.correction"):
+            messages, requirements_included = self._correction_messages(text, previous_output, feedback, observations)
+        if messages is None:
+            result = yield from self._generation_flow(f"{text}\n\nFeedback para correção: {feedback}", provider, observations, use_cache)
+            if result["success"]:
+                result["correction_mode"] = "regeneration"
+            return result
+        
+        try:
+            response = yield self._llm_request(provider, messages, use_cache, stage="generation", stream=True)
+            return {
+                "success": True,
+                "content": response,
+                "provider": provider,
+                "prompt_used": messages[-1]["content"],
+                "prompt_tokens": self._messages_tokens(messages),
+                "correction_mode": "followup",
+                "requirements_included": requirements_included
+            }
+        except Exception as e:
+            return self._flow_error(f"Erro na correção: {str(e)}", provider, e)
+    
+    def _correction_messages(self, text: str, previous_output: str, feedback: str, observations: str = None) -> Tuple[Optional[List[Dict[str, str]]], bool]:
+        """
+        Monta as mensagens da correção dentro do limite de tokens.
+        
+        Args:
+            text: Requisitos/transcrição originais
+            previous_output: Histórias da tentativa reprovada
+            feedback: Feedback da validação
+            observations: Observações adicionais do usuário (opcional)
+            
+        Returns:
+            Tupla com (mensagens, requisitos incluídos); mensagens é None se a
+            versão anterior não couber no limite
+        """
+        budget = config.CORRECTION_PROMPT_MAX_TOKENS
+        feedback_chars = int(budget * CORRECTION_FEEDBACK_SHARE) * CHARS_PER_TOKEN
+        feedback = (feedback or "")[:feedback_chars]
+        if observations:
+            observations = observations[:feedback_chars]
+        
+        system_message = {
+            "role": "system",
+            "content": "Você é um especialista em análise de requisitos e criação de Histórias de Usuário. Siga rigorosamente as instruções fornecidas."
+        }
+        request = self.prompts.correct_user_stories(feedback, observations)
+        fixed = [system_message, {"role": "assistant", "content": previous_output}, {"role": "user", "content": request}]
+        remaining = budget - self._messages_tokens(fixed) - estimate_tokens(self.prompts.correction_context())
+        if remaining < 0:
+            return None, False
+        
+        # Requisitos só quando o feedback aponta lacunas de conteúdo, cortados ao espaço restante
+        requirements = None
+        feedback_lower = feedback.lower()
+        if any(hint in feedback_lower for hint in REQUIREMENTS_HINTS):
+            header_tokens = estimate_tokens(self.prompts.correction_context("-"))
+            max_chars = max(remaining - header_tokens, 0) * CHARS_PER_TOKEN
+            if max_chars:
+                requirements = text if len(text) <= max_chars else text[:max_chars - 6] + "\n[...]"
+        
+        context = {"role": "user", "content": self.prompts.correction_context(requirements)}
+        return [system_message, context] + fixed[1:], requirements is not None
+    
+    @staticmethod
+    def _messages_tokens(messages: List[Dict[str, str]]) -> int:
+        """Estima os tokens de prompt de uma lista de mensagens (mesmo estimador dos clientes de LLM)."""
+        return messages_tokens(messages)
+    
+    def generate_user_stories(self, text: str, provider: str = "zello", max_attempts: int = 3, observations: str = None, use_cache: bool = True, on_event: EventCallback = None, endpoint: str = None) -> Dict[str, Any]:
+        """
+        Gera Histórias de Usuário validadas no modo configurado para o endpoint.
+        
+        Endpoints listados em SPECULATIVE_ENDPOINTS usam generate_speculative;
+        os demais, generate_with_auto_correction.
+        
+        Args:
+            text: Texto de entrada para processar
+            provider: Provedor da LLM (apenas 'zello' é suportado)
+            max_attempts: Número máximo de tentativas
+            observations: Observações adicionais do usuário (opcional)
+            use_cache: Se False, as gerações ignoram o cache (candidatas especulativas sempre ignoram)
+            on_event: Callback de progresso (opcional)
+            endpoint: Nome do endpoint que originou a geração (ex.: 'process-stream')
+            
+        Returns:
+            Dicionário com resultado final
+        """
+        if endpoint and endpoint in speculative_endpoints():
+            return self.generate_speculative(text, provider, max_attempts=max_attempts, observations=observations, on_event=on_event)
+        return self.generate_with_auto_correction(text, provider, max_attempts, observations, use_cache, on_event)
+    
+    async def agenerate_user_stories(self, text: str, provider: str = "zello", max_attempts: int = 3, observations: str = None, use_cache: bool = True, on_event: EventCallback = None, endpoint: str = None) -> Dict[str, Any]:
+        """Versão assíncrona de generate_user_stories."""
+        if endpoint and endpoint in speculative_endpoints():
+            return await self.agenerate_speculative(text, provider, max_attempts=max_attempts, observations=observations, on_event=on_event)
+        return await self.agenerate_with_auto_correction(text, provider, max_attempts, observations, use_cache, on_event)
+    
+    def generate_speculative(self, text: str, provider: str = "zello", candidates: int = None, max_attempts: int = 3, observations: str = None, on_event: EventCallback = None) -> Dict[str, Any]:
+        """
+        Gera K candidatas em paralelo e retorna a primeira aprovada na validação.
+        
+        Cada candidata usa uma temperatura diferente e é validada assim que
+        termina; quando uma é aprovada, as demais são canceladas (streams em
+        andamento são fechados). Se nenhuma for aprovada, a melhor segue para
+        a auto-correção sequencial com as tentativas restantes.
+        
+        Args:
+            text: Texto de entrada para processar
+            provider: Provedor da LLM (apenas 'zello' é suportado)
+            candidates: Número de candidatas (opcional, usa SPECULATIVE_CANDIDATES)
+            max_attempts: Tentativas totais; a rodada especulativa conta como a primeira
+            observations: Observações adicionais do usuário (opcional)
+            on_event: Callback de progresso (opcional; das candidatas, só as mudanças de etapa)
+            
+        Returns:
+            Dicionário com resultado final e o resumo da rodada em 'speculative'
+        """
+        started = time.perf_counter()
+        fitted = self._run_flow(self._fit_requirements_flow(text, provider, observations), on_event)
+        if not fitted["success"]:
+            return fitted
+        text = fitted["text"]
+        temperatures = candidate_temperatures(candidates or config.SPECULATIVE_CANDIDATES)
+        cancel = threading.Event()
+        candidate_events = self._candidate_events(on_event)
+        executor = get_speculative_executor()
+        
+        futures = []
+        for index, temperature in enumerate(temperatures):
+            flow = self._candidate_flow(text, provider, observations, index, temperature)
+            future = executor.submit(contextvars.copy_context().run, self._run_flow, flow, candidate_events, cancel)
+            future.add_done_callback(self._record_candidate)
+            futures.append(future)
+        
+        finished, winner = [], None
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"success": False, "error": f"Erro na candidata: {str(e)}", "provider": provider}
+            if result.get("cancelled"):
+                continue
+            finished.append(result)
+            if result.get("is_approved"):
+                winner = result
+                break
+        # Interrompe as candidatas em andamento e descarta as que ainda não começaram
+        cancel.set()
+        for future in futures:
+            future.cancel()
+        
+        corrected = None
+        best = None if winner else self._best_candidate(finished)
+        if best and max_attempts > 1:
+            corrected = self._run_flow(
+                self._auto_correction_flow(text, provider, max_attempts, observations, use_cache=False, initial=(best["generation"], best["validation"])),
+                on_event
+            )
+        result = self._speculative_result(provider, temperatures, finished, winner, corrected, started, on_event)
+        result["prompt_budget"] = fitted["prompt_budget"]
+        return result
+    
+    async def agenerate_speculative(self, text: str, provider: str = "zello", candidates: int = None, max_attempts: int = 3, observations: str = None, on_event: EventCallback = None) -> Dict[str, Any]:
+        """Versão assíncrona de generate_speculative (as candidatas perdedoras são canceladas com Task.cancel)."""
+        started = time.perf_counter()
+        fitted = await self._arun_flow(self._fit_requirements_flow(text, provider, observations), on_event)
+        if not fitted["success"]:
+            return fitted
+        text = fitted["text"]
+        temperatures = candidate_temperatures(candidates or config.SPECULATIVE_CANDIDATES)
+        candidate_events = self._candidate_events(on_event)
+        
+        tasks = []
+        for index, temperature in enumerate(temperatures):
+            task = asyncio.ensure_future(self._arun_flow(self._candidate_flow(text, provider, observations, index, temperature), candidate_events))
+            task.add_done_callback(self._record_candidate)
+            tasks.append(task)
+        
+        finished, winner = [], None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    result = await next_done
+                except Exception as e:
+                    result = {"success": False, "error": f"Erro na candidata: {str(e)}", "provider": provider}
+                finished.append(result)
+                if result.get("is_approved"):
+                    winner = result
+                    break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        corrected = None
+        best = None if winner else self._best_candidate(finished)
+        if best and max_attempts > 1:
+            corrected = await self._arun_flow(
+                self._auto_correction_flow(text, provider, max_attempts, observations, use_cache=False, initial=(best["generation"], best["validation"])),
+                on_event
+            )
+        result = self._speculative_result(provider, temperatures, finished, winner, corrected, started, on_event)
+        result["prompt_budget"] = fitted["prompt_budget"]
+        return result
+    
+    def _candidate_flow(self, text: str, provider: str, observations: str, index: int, temperature: float) -> Flow:
+        """Fluxo de uma candidata especulativa: geração (amostra nova) seguida da validação."""
+        generation_result = yield from self._generation_flow(text, provider, observations, use_cache=False, temperature=temperature)
+        if not generation_result["success"]:
+            return generation_result
+        validation_result = yield from self._check_flow(generation_result["content"], provider)
+        if not validation_result["success"]:
+            return validation_result
+        return {
+            "success": True,
+            "candidate": index + 1,
+            "temperature": temperature,
+            "is_approved": validation_result["is_approved"],
+            "generation": generation_result,
+            "validation": validation_result
+        }
+    
+    @staticmethod
+    def _candidate_events(on_event: EventCallback) -> EventCallback:
+        """Repassa das candidatas só as mudanças de etapa (trechos de K gerações simultâneas se misturariam)."""
+        if not on_event:
+            return None
+        
+        def forward(event: Dict[str, Any]) -> None:
+            if event.get("type") == "stage":
+                on_event(event)
+        return forward
+    
+    def _record_candidate(self, future) -> None:
+        """Registra o custo de uma candidata quando ela termina (inclusive depois da vencedora)."""
+        if future.cancelled():
+            self.speculative_stats.record_candidate(None, cancelled=True)
+        elif future.exception() is not None:
+            self.speculative_stats.record_candidate(None)
+        else:
+            self.speculative_stats.record_candidate(future.result())
+    
+    @staticmethod
+    def _best_candidate(finished: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Candidata validada com maior nota (e menos problemas) para seguir na correção."""
+        validated = [result for result in finished if result.get("success")]
+        if not validated:
+            return None
+        return max(validated, key=lambda result: (
+            result["validation"].get("score") if result["validation"].get("score") is not None else -1,
+            -len(result["validation"].get("issues") or [])
+        ))
+    
+    def _speculative_result(self, provider: str, temperatures: List[float], finished: List[Dict[str, Any]], winner: Optional[Dict[str, Any]], corrected: Optional[Dict[str, Any]], started: float, on_event: EventCallback = None) -> Dict[str, Any]:
+        """Monta o resultado da rodada especulativa e registra as métricas."""
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.speculative_stats.record_run(len(temperatures), latency_ms, winner, fallback=corrected is not None)
+        summary = {
+            "candidates": len(temperatures),
+            "temperatures": temperatures,
+            "finished": len(finished),
+            "interrupted": len(temperatures) - len(finished),  # ainda em andamento quando a rodada terminou
+            "winner": winner["candidate"] if winner else None,
+            "winner_temperature": winner["temperature"] if winner else None,
+            "fallback_correction": corrected is not None,
+            "latency_ms": latency_ms
+        }
+        
+        if corrected is not None:
+            corrected["speculative"] = summary
+            return corrected
+        
+        attempts = [{
+            "attempt": 1,
+            "candidate": result["candidate"],
+            "temperature": result["temperature"],
+            "prompt_tokens": result["generation"]["prompt_tokens"],
+            "generation": result["generation"],
+            "validation": result["validation"]
+        } for result in finished if result.get("success")]
+        
+        if winner:
+            self.validation_stats.record_job(1, approved=True)
+            if on_event:
+                on_event({"type": "token", "stage": "generation", "text": winner["generation"]["content"]})
+            return {
+                "success": True,
+                "content": winner["generation"]["content"],
+                "provider": provider,
+                "attempts": attempts,
+                "final_validation": winner["validation"],
+                "auto_correction_used": False,
+                "speculative": summary
+            }
+        
+        if not attempts:
+            # Todas as candidatas falharam: retorna o primeiro erro
+            failure = dict(finished[0]) if finished else {"success": False, "error": "Nenhuma candidata concluída", "provider": provider}
+            failure["speculative"] = summary
+            return failure
+        
+        self.validation_stats.record_job(1, approved=False)
+        return {
+            "success": False,
+            "error": f"Nenhuma das {len(temperatures)} candidatas foi aprovada na validação",
+            "provider": provider,
+            "attempts": attempts,
+            "final_validation": self._best_candidate(finished)["validation"],
+            "speculative": summary
+        }
+    
+    def generate_summary(self, text: str, provider: str = "zello", observations: str = None, use_cache: bool = True, on_event: EventCallback = None) -> Dict[str, Any]:
         """
         Gera resumo executivo de reunião a partir de uma transcrição.
         
@@ -304,19 +1063,155 @@ O usuário forneceu as seguintes observações específicas que devem ser aplica
             text: Texto da transcrição da reunião
             provider: Provedor da LLM (apenas 'zello' é suportado)
             observations: Observações adicionais do usuário (opcional)
+            use_cache: Se False, ignora o cache de completions e força uma nova amostra
+            on_event: Callback de progresso; recebe os trechos do resumo em streaming (opcional)
             
         Returns:
             Dicionário com resultado da geração do resumo
         """
+        return self._run_flow(self._summary_flow(text, provider, observations, use_cache), on_event)
+    
+    async def agenerate_summary(self, text: str, provider: str = "zello", observations: str = None, use_cache: bool = True, on_event: EventCallback = None) -> Dict[str, Any]:
+        """Versão assíncrona de generate_summary."""
+        return await self._arun_flow(self._summary_flow(text, provider, observations, use_cache), on_event)
+    
+    def _summary_flow(self, text: str, provider: str, observations: str = None, use_cache: bool = True) -> Flow:
+        """
+        Fluxo de geração de resumo de reunião (ver generate_summary).
+        
+        Transcrições acima de SUMMARY_CHUNK_THRESHOLD_TOKENS, ou cujo prompt
+        direto não cabe no orçamento do modelo, são resumidas em modo
+        map-reduce: trechos resumidos em paralelo e combinados em um prompt
+        final. O resultado informa o modo usado e a latência.
+        """
+        started = time.perf_counter()
         try:
-            # Gerar prompt para resumo de reunião
-            base_prompt = self.prompts.generate_meeting_summary(text)
+            with timed("prompt.summary_chunking"):
+                chunks = self._summary_chunks(text, observations)
+            if len(chunks) > 1:
+                result = yield from self._map_reduce_summary_flow(text, chunks, provider, observations, use_cache)
+            else:
+                # Gerar prompt para resumo de reunião
+                with timed("prompt.summary"):
+                    prompt = self._apply_summary_observations(self.prompts.generate_meeting_summary(text), observations)
+                
+                # Chamar a LLM
+                response = yield self._llm_request(provider, self._summary_messages(prompt), use_cache, stage="summary", stream=True)
+                
+                result = {
+                    "success": True,
+                    "content": response,
+                    "provider": provider,
+                    "prompt_used": prompt,
+                    "mode": "single"
+                }
             
-            # Adicionar observações se fornecidas
-            if observations and observations.strip():
-                print(f"[DEBUG] Observações recebidas no resumo: {len(observations)} caracteres")
-                print(f"[DEBUG] Primeiros 200 caracteres das observações: {observations[:200]}...")
-                prompt = f"""{base_prompt}
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            print(f"Resumo gerado em modo {result['mode']}: {result['latency_ms']:.0f} ms")
+            return result
+            
+        except Exception as e:
+            return self._flow_error(f"Erro na geração do resumo: {str(e)}", provider, e)
+    
+    def _map_reduce_summary_flow(self, text: str, chunks: List[str], provider: str, observations: str = None, use_cache: bool = True) -> Flow:
+        """
+        Resumo map-reduce: resume os trechos em paralelo e combina as anotações.
+        
+        Os resumos dos trechos não dependem das observações; se já existirem
+        para esta transcrição (ex.: regeneração), apenas o reduce é executado,
+        mesmo com use_cache=False.
+        """
+        total = len(chunks)
+        digest_key = make_digest_key(text, config.SUMMARY_CHUNK_TOKENS, DEFAULT_CHAT_MODEL)
+        
+        map_started = time.perf_counter()
+        partials = self.digest_store.get(digest_key)
+        digests_reused = partials is not None and len(partials) == total
+        if digests_reused:
+            print(f"[DEBUG] Transcrição longa: reaproveitando resumos de {total} trechos")
+        else:
+            print(f"[DEBUG] Transcrição longa: resumo map-reduce em {total} trechos")
+            partials = yield [
+                self._llm_request(
+                    provider,
+                    self._summary_messages(self.prompts.summarize_transcript_chunk(chunk, index, total)),
+                    use_cache,
+                    stage="summary_map"
+                )
+                for index, chunk in enumerate(chunks, start=1)
+            ]
+            self.digest_store.set(digest_key, partials)
+        map_latency_ms = round((time.perf_counter() - map_started) * 1000, 1)
+        
+        reduce_started = time.perf_counter()
+        prompt = self._apply_summary_observations(self.prompts.combine_meeting_summaries(partials), observations)
+        response = yield self._llm_request(provider, self._summary_messages(prompt), use_cache, stage="summary", stream=True)
+        
+        return {
+            "success": True,
+            "content": response,
+            "provider": provider,
+            "prompt_used": prompt,
+            "mode": "map_reduce",
+            "chunks": total,
+            "digests_reused": digests_reused,
+            "map_latency_ms": map_latency_ms,
+            "reduce_latency_ms": round((time.perf_counter() - reduce_started) * 1000, 1)
+        }
+    
+    def _summary_chunks(self, text: str, observations: str = None) -> List[str]:
+        """
+        Decide o modo do resumo.
+        
+        Abaixo do limiar, o resumo é direto se o prompt couber no orçamento do
+        modelo; se não couber, vai para o map-reduce (mesmo com o chunking
+        desligado) ou é rejeitado, conforme PROMPT_OVERSIZE_POLICY.
+        
+        Returns:
+            [text] para resumo direto, ou os trechos do map-reduce
+            
+        Raises:
+            PromptTooLargeError: Se o prompt direto não couber e a política for 'reject'
+        """
+        if config.SUMMARY_CHUNKING_ENABLED and estimate_tokens(text) > config.SUMMARY_CHUNK_THRESHOLD_TOKENS:
+            return split_by_token_budget(text, config.SUMMARY_CHUNK_TOKENS)
+        budget = prompt_budget(DEFAULT_CHAT_MODEL, DEFAULT_MAX_TOKENS)
+        prompt = self._apply_summary_observations(self.prompts.generate_meeting_summary(text), observations, log=False)
+        tokens = self._messages_tokens(self._summary_messages(prompt))
+        if tokens <= budget:
+            return [text]
+        if config.PROMPT_OVERSIZE_POLICY != "chunk":
+            self.prompt_budget_stats.record("summary", "rejected", tokens)
+            raise PromptTooLargeError(tokens, budget, DEFAULT_CHAT_MODEL, "summary")
+        print(f"[DEBUG] Prompt do resumo acima do orçamento (~{tokens} > {budget} tokens): usando map-reduce")
+        self.prompt_budget_stats.record("summary", "chunked", tokens)
+        return split_by_token_budget(text, config.SUMMARY_CHUNK_TOKENS)
+    
+    @staticmethod
+    def _summary_messages(prompt: str) -> List[Dict[str, str]]:
+        """Mensagens para a LLM nas etapas de resumo."""
+        return [
+            {
+                "role": "system",
+                "content": "Você é um especialista em análise de reuniões e documentação executiva. Siga rigorosamente as instruções fornecidas."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    @staticmethod
+    def _apply_summary_observations(base_prompt: str, observations: str = None, log: bool = True) -> str:
+        """Acrescenta as observações do usuário ao prompt de resumo (direto ou reduce)."""
+        if not (observations and observations.strip()):
+            if log:
+                print(f"[DEBUG] Prompt sem observações: {len(base_prompt)} caracteres")
+            return base_prompt
+        if log:
+            print(f"[DEBUG] Observações recebidas no resumo: {len(observations)} caracteres")
+            print(f"[DEBUG] Primeiros 200 caracteres das observações: {observations[:200]}...")
+        prompt = f"""{base_prompt}
 
 ---
 
@@ -331,36 +1226,42 @@ O usuário forneceu as seguintes observações específicas que devem ser aplica
 - Adapte o conteúdo, estrutura, detalhamento, tom ou foco do resumo conforme as instruções fornecidas nas observações.
 - Se as observações mencionarem aspectos específicos (formato, estilo, nível de detalhe, foco em tópicos específicos, etc.), priorize esses aspectos na geração.
 - Mantenha a qualidade e clareza do resumo, mas incorpore as adaptações solicitadas nas observações."""
-                print(f"[DEBUG] Prompt final com observações: {len(prompt)} caracteres")
-            else:
-                prompt = base_prompt
-                print(f"[DEBUG] Prompt sem observações: {len(prompt)} caracteres")
-            
-            # Preparar mensagens para a LLM
-            messages = [
-                {
-                    "role": "system",
-                    "content": "Você é um especialista em análise de reuniões e documentação executiva. Siga rigorosamente as instruções fornecidas."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-            
-            # Chamar a LLM
-            response = self.llm_service.get_completion(provider, messages)
-            
-            return {
-                "success": True,
-                "content": response,
-                "provider": provider,
-                "prompt_used": prompt
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"Erro na geração do resumo: {str(e)}",
-                "provider": provider
-            }
+        if log:
+            print(f"[DEBUG] Prompt final com observações: {len(prompt)} caracteres")
+        return prompt
+    
+    def get_digest_stats(self) -> Dict[str, Any]:
+        """
+        Retorna o reaproveitamento dos resumos parciais de transcrições longas.
+        
+        Returns:
+            Dicionário com consultas, reaproveitamentos e taxa
+        """
+        return self.digest_store.get_stats()
+    
+    def get_validation_stats(self) -> Dict[str, Any]:
+        """
+        Retorna as métricas de validação (aprovação, falsas reprovações e tentativas por job).
+        
+        Returns:
+            Dicionário com contadores e taxas
+        """
+        return self.validation_stats.get_stats()
+    
+    def get_speculative_stats(self) -> Dict[str, Any]:
+        """
+        Retorna custo e latência do modo especulativo.
+        
+        Returns:
+            Dicionário com candidatas, tokens estimados e latências
+        """
+        return self.speculative_stats.get_stats()
+    
+    def get_prompt_budget_stats(self) -> Dict[str, Any]:
+        """
+        Retorna os prompts conferidos contra o orçamento do modelo, por etapa.
+        
+        Returns:
+            Dicionário com enviados, desviados para trechos e rejeitados
+        """
+        return self.prompt_budget_stats.get_stats()
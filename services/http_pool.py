@@ -0,0 +1,170 @@
+"""
+Pool compartilhado de sessões HTTP com keep-alive.
+
+Mantém uma `requests.Session` por URL base, reaproveitando conexões TCP/TLS
+entre chamadas (geração, validação e retries) em vez de abrir uma conexão nova
+a cada `requests.post`.
+"""
+
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import config
+
+
+class HTTPSessionPool:
+    """Pool thread-safe de sessões HTTP keep-alive, uma por URL base."""
+
+    def __init__(self, pool_size: int = None, keepalive_seconds: float = None):
+        """
+        Inicializa o pool de sessões.
+
+        Args:
+            pool_size: Conexões mantidas por host (opcional, usa config se não fornecido)
+            keepalive_seconds: Tempo máximo ocioso antes de descartar as conexões (opcional)
+        """
+        self.pool_size = pool_size or config.LLM_HTTP_POOL_SIZE
+        self.keepalive_seconds = keepalive_seconds if keepalive_seconds is not None else config.LLM_HTTP_KEEPALIVE_SECONDS
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._last_used: Dict[str, float] = {}
+        # Contadores de conexões já descartadas (sessões recicladas por ociosidade)
+        self._retired_requests = 0
+        self._retired_connections = 0
+        self._idle_resets = 0
+
+    def _create_session(self) -> requests.Session:
+        """Cria uma sessão com adapter dimensionado pelo pool configurado."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            pool_block=False
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get_session(self, base_url: str) -> requests.Session:
+        """
+        Obtém a sessão associada a uma URL base, criando-a se necessário.
+
+        Sessões ociosas há mais de `keepalive_seconds` são recicladas, evitando
+        reutilizar conexões que o servidor provavelmente já encerrou. A sessão
+        antiga só sai do pool (não é fechada): uma thread que ainda a usa
+        termina a requisição, e as conexões são liberadas quando a última
+        referência é descartada.
+
+        Args:
+            base_url: URL base do serviço (ex.: https://api.exemplo.com)
+
+        Returns:
+            Sessão HTTP compartilhada
+        """
+        key = (base_url or "").rstrip("/")
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(key)
+            last_used = self._last_used.get(key, now)
+            if session is not None and self.keepalive_seconds and now - last_used > self.keepalive_seconds:
+                self._retire_session(session, close=False)
+                self._idle_resets += 1
+                session = None
+            if session is None:
+                session = self._create_session()
+                self._sessions[key] = session
+            self._last_used[key] = now
+            return session
+
+    def _retire_session(self, session: requests.Session, close: bool = True) -> None:
+        """
+        Retira uma sessão do pool preservando seus contadores nas estatísticas.
+
+        Args:
+            session: Sessão retirada
+            close: Se True, fecha as conexões (só quando nenhuma thread pode
+                estar usando a sessão, ex.: no encerramento do pool)
+        """
+        requests_count, connections_count = self._session_counters(session)
+        self._retired_requests += requests_count
+        self._retired_connections += connections_count
+        if close:
+            session.close()
+
+    @staticmethod
+    def _session_counters(session: requests.Session) -> tuple:
+        """
+        Soma requisições e conexões abertas pelos pools urllib3 da sessão.
+
+        Returns:
+            Tupla (requisições, conexões novas)
+        """
+        total_requests = 0
+        total_connections = 0
+        seen = set()
+        for adapter in session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                total_requests += getattr(pool, "num_requests", 0)
+                total_connections += getattr(pool, "num_connections", 0)
+        return total_requests, total_connections
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas de reuso de conexões.
+
+        Returns:
+            Dicionário com conexões novas, reutilizadas e requisições totais
+        """
+        with self._lock:
+            total_requests = self._retired_requests
+            total_connections = self._retired_connections
+            for session in self._sessions.values():
+                requests_count, connections_count = self._session_counters(session)
+                total_requests += requests_count
+                total_connections += connections_count
+            return {
+                "base_urls": len(self._sessions),
+                "pool_size": self.pool_size,
+                "keepalive_seconds": self.keepalive_seconds,
+                "requests": total_requests,
+                "new_connections": total_connections,
+                "reused_connections": max(total_requests - total_connections, 0),
+                "idle_resets": self._idle_resets
+            }
+
+    def close(self) -> None:
+        """Fecha todas as sessões do pool."""
+        with self._lock:
+            for session in self._sessions.values():
+                self._retire_session(session)
+            self._sessions.clear()
+            self._last_used.clear()
+
+
+_shared_pool: Optional[HTTPSessionPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_session_pool() -> HTTPSessionPool:
+    """
+    Retorna o pool de sessões compartilhado pelo processo.
+
+    Returns:
+        Instância única de HTTPSessionPool
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = HTTPSessionPool()
+        return _shared_pool
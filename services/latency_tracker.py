@@ -0,0 +1,233 @@
+"""
+Rastreamento de latência da LLM por classe de prompt.
+
+As amostras são agrupadas por etapa (generation, validation, summary...),
+modelo e faixa de tamanho da entrada. A partir delas:
+
+- o timeout de leitura é derivado do p99 observado (com margem e limites),
+  em vez de um valor fixo para prompts curtos e longos;
+- o atraso para requisições "hedged" é o p95: se a resposta não chegou até
+  lá, uma segunda requisição é enviada e vence a que terminar primeiro.
+
+O envio de requisições extras é limitado por um orçamento (fração das
+requisições), para não elevar a contagem média além do configurado.
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from config import config
+
+
+# Faixas de tamanho da entrada, em caracteres
+SIZE_BUCKETS = ((2000, "<2k"), (8000, "2k-8k"), (32000, "8k-32k"))
+LARGEST_SIZE_BUCKET = "32k+"
+
+
+def size_bucket(messages: List[Dict[str, str]]) -> str:
+    """
+    Classifica o tamanho total das mensagens.
+
+    Args:
+        messages: Mensagens enviadas à LLM
+
+    Returns:
+        Rótulo da faixa de tamanho
+    """
+    total = sum(len(message.get("content") or "") for message in messages)
+    for limit, label in SIZE_BUCKETS:
+        if total < limit:
+            return label
+    return LARGEST_SIZE_BUCKET
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Percentil por interpolação linear (samples não precisa estar ordenado).
+
+    Args:
+        samples: Amostras
+        pct: Percentil entre 0 e 100
+
+    Returns:
+        Valor do percentil
+    """
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class LatencyTracker:
+    """Janela de latências por classe de prompt, com timeouts adaptativos e orçamento de hedge."""
+
+    def __init__(
+        self,
+        window: int = None,
+        min_samples: int = None,
+        default_timeout: float = None,
+        min_timeout: float = None,
+        max_timeout: float = None,
+        timeout_multiplier: float = None,
+        hedge_budget: float = None
+    ):
+        """
+        Inicializa o rastreador.
+
+        Args:
+            window: Amostras mantidas por classe (opcional, usa config)
+            min_samples: Amostras necessárias antes de adaptar (opcional, usa config)
+            default_timeout: Timeout de leitura sem amostras suficientes (opcional, usa config)
+            min_timeout: Menor timeout de leitura permitido (opcional, usa config)
+            max_timeout: Maior timeout de leitura permitido (opcional, usa config)
+            timeout_multiplier: Margem aplicada sobre o p99 (opcional, usa config)
+            hedge_budget: Fração máxima de requisições extras (opcional, usa config)
+        """
+        self.window = window or config.LLM_LATENCY_WINDOW
+        self.min_samples = min_samples or config.LLM_LATENCY_MIN_SAMPLES
+        self.default_timeout = default_timeout or config.LLM_READ_TIMEOUT_SECONDS
+        self.min_timeout = min_timeout or config.LLM_TIMEOUT_MIN_SECONDS
+        self.max_timeout = max_timeout or config.LLM_TIMEOUT_MAX_SECONDS
+        self.timeout_multiplier = timeout_multiplier or config.LLM_TIMEOUT_MULTIPLIER
+        self.hedge_budget = hedge_budget if hedge_budget is not None else config.LLM_HEDGE_BUDGET
+
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._requests = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+
+    @staticmethod
+    def bucket_key(prompt_class: Optional[str], model: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Monta a chave da classe de prompt.
+
+        Args:
+            prompt_class: Etapa do pipeline (ex.: 'validation'); None vira 'default'
+            model: Modelo utilizado
+            messages: Mensagens enviadas
+
+        Returns:
+            Chave no formato 'etapa|modelo|faixa'
+        """
+        return f"{prompt_class or 'default'}|{model}|{size_bucket(messages)}"
+
+    def record(self, key: str, seconds: float) -> None:
+        """Registra a latência de uma resposta bem-sucedida."""
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def _snapshot(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            return list(samples)
+
+    def read_timeout(self, key: str) -> float:
+        """
+        Timeout de leitura para a classe: p99 × margem, dentro dos limites configurados.
+
+        Returns:
+            Segundos (o padrão enquanto não houver amostras suficientes)
+        """
+        if not config.LLM_ADAPTIVE_TIMEOUTS:
+            return self.default_timeout
+        samples = self._snapshot(key)
+        if samples is None:
+            return self.default_timeout
+        timeout = percentile(samples, 99) * self.timeout_multiplier
+        return min(max(timeout, self.min_timeout), self.max_timeout)
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """
+        Atraso antes de enviar a requisição extra (p95 da classe).
+
+        Returns:
+            Segundos, ou None se o hedge estiver desativado ou sem amostras suficientes
+        """
+        if not config.LLM_HEDGE_ENABLED or self.hedge_budget <= 0:
+            return None
+        samples = self._snapshot(key)
+        if samples is None:
+            return None
+        return percentile(samples, 95)
+
+    def record_request(self) -> None:
+        """Contabiliza uma requisição lógica (base do orçamento de hedge)."""
+        with self._lock:
+            self._requests += 1
+
+    def try_hedge(self) -> bool:
+        """
+        Reserva uma requisição extra se o orçamento permitir.
+
+        Returns:
+            True se o hedge pode ser enviado
+        """
+        with self._lock:
+            if self._hedges + 1 > self.hedge_budget * self._requests:
+                return False
+            self._hedges += 1
+            return True
+
+    def record_hedge_win(self) -> None:
+        """Contabiliza uma requisição extra que respondeu antes da original."""
+        with self._lock:
+            self._hedge_wins += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna percentis e timeouts por classe, além do uso do orçamento de hedge.
+
+        Returns:
+            Dicionário com classes e contadores de hedge
+        """
+        with self._lock:
+            snapshot = {key: list(samples) for key, samples in self._samples.items()}
+            requests_count, hedges, wins = self._requests, self._hedges, self._hedge_wins
+        classes = {}
+        for key, samples in snapshot.items():
+            classes[key] = {
+                "samples": len(samples),
+                "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000, 1),
+                "p99_ms": round(percentile(samples, 99) * 1000, 1),
+                "read_timeout_seconds": round(self.read_timeout(key), 1),
+                "hedge_after_ms": round(self.hedge_delay(key) * 1000, 1) if self.hedge_delay(key) is not None else None
+            }
+        return {
+            "adaptive_timeouts": config.LLM_ADAPTIVE_TIMEOUTS,
+            "hedge_enabled": config.LLM_HEDGE_ENABLED,
+            "hedge_budget": self.hedge_budget,
+            "requests": requests_count,
+            "hedges": hedges,
+            "hedge_wins": wins,
+            "hedge_rate": round(hedges / requests_count, 4) if requests_count else 0.0,
+            "classes": classes
+        }
+
+
+_shared_tracker: Optional[LatencyTracker] = None
+_shared_tracker_lock = threading.Lock()
+
+
+def get_shared_latency_tracker() -> LatencyTracker:
+    """
+    Retorna o rastreador de latência compartilhado pelo processo.
+
+    Returns:
+        Instância única de LatencyTracker
+    """
+    global _shared_tracker
+    with _shared_tracker_lock:
+        if _shared_tracker is None:
+            _shared_tracker = LatencyTracker()
+        return _shared_tracker
@@ -3,36 +3,286 @@ Serviço para integração com Zello MIND LLM.
 """
 
 import json
+import threading
 import time
 import requests
-from typing import Dict, Any, Optional, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, Optional, List, Iterator, Tuple
 from config import config
+from services.http_pool import HTTPSessionPool, get_shared_session_pool
+from services.completion_cache import CompletionCache, get_shared_completion_cache, make_completion_key
+from services.rate_limiter import RateLimiter, get_shared_rate_limiter, throttle_delay
+from services.request_coalescer import MergedRequestAbandoned, RequestCoalescer, get_shared_request_coalescer
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, get_shared_circuit_breaker
+from services.latency_tracker import LatencyTracker, get_shared_latency_tracker
+from services.usage_tracker import UsageRecorder, get_shared_usage_recorder
+from services.text_chunker import estimate_tokens
+from prompts.token_budget import check_prompt
+
+
+# Contrato do endpoint de chat da Zello MIND (compartilhado com o cliente assíncrono)
+CHAT_COMPLETIONS_PATH = "/api/v1/chat/completions"
+DEFAULT_CHAT_MODEL = "gpt-4o-mini"
+DEFAULT_MAX_TOKENS = 2000
+DEFAULT_TEMPERATURE = 0.7
+MAX_RETRIES = 3
+CONNECT_TIMEOUT_SECONDS = 30
+
+# Exceções que indicam backend indisponível (contam para o circuit breaker)
+BACKEND_FAILURES = (
+    requests.exceptions.Timeout,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError
+)
+
+
+def build_chat_headers(api_key: str) -> Dict[str, str]:
+    """
+    Monta os cabeçalhos de autenticação da Zello MIND.
+    
+    Args:
+        api_key: Chave de API da Zello
+        
+    Returns:
+        Dicionário de cabeçalhos HTTP
+    """
+    return {
+        "zello_mind_key": api_key,
+        "Content-Type": "application/json"
+    }
+
+
+def build_chat_payload(
+    messages: List[Dict[str, str]],
+    model: str = DEFAULT_CHAT_MODEL,
+    temperature: float = DEFAULT_TEMPERATURE,
+    max_tokens: int = DEFAULT_MAX_TOKENS
+) -> Dict[str, Any]:
+    """
+    Monta o corpo da requisição de chat completion.
+    
+    Args:
+        messages: Lista de mensagens no formato [{"role": "user", "content": "texto"}]
+        model: Modelo a ser usado
+        temperature: Temperatura de amostragem
+        max_tokens: Limite de tokens da resposta
+        
+    Returns:
+        Payload JSON da requisição
+    """
+    return {
+        "messages": messages,
+        "model": model,
+        "max_tokens": max_tokens,
+        "temperature": temperature
+    }
+
+
+def extract_chat_content(data: Dict[str, Any]) -> str:
+    """
+    Extrai o texto da resposta de chat completion.
+    
+    Args:
+        data: JSON retornado pela API
+        
+    Returns:
+        Conteúdo da primeira escolha (vazio se ausente)
+    """
+    return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+
+def extract_usage(data: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """
+    Extrai a contagem de tokens do bloco `usage` da resposta.
+    
+    Args:
+        data: JSON retornado pela API (resposta completa ou trecho de stream)
+        
+    Returns:
+        Tupla (prompt_tokens, completion_tokens), ou None se a API não informou
+    """
+    usage = data.get("usage") if isinstance(data, dict) else None
+    if not usage:
+        return None
+    try:
+        return int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_stream_usage(line: str) -> Optional[Tuple[int, int]]:
+    """
+    Extrai o bloco `usage` de uma linha SSE (enviado por alguns servidores no último trecho).
+    
+    Args:
+        line: Linha recebida do stream
+        
+    Returns:
+        Tupla (prompt_tokens, completion_tokens), ou None se a linha não traz usage
+    """
+    line = (line or "").strip()
+    if not line.startswith("data:") or '"usage"' not in line:
+        return None
+    try:
+        return extract_usage(json.loads(line[len("data:"):].strip()))
+    except ValueError:
+        return None
+
+
+def resolve_usage(
+    payload: Dict[str, Any],
+    content: str,
+    usage: Optional[Tuple[int, int]]
+) -> Tuple[int, int, bool]:
+    """
+    Determina os tokens de uma chamada, estimando-os se a API não os informou.
+    
+    Args:
+        payload: Corpo da requisição
+        content: Texto da resposta
+        usage: Tokens informados pela API (ou None)
+        
+    Returns:
+        Tupla (prompt_tokens, completion_tokens, estimado)
+    """
+    if usage is not None:
+        return usage[0], usage[1], False
+    prompt_text = "".join(message.get("content") or "" for message in payload.get("messages", []))
+    return estimate_tokens(prompt_text), estimate_tokens(content), True
+
+
+def extract_stream_delta(line: str) -> Optional[str]:
+    """
+    Extrai o trecho de texto de uma linha SSE de chat completion em streaming.
+    
+    Args:
+        line: Linha recebida (ex.: 'data: {"choices": [{"delta": {"content": "..."}}]}')
+        
+    Returns:
+        Trecho de texto, ou None para linhas sem conteúdo (comentários, [DONE], papéis)
+    """
+    line = (line or "").strip()
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        chunk = json.loads(data)
+    except ValueError:
+        return None
+    choice = (chunk.get("choices") or [{}])[0]
+    delta = choice.get("delta") or choice.get("message") or {}
+    return delta.get("content") or None
+
+
+def is_event_stream(content_type: str) -> bool:
+    """Indica se a resposta HTTP é um stream SSE (e não um JSON completo)."""
+    return "text/event-stream" in (content_type or "").lower()
+
+
+def is_server_failure(status_code: int) -> bool:
+    """Indica se o status HTTP representa falha do backend (5xx), para o circuit breaker."""
+    return status_code >= 500
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    """
+    Retorna o pool de threads usado pelas requisições hedged do cliente síncrono.
+    
+    Returns:
+        Executor compartilhado pelo processo
+    """
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=max(config.LLM_MAX_IN_FLIGHT * 2, 4),
+                thread_name_prefix="llm-hedge"
+            )
+        return _hedge_executor
+
+
+def get_zello_base_url() -> str:
+    """
+    Retorna a URL base da Zello MIND sem barra final.
+    
+    Raises:
+        Exception: Se ZELLO_BASE_URL não estiver configurado
+    """
+    base_url = (config.ZELLO_BASE_URL or "").rstrip("/")
+    if not base_url:
+        raise Exception("ZELLO_BASE_URL não configurado")
+    return base_url
 
 
 class LLMService:
     """Serviço para comunicação com Zello MIND LLM."""
     
-    def __init__(self, zello_api_key: str = None):
+    def __init__(
+        self,
+        zello_api_key: str = None,
+        session_pool: HTTPSessionPool = None,
+        cache: CompletionCache = None,
+        rate_limiter: RateLimiter = None,
+        coalescer: RequestCoalescer = None,
+        circuit_breaker: CircuitBreaker = None,
+        latency_tracker: LatencyTracker = None,
+        usage_recorder: UsageRecorder = None
+    ):
         """
         Inicializa o serviço de LLM.
         
         Args:
             zello_api_key: Chave de API da Zello (opcional, usa config se não fornecida)
+            session_pool: Pool de sessões HTTP (opcional, usa o pool compartilhado do processo)
+            cache: Cache de completions (opcional, usa o cache compartilhado do processo)
+            rate_limiter: Limitador de taxa (opcional, usa o limitador compartilhado do processo)
+            coalescer: Agrupador de requisições idênticas (opcional, usa o do processo)
+            circuit_breaker: Circuit breaker da Zello (opcional, usa o do processo)
+            latency_tracker: Rastreador de latência para timeouts adaptativos (opcional, usa o do processo)
+            usage_recorder: Contabilizador de tokens por job/colaborador (opcional, usa o do processo)
         """
         self.zello_api_key = zello_api_key or config.ZELLO_API_KEY
+        self.session_pool = session_pool or get_shared_session_pool()
+        self.cache = cache or get_shared_completion_cache()
+        self.rate_limiter = rate_limiter or get_shared_rate_limiter()
+        self.coalescer = coalescer or get_shared_request_coalescer()
+        self.circuit_breaker = circuit_breaker or get_shared_circuit_breaker()
+        self.latency_tracker = latency_tracker or get_shared_latency_tracker()
+        self.usage_recorder = usage_recorder or get_shared_usage_recorder()
     
-    def get_completion(self, provider: str, messages: List[Dict[str, str]]) -> str:
+    def get_completion(
+        self,
+        provider: str,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_CHAT_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        use_cache: bool = True,
+        prompt_class: str = None
+    ) -> str:
         """
         Obtém uma resposta de completão da Zello MIND LLM.
         
         Args:
             provider: Provedor da LLM (apenas 'zello' é suportado)
             messages: Lista de mensagens no formato [{"role": "user", "content": "texto"}]
+            model: Modelo a ser usado
+            temperature: Temperatura de amostragem
+            max_tokens: Limite de tokens da resposta
+            use_cache: Se False, ignora o cache e força uma nova amostra (o resultado ainda é armazenado)
+            prompt_class: Classe do prompt (etapa do pipeline), usada nos timeouts adaptativos
             
         Returns:
             Conteúdo da resposta da IA
             
         Raises:
+            PromptTooLargeError: Se o prompt exceder o orçamento do modelo (sem chamar a API)
             Exception: Se houver erro na comunicação com a API
         """
         # Apenas Zello MIND é suportado - forçar provider para 'zello' se não for
@@ -43,56 +293,390 @@ class LLMService:
             if not self.zello_api_key:
                 raise Exception("Zello API key não configurada")
             
+            # Prompt acima do orçamento do modelo falha aqui, sem chamada nem retries
+            check_prompt(messages, model, max_tokens, prompt_class)
+            
+            cache_key = make_completion_key(messages, model, temperature, max_tokens)
+            if use_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    print("Resposta da Zello MIND obtida do cache de completions")
+                    return cached
+            else:
+                self.cache.record_bypass()
+            
+            payload = build_chat_payload(messages, model, temperature, max_tokens)
+            latency_key = self.latency_tracker.bucket_key(prompt_class, model, messages)
+            
+            def request() -> str:
+                content = self._request_completion(payload, latency_key, prompt_class)
+                self.cache.set(cache_key, content)
+                return content
+            
+            # Chamadas idênticas simultâneas aguardam a mesma requisição
+            if config.LLM_MERGE_IN_FLIGHT:
+                return self.coalescer.run(cache_key, request)
+            return request()
+        
+        else:
+            raise Exception(f"Provedor não suportado: {provider}. Apenas 'zello' é suportado.")
+    
+    def stream_completion(
+        self,
+        provider: str,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_CHAT_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        use_cache: bool = True,
+        prompt_class: str = None
+    ) -> Iterator[str]:
+        """
+        Obtém uma completion em streaming, produzindo trechos de texto à medida que chegam.
+        
+        Aceita os mesmos argumentos de get_completion. Uma resposta em cache é
+        produzida em um único trecho; a resposta completa é armazenada no cache ao final.
+        
+        Args:
+            provider: Provedor da LLM (apenas 'zello' é suportado)
+            messages: Lista de mensagens no formato [{"role": "user", "content": "texto"}]
+            model: Modelo a ser usado
+            temperature: Temperatura de amostragem
+            max_tokens: Limite de tokens da resposta
+            use_cache: Se False, ignora o cache e força uma nova amostra
+            prompt_class: Classe do prompt (etapa do pipeline), usada nos timeouts adaptativos
+            
+        Yields:
+            Trechos de texto da resposta
+            
+        Raises:
+            PromptTooLargeError: Se o prompt exceder o orçamento do modelo (sem chamar a API)
+            Exception: Se houver erro na comunicação com a API
+        """
+        if provider != 'zello':
+            provider = 'zello'
+        if not self.zello_api_key:
+            raise Exception("Zello API key não configurada")
+        
+        # Prompt acima do orçamento do modelo falha aqui, sem chamada nem retries
+        check_prompt(messages, model, max_tokens, prompt_class)
+        
+        cache_key = make_completion_key(messages, model, temperature, max_tokens)
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        else:
+            self.cache.record_bypass()
+        
+        leader, future = True, None
+        if config.LLM_MERGE_IN_FLIGHT:
+            leader, future = self.coalescer.claim(cache_key)
+        if not leader:
+            # Stream idêntico já em andamento: entrega a resposta completa em um trecho
+            try:
+                content = self.coalescer.wait(future)
+            except MergedRequestAbandoned:
+                yield from self.stream_completion(provider, messages, model, temperature, max_tokens, use_cache, prompt_class)
+                return
+            yield content
+            return
+        
+        payload = build_chat_payload(messages, model, temperature, max_tokens)
+        payload["stream"] = True
+        parts = []
+        latency_key = self.latency_tracker.bucket_key(prompt_class, model, messages)
+        try:
+            for chunk in self._request_stream(payload, latency_key, prompt_class):
+                parts.append(chunk)
+                yield chunk
+        except BaseException as e:
+            if future is not None:
+                self.coalescer.resolve(cache_key, future, error=e)
+            raise
+        content = "".join(parts)
+        self.cache.set(cache_key, content)
+        if future is not None:
+            self.coalescer.resolve(cache_key, future, result=content)
+    
+    def _request_stream(
+        self,
+        payload: Dict[str, Any],
+        latency_key: str = None,
+        prompt_class: str = None
+    ) -> Iterator[str]:
+        """
+        Envia a requisição em streaming; só há nova tentativa se nenhum trecho foi recebido.
+        
+        Se o servidor responder com JSON completo (sem suporte a streaming), o
+        conteúdo é produzido em um único trecho. Streams não usam hedge: o
+        usuário já acompanha a resposta enquanto ela é gerada.
+        
+        Args:
+            payload: Corpo da requisição com "stream": True
+            latency_key: Classe de prompt do LatencyTracker (opcional)
+            prompt_class: Etapa do pipeline, para a contabilização de tokens (opcional)
+            
+        Yields:
+            Trechos de texto da resposta
+        """
+        headers = build_chat_headers(self.zello_api_key)
+        base_url = get_zello_base_url()
+        session = self.session_pool.get_session(base_url)
+        latency_key = latency_key or self.latency_tracker.bucket_key(None, payload.get("model"), payload["messages"])
+        # O read timeout vale entre trechos; o p99 da resposta inteira é um limite seguro
+        timeout = (CONNECT_TIMEOUT_SECONDS, self.latency_tracker.read_timeout(latency_key))
+        
+        last_err = None
+        for attempt in range(MAX_RETRIES):
+            emitted = False
+            started = time.monotonic()
             try:
-                headers = {
-                    "zello_mind_key": self.zello_api_key,
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "messages": messages,
-                    "model": "gpt-4o-mini",
-                    "max_tokens": 2000,
-                    "temperature": 0.7
-                }
-
-                base_url = (config.ZELLO_BASE_URL or "").rstrip("/")
-                if not base_url:
-                    raise Exception("ZELLO_BASE_URL não configurado")
-
-                # retries com backoff exponencial e timeout maior
-                last_err = None
-                for attempt in range(3):
-                    try:
-                        print(f"Tentando conectar com Zello MIND (tentativa {attempt + 1}/3)...")
-                        response = requests.post(
-                            f"{base_url}/api/v1/chat/completions",
+                # Circuito aberto: falha imediata, sem fila nem timeouts
+                with self.circuit_breaker.guard(BACKEND_FAILURES) as outcome:
+                    # A vaga no limitador fica ocupada enquanto o stream estiver aberto
+                    with self.rate_limiter.slot() as waited:
+                        print(f"Streaming com Zello MIND (tentativa {attempt + 1}/{MAX_RETRIES}, fila {waited * 1000:.0f} ms)...")
+                        with session.post(
+                            f"{base_url}{CHAT_COMPLETIONS_PATH}",
                             headers=headers,
                             json=payload,
-                            timeout=(30, 60)  # (connect timeout, read timeout) em segundos
-                        )
-                        response.raise_for_status()
-                        data = response.json()
-                        return data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                    except requests.exceptions.Timeout as e:
-                        last_err = e
-                        print(f"Timeout na tentativa {attempt + 1}: {str(e)}")
-                        if attempt < 2:  # Não dormir na última tentativa
-                            time.sleep(2 * (2 ** attempt))
-                    except requests.exceptions.RequestException as e:
-                        last_err = e
-                        print(f"Erro na tentativa {attempt + 1}: {str(e)}")
-                        if attempt < 2:
-                            time.sleep(2 * (2 ** attempt))
-                raise Exception(f"Erro na requisição Zello após 3 retries: {str(last_err)}. Verifique a conectividade para {config.ZELLO_BASE_URL}.")
-                
+                            timeout=timeout,
+                            stream=True
+                        ) as response:
+                            delay = throttle_delay(response.status_code, response.headers, attempt)
+                            if delay is not None:
+                                # 429: a pausa vale para todas as chamadas, via limitador compartilhado
+                                self.rate_limiter.penalize(delay)
+                                last_err = Exception(f"HTTP {response.status_code} (aguardando {delay:.1f}s)")
+                                print(f"Zello MIND limitou a taxa (tentativa {attempt + 1}): aguardando {delay:.1f}s na fila")
+                                continue
+                            if is_server_failure(response.status_code):
+                                outcome.fail(f"HTTP {response.status_code}")
+                            response.raise_for_status()
+                            if not is_event_stream(response.headers.get("Content-Type")):
+                                data = response.json()
+                                content = extract_chat_content(data)
+                                elapsed = time.monotonic() - started
+                                self.latency_tracker.record(latency_key, elapsed)
+                                self._record_usage(payload, prompt_class, content, extract_usage(data), elapsed, streamed=False)
+                                if content:
+                                    yield content
+                                return
+                            parts = []
+                            usage = None
+                            for raw_line in response.iter_lines():
+                                line = raw_line.decode("utf-8", errors="replace")
+                                chunk = extract_stream_delta(line)
+                                if chunk:
+                                    emitted = True
+                                    parts.append(chunk)
+                                    yield chunk
+                                usage = extract_stream_usage(line) or usage
+                            elapsed = time.monotonic() - started
+                            self.latency_tracker.record(latency_key, elapsed)
+                            self._record_usage(payload, prompt_class, "".join(parts), usage, elapsed, streamed=True)
+                            return
             except requests.exceptions.RequestException as e:
-                raise Exception(f"Erro na requisição Zello: {str(e)}. Verifique a conectividade e DNS para {config.ZELLO_BASE_URL}.")
-            except Exception as e:
-                raise Exception(f"Erro ao processar resposta Zello: {str(e)}")
+                if emitted:
+                    raise Exception(f"Streaming da Zello interrompido: {str(e)}")
+                last_err = e
+                print(f"Erro no streaming (tentativa {attempt + 1}): {str(e)}")
+                if attempt < MAX_RETRIES - 1:
+                    time.sleep(2 * (2 ** attempt))
+        raise Exception(f"Erro na requisição Zello após {MAX_RETRIES} retries: {str(last_err)}. Verifique a conectividade para {config.ZELLO_BASE_URL}.")
+    
+    def _request_completion(
+        self,
+        payload: Dict[str, Any],
+        latency_key: str = None,
+        prompt_class: str = None
+    ) -> str:
+        """
+        Envia a requisição de chat completion com retries.
+        
+        Args:
+            payload: Corpo da requisição (ver build_chat_payload)
+            latency_key: Classe de prompt do LatencyTracker (opcional, derivada do payload)
+            prompt_class: Etapa do pipeline, para a contabilização de tokens (opcional)
+            
+        Returns:
+            Conteúdo da resposta da IA
+            
+        Raises:
+            Exception: Se todas as tentativas falharem
+        """
+        try:
+            headers = build_chat_headers(self.zello_api_key)
+            base_url = get_zello_base_url()
+            url = f"{base_url}{CHAT_COMPLETIONS_PATH}"
+            latency_key = latency_key or self.latency_tracker.bucket_key(None, payload.get("model"), payload["messages"])
+
+            # Sessão keep-alive compartilhada: reaproveita conexões entre chamadas e retries
+            session = self.session_pool.get_session(base_url)
+
+            # retries com backoff exponencial; timeout de leitura adaptado à classe do prompt
+            last_err = None
+            for attempt in range(MAX_RETRIES):
+                try:
+                    started = time.monotonic()
+                    response = self._post_hedged(session, url, headers, payload, latency_key, attempt)
+                    delay = throttle_delay(response.status_code, response.headers, attempt)
+                    if delay is not None:
+                        # 429: a pausa vale para todas as chamadas, via limitador compartilhado
+                        self.rate_limiter.penalize(delay)
+                        last_err = Exception(f"HTTP {response.status_code} (aguardando {delay:.1f}s)")
+                        print(f"Zello MIND limitou a taxa (tentativa {attempt + 1}): aguardando {delay:.1f}s na fila")
+                        continue
+                    response.raise_for_status()
+                    data = response.json()
+                    content = extract_chat_content(data)
+                    self._record_usage(payload, prompt_class, content, extract_usage(data), time.monotonic() - started)
+                    return content
+                except requests.exceptions.Timeout as e:
+                    last_err = e
+                    print(f"Timeout na tentativa {attempt + 1}: {str(e)}")
+                    if attempt < MAX_RETRIES - 1:  # Não dormir na última tentativa
+                        time.sleep(2 * (2 ** attempt))
+                except requests.exceptions.RequestException as e:
+                    last_err = e
+                    print(f"Erro na tentativa {attempt + 1}: {str(e)}")
+                    if attempt < MAX_RETRIES - 1:
+                        time.sleep(2 * (2 ** attempt))
+            raise Exception(f"Erro na requisição Zello após {MAX_RETRIES} retries: {str(last_err)}. Verifique a conectividade para {config.ZELLO_BASE_URL}.")
+            
+        except CircuitOpenError:
+            raise
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Erro na requisição Zello: {str(e)}. Verifique a conectividade e DNS para {config.ZELLO_BASE_URL}.")
+        except Exception as e:
+            raise Exception(f"Erro ao processar resposta Zello: {str(e)}")
+    
+    def _record_usage(
+        self,
+        payload: Dict[str, Any],
+        prompt_class: Optional[str],
+        content: str,
+        usage: Optional[Tuple[int, int]],
+        latency_seconds: float,
+        streamed: bool = False
+    ) -> None:
+        """Registra os tokens de uma resposta da API no job/colaborador do contexto atual."""
+        prompt_tokens, completion_tokens, estimated = resolve_usage(payload, content, usage)
+        self.usage_recorder.record(
+            prompt_class,
+            payload.get("model"),
+            prompt_tokens,
+            completion_tokens,
+            latency_seconds,
+            streamed=streamed,
+            estimated=estimated
+        )
+    
+    def _post_once(
+        self,
+        session: requests.Session,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        timeout: Tuple[float, float],
+        attempt: int,
+        label: str = ""
+    ) -> requests.Response:
+        """
+        Envia um POST protegido pelo circuit breaker e pelo limitador de taxa.
         
+        Args:
+            session: Sessão HTTP do pool
+            url: URL do endpoint de chat
+            headers: Cabeçalhos da requisição
+            payload: Corpo da requisição
+            timeout: (connect, read) em segundos
+            attempt: Índice da tentativa (para logs e cálculo de backoff)
+            label: Sufixo para os logs (ex.: ' hedge')
+            
+        Returns:
+            Resposta HTTP (status não verificado)
+        """
+        # Circuito aberto: falha imediata, sem fila nem timeouts
+        with self.circuit_breaker.guard(BACKEND_FAILURES) as outcome:
+            # Fila FIFO compartilhada: respeita taxa e limite de requisições em andamento
+            with self.rate_limiter.slot() as waited:
+                print(f"Tentando conectar com Zello MIND (tentativa {attempt + 1}/{MAX_RETRIES}{label}, fila {waited * 1000:.0f} ms, timeout {timeout[1]:.0f}s)...")
+                response = session.post(url, headers=headers, json=payload, timeout=timeout)
+            if is_server_failure(response.status_code) and throttle_delay(response.status_code, response.headers, attempt) is None:
+                outcome.fail(f"HTTP {response.status_code}")
+        return response
+    
+    def _post_hedged(
+        self,
+        session: requests.Session,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        latency_key: str,
+        attempt: int
+    ) -> requests.Response:
+        """
+        Envia a requisição e, se ela passar do p95 da classe, uma segunda em paralelo.
+        
+        Vence a primeira resposta bem-sucedida. O hedge só é enviado dentro do
+        orçamento configurado (LLM_HEDGE_BUDGET). A requisição perdedora não
+        pode ser interrompida no cliente síncrono: ela termina em segundo plano
+        e seu resultado é descartado.
+        
+        Returns:
+            Resposta HTTP vencedora
+        """
+        timeout = (CONNECT_TIMEOUT_SECONDS, self.latency_tracker.read_timeout(latency_key))
+        hedge_after = self.latency_tracker.hedge_delay(latency_key)
+        self.latency_tracker.record_request()
+        started = time.monotonic()
+        
+        if hedge_after is None:
+            response = self._post_once(session, url, headers, payload, timeout, attempt)
         else:
-            raise Exception(f"Provedor não suportado: {provider}. Apenas 'zello' é suportado.")
+            executor = get_hedge_executor()
+            primary = executor.submit(self._post_once, session, url, headers, payload, timeout, attempt)
+            done, _ = wait([primary], timeout=hedge_after)
+            if done or not self.latency_tracker.try_hedge():
+                response = primary.result()
+            else:
+                print(f"Resposta acima do p95 ({hedge_after * 1000:.0f} ms): enviando requisição hedge")
+                hedge = executor.submit(self._post_once, session, url, headers, payload, timeout, attempt, " hedge")
+                response = self._first_success({primary, hedge}, hedge)
+        
+        if response.ok:
+            self.latency_tracker.record(latency_key, time.monotonic() - started)
+        return response
+    
+    def _first_success(self, pending: set, hedge) -> requests.Response:
+        """
+        Aguarda as requisições concorrentes e retorna a primeira resposta 2xx.
+        
+        Sem nenhuma 2xx, retorna a última resposta recebida ou repassa o primeiro erro.
+        """
+        first_error = None
+        last_response = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    first_error = first_error or e
+                    continue
+                if response.ok:
+                    if future is hedge:
+                        self.latency_tracker.record_hedge_win()
+                    for other in pending:
+                        other.cancel()
+                    return response
+                last_response = response
+        if last_response is not None:
+            return last_response
+        raise first_error
     
     def process_with_zello(self, prompt: str, model: str = "zello-mind") -> Dict[str, Any]:
         """
@@ -175,6 +759,69 @@ class LLMService:
                 "model": model
             }
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas de reuso do pool de conexões HTTP.
+        
+        Returns:
+            Dicionário com conexões novas e reutilizadas
+        """
+        return self.session_pool.get_stats()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores de acertos/falhas do cache de completions.
+        
+        Returns:
+            Dicionário com estatísticas do cache
+        """
+        return self.cache.get_stats()
+    
+    def get_rate_limiter_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas do limitador de taxa (espera na fila e latência da API).
+        
+        Returns:
+            Dicionário com estatísticas do limitador
+        """
+        return self.rate_limiter.get_stats()
+    
+    def get_coalescer_stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores de requisições idênticas agrupadas enquanto em andamento.
+        
+        Returns:
+            Dicionário com estatísticas do agrupamento
+        """
+        return self.coalescer.get_stats()
+    
+    def get_circuit_stats(self) -> Dict[str, Any]:
+        """
+        Retorna o estado do circuit breaker da Zello MIND.
+        
+        Returns:
+            Dicionário com estado (closed/open/half_open) e contadores
+        """
+        return self.circuit_breaker.get_stats()
+    
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """
+        Retorna percentis de latência por classe de prompt e uso do orçamento de hedge.
+        
+        Returns:
+            Dicionário com estatísticas de latência
+        """
+        return self.latency_tracker.get_stats()
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        Retorna os totais de tokens consumidos desde o início do processo.
+        
+        Returns:
+            Dicionário com chamadas, tokens e latência por etapa
+        """
+        return self.usage_recorder.get_stats()
+    
     def get_available_models(self) -> Dict[str, List[str]]:
         """
         Retorna os modelos disponíveis para Zello MIND.
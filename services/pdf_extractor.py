@@ -0,0 +1,182 @@
+"""
+Extração de texto de PDFs por faixas de páginas em paralelo.
+
+A extração roda no pool de CPU (services/cpu_pool.py): a extração do PyPDF2
+é Python puro e, na thread da requisição, seguraria o GIL.
+
+A primeira tarefa extrai as PDF_PARALLEL_MIN_PAGES primeiras páginas e conta
+as páginas do arquivo, de modo que PDFs pequenos são resolvidos em uma única
+tarefa. O restante é dividido em faixas de pelo menos PDF_PAGES_PER_TASK
+páginas, com até PDF_EXTRACTION_WORKERS faixas em andamento por documento.
+As páginas são produzidas em ordem, à medida que cada faixa fica pronta
+(iter_pdf_pages), e o texto final é montado com um único join.
+
+Com um orçamento de tokens (PDF_EXTRACTION_MAX_TOKENS), a extração para na
+página que atinge o orçamento e as faixas que ainda não começaram são
+canceladas.
+"""
+
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from config import config
+from prompts.token_budget import estimate_tokens
+from services.cpu_pool import get_shared_cpu_pool
+
+# Limite de faixas por documento e processo (cada faixa reabre o PDF)
+RANGES_PER_WORKER = 2
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """
+    Extrai o texto de uma faixa de páginas (executada nos processos do pool).
+
+    Args:
+        file_path: Caminho do PDF
+        start: Primeira página (índice 0)
+        end: Página final (exclusiva)
+
+    Returns:
+        Texto de cada página da faixa, em ordem
+    """
+    import PyPDF2
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [(reader.pages[index].extract_text() or "") for index in range(start, min(end, len(reader.pages)))]
+
+
+def extract_pdf_pages(file_path: str, limit: int = None, max_tokens: int = None) -> Tuple[List[str], int]:
+    """
+    Extrai as primeiras páginas de um PDF em sequência (executada nos processos do pool).
+
+    Args:
+        file_path: Caminho do PDF
+        limit: Máximo de páginas (opcional, todas)
+        max_tokens: Para na página que atingir esse número de tokens estimados (opcional)
+
+    Returns:
+        Tupla (texto de cada página extraída, número de páginas do arquivo)
+    """
+    import PyPDF2
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        pages = len(reader.pages)
+        texts, _ = _collect_pages((page.extract_text() or "" for page in islice(reader.pages, limit or pages)), max_tokens=max_tokens)
+    return texts, pages
+
+
+def page_ranges(start: int, end: int, per_task: int, workers: int = 1) -> List[Tuple[int, int]]:
+    """
+    Divide as páginas em faixas consecutivas.
+
+    Cada faixa reabre e reinterpreta o PDF no processo que a extrai, então
+    documentos grandes usam faixas maiores (no máximo ~2 por faixa simultânea).
+
+    Args:
+        start: Primeira página (índice 0)
+        end: Página final (exclusiva)
+        per_task: Páginas mínimas por faixa
+        workers: Faixas simultâneas
+
+    Returns:
+        Lista de (início, fim exclusivo)
+    """
+    per_task = max(per_task, -(-(end - start) // (max(workers, 1) * RANGES_PER_WORKER)), 1)
+    return [(first, min(first + per_task, end)) for first in range(start, end, per_task)]
+
+
+def iter_pdf_pages(file_path: str, start: int, end: int) -> Iterator[str]:
+    """
+    Produz o texto das páginas em ordem, extraindo as faixas em paralelo no pool de CPU.
+
+    Interromper a iteração (ex.: orçamento atingido) cancela as faixas que
+    ainda não começaram. O documento já foi aceito pelo pool na primeira
+    tarefa (extract_pdf_pages), então as faixas não passam pelo limite da
+    fila: um PDF grande nunca é recusado no meio da extração.
+
+    Args:
+        file_path: Caminho do PDF
+        start: Primeira página (índice 0)
+        end: Página final (exclusiva)
+
+    Yields:
+        Texto de cada página
+    """
+    pool = get_shared_cpu_pool()
+    workers = max(config.PDF_EXTRACTION_WORKERS, 1)
+    ranges = iter(page_ranges(start, end, config.PDF_PAGES_PER_TASK, workers))
+    pending = deque()
+    try:
+        # Janela de faixas em andamento: interromper a iteração não deixa o arquivo inteiro na fila
+        for first, last in islice(ranges, workers):
+            pending.append(pool.submit("pdf", extract_page_range, file_path, first, last, admitted=True))
+        while pending:
+            texts = pending.popleft().result()[0]
+            for first, last in islice(ranges, 1):
+                pending.append(pool.submit("pdf", extract_page_range, file_path, first, last, admitted=True))
+            yield from texts
+    except BrokenProcessPool:
+        pool.reset()
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def extract_pdf_text(file_path: str, max_tokens: int = None) -> Dict[str, Any]:
+    """
+    Extrai o texto de um PDF.
+
+    Args:
+        file_path: Caminho do PDF
+        max_tokens: Para a extração quando o texto atingir esse número de
+            tokens estimados (opcional; None ou 0 extrai tudo)
+
+    Returns:
+        Dicionário com o texto, o número de páginas do arquivo e de páginas
+        extraídas, se o texto foi truncado pelo orçamento e se usou faixas em paralelo
+
+    Raises:
+        CpuPoolBusyError: Se a fila do pool de CPU estiver cheia (só na
+            primeira tarefa, antes de qualquer página ser extraída)
+    """
+    pool = get_shared_cpu_pool()
+    parallel = pool.uses_pool("pdf") and config.PDF_EXTRACTION_WORKERS > 1
+    texts, pages = pool.run("pdf", extract_pdf_pages, file_path, config.PDF_PARALLEL_MIN_PAGES if parallel else None, max_tokens)
+    exhausted = bool(max_tokens) and sum(estimate_tokens(text) for text in texts) >= max_tokens
+    parallel = parallel and len(texts) < pages and not exhausted
+    if parallel:
+        try:
+            texts, _ = _collect_pages(iter_pdf_pages(file_path, len(texts), pages), texts, max_tokens)
+        except BrokenProcessPool as e:
+            print(f"Aviso: pool de CPU indisponível ({str(e)}); extraindo o restante do PDF na thread atual")
+            texts, _ = _collect_pages(iter(extract_page_range(file_path, len(texts), pages)), texts, max_tokens)
+    return {
+        "success": True,
+        "text": "\n".join(texts).strip(),
+        "method": "pdf_extraction",
+        "pages": pages,
+        "pages_extracted": len(texts),
+        "truncated": len(texts) < pages,
+        "parallel": parallel
+    }
+
+
+def _collect_pages(page_texts: Iterator[str], texts: Optional[List[str]] = None, max_tokens: int = None) -> Tuple[List[str], bool]:
+    """Acrescenta páginas à lista até o fim ou até o orçamento de tokens (retorna também se o orçamento foi atingido)."""
+    texts = [] if texts is None else texts
+    tokens = sum(estimate_tokens(text) for text in texts) if max_tokens else 0
+    try:
+        for text in page_texts:
+            texts.append(text)
+            if max_tokens:
+                tokens += estimate_tokens(text)
+                if tokens >= max_tokens:
+                    return texts, True
+        return texts, False
+    finally:
+        close = getattr(page_texts, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,324 @@
+"""
+Limitador de taxa compartilhado para chamadas à Zello MIND.
+
+Combina um token bucket (requisições por segundo, com rajada) e um limite de
+requisições em andamento. Quem chega espera em uma fila FIFO: as vagas são
+concedidas na ordem de chegada, tanto para threads (Flask, monitor) quanto para
+corrotinas (processamento em lote).
+
+Quando a API responde 429/503 com `Retry-After`, o limitador bloqueia novas
+concessões até o prazo informado, em vez de cada chamada dormir por conta própria.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+from config import config
+
+
+class RateLimitTimeoutError(Exception):
+    """Tempo máximo de espera na fila do limitador foi excedido."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Converte o cabeçalho Retry-After em segundos.
+
+    Args:
+        value: Valor do cabeçalho (segundos ou data HTTP)
+
+    Returns:
+        Segundos a aguardar, ou None se ausente/inválido
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def throttle_delay(status_code: int, headers: Dict[str, str], attempt: int) -> Optional[float]:
+    """
+    Calcula a pausa exigida por uma resposta de limitação de taxa.
+
+    Args:
+        status_code: Status HTTP da resposta
+        headers: Cabeçalhos da resposta
+        attempt: Índice da tentativa (0, 1, ...), usado quando não há Retry-After
+
+    Returns:
+        Segundos a aguardar para 429 (ou 503 com Retry-After), ou None para as demais
+        respostas. Um 503 sem Retry-After é tratado como indisponibilidade do backend.
+    """
+    if status_code not in (429, 503):
+        return None
+    retry_after = parse_retry_after(headers.get("Retry-After"))
+    if retry_after is None and status_code == 503:
+        return None
+    return retry_after if retry_after is not None else 2 * (2 ** attempt)
+
+
+class RateLimiter:
+    """Token bucket com limite de concorrência e fila FIFO justa."""
+
+    def __init__(
+        self,
+        rate_per_second: float = None,
+        burst: int = None,
+        max_in_flight: int = None,
+        queue_timeout: float = None
+    ):
+        """
+        Inicializa o limitador.
+
+        Args:
+            rate_per_second: Requisições liberadas por segundo (opcional, usa config; 0 desativa)
+            burst: Capacidade do bucket (opcional, usa config)
+            max_in_flight: Máximo de requisições em andamento (opcional, usa config; 0 desativa)
+            queue_timeout: Espera máxima na fila em segundos (opcional, usa config)
+        """
+        self.rate_per_second = rate_per_second if rate_per_second is not None else config.LLM_RATE_LIMIT_PER_SECOND
+        self.burst = max(burst if burst is not None else config.LLM_RATE_LIMIT_BURST, 1)
+        self.max_in_flight = max_in_flight if max_in_flight is not None else config.LLM_MAX_IN_FLIGHT
+        self.queue_timeout = queue_timeout if queue_timeout is not None else config.LLM_QUEUE_TIMEOUT_SECONDS
+
+        self._condition = threading.Condition()
+        self._tickets = itertools.count()
+        self._queue: deque = deque()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._stats = {
+            "granted": 0,
+            "timeouts": 0,
+            "throttled": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "upstream_total": 0.0,
+            "upstream_max": 0.0,
+            "completed": 0
+        }
+
+    def _refill(self, now: float) -> None:
+        if self.rate_per_second > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_per_second)
+        self._last_refill = now
+
+    def _try_grant(self, ticket: int) -> Optional[float]:
+        """
+        Tenta conceder a vaga ao ticket (chamar com o lock adquirido).
+
+        Returns:
+            0 se concedida; senão, segundos sugeridos até a próxima verificação
+            (None quando depende da liberação de uma vaga em andamento)
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if not self._queue or self._queue[0] != ticket:
+            return None
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self.max_in_flight > 0 and self._in_flight >= self.max_in_flight:
+            return None
+        if self.rate_per_second > 0 and self._tokens < 1:
+            return (1 - self._tokens) / self.rate_per_second
+
+        if self.rate_per_second > 0:
+            self._tokens -= 1
+        self._in_flight += 1
+        self._queue.popleft()
+        self._condition.notify_all()
+        return 0
+
+    def _record_wait(self, waited: float) -> None:
+        self._stats["granted"] += 1
+        self._stats["queue_wait_total"] += waited
+        self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], waited)
+
+    def _abandon(self, ticket: int) -> None:
+        """Remove um ticket que desistiu da fila (timeout ou cancelamento)."""
+        try:
+            self._queue.remove(ticket)
+        except ValueError:
+            pass
+        self._condition.notify_all()
+
+    def acquire(self) -> float:
+        """
+        Aguarda uma vaga (bloqueante).
+
+        Returns:
+            Tempo de espera na fila, em segundos
+
+        Raises:
+            RateLimitTimeoutError: Se a espera exceder queue_timeout
+        """
+        start = time.monotonic()
+        deadline = start + self.queue_timeout if self.queue_timeout else None
+        with self._condition:
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+            while True:
+                hint = self._try_grant(ticket)
+                if hint == 0:
+                    waited = time.monotonic() - start
+                    self._record_wait(waited)
+                    return waited
+                remaining = deadline - time.monotonic() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    self._abandon(ticket)
+                    self._stats["timeouts"] += 1
+                    raise RateLimitTimeoutError(
+                        f"Fila de requisições à Zello MIND excedeu {self.queue_timeout:.0f}s"
+                    )
+                timeout = hint
+                if remaining is not None:
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                self._condition.wait(timeout)
+
+    async def aacquire(self) -> float:
+        """
+        Versão assíncrona de acquire: aguarda sem bloquear o event loop.
+
+        Returns:
+            Tempo de espera na fila, em segundos
+        """
+        start = time.monotonic()
+        deadline = start + self.queue_timeout if self.queue_timeout else None
+        with self._condition:
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+        try:
+            while True:
+                with self._condition:
+                    hint = self._try_grant(ticket)
+                    if hint == 0:
+                        waited = time.monotonic() - start
+                        self._record_wait(waited)
+                        return waited
+                    if deadline and time.monotonic() >= deadline:
+                        self._abandon(ticket)
+                        self._stats["timeouts"] += 1
+                        raise RateLimitTimeoutError(
+                            f"Fila de requisições à Zello MIND excedeu {self.queue_timeout:.0f}s"
+                        )
+                # Sem notificação entre threads e loop: verifica de novo em intervalos curtos
+                await asyncio.sleep(min(hint, 0.05) if hint else 0.01)
+        except asyncio.CancelledError:
+            with self._condition:
+                self._abandon(ticket)
+            raise
+
+    def release(self, upstream_seconds: float = None) -> None:
+        """
+        Libera uma vaga em andamento.
+
+        Args:
+            upstream_seconds: Tempo gasto na chamada à API (para as estatísticas)
+        """
+        with self._condition:
+            self._in_flight = max(self._in_flight - 1, 0)
+            if upstream_seconds is not None:
+                self._stats["completed"] += 1
+                self._stats["upstream_total"] += upstream_seconds
+                self._stats["upstream_max"] = max(self._stats["upstream_max"], upstream_seconds)
+            self._condition.notify_all()
+
+    def penalize(self, retry_after: float) -> None:
+        """
+        Suspende novas concessões após um 429/503 da API.
+
+        Args:
+            retry_after: Segundos informados pelo servidor (Retry-After)
+        """
+        with self._condition:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            self._tokens = 0.0
+            self._stats["throttled"] += 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """
+        Context manager que ocupa uma vaga durante a chamada à API.
+
+        Yields:
+            Tempo de espera na fila, em segundos
+        """
+        waited = self.acquire()
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Versão assíncrona de slot."""
+        waited = await self.aacquire()
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - started)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas do limitador, separando espera na fila e latência da API.
+
+        Returns:
+            Dicionário com configuração, ocupação atual e tempos médios/máximos (ms)
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            in_flight = self._in_flight
+            queued = len(self._queue)
+            blocked_for = max(self._blocked_until - time.monotonic(), 0.0)
+        granted = stats["granted"]
+        completed = stats["completed"]
+        return {
+            "rate_per_second": self.rate_per_second,
+            "burst": self.burst,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": in_flight,
+            "queued": queued,
+            "granted": granted,
+            "timeouts": stats["timeouts"],
+            "throttled": stats["throttled"],
+            "retry_after_remaining_seconds": round(blocked_for, 3),
+            "queue_wait_avg_ms": round(stats["queue_wait_total"] / granted * 1000, 2) if granted else 0.0,
+            "queue_wait_max_ms": round(stats["queue_wait_max"] * 1000, 2),
+            "upstream_avg_ms": round(stats["upstream_total"] / completed * 1000, 2) if completed else 0.0,
+            "upstream_max_ms": round(stats["upstream_max"] * 1000, 2)
+        }
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_shared_rate_limiter() -> RateLimiter:
+    """
+    Retorna o limitador de taxa compartilhado pelo processo.
+
+    Returns:
+        Instância única de RateLimiter
+    """
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
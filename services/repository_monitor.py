@@ -4,7 +4,6 @@ Mantido temporariamente para compatibilidade até migração completa.
 """
 
 import os
-import hashlib
 import glob
 from datetime import datetime
 from typing import List, Dict, Any, Optional
@@ -13,6 +12,7 @@ from pathlib import Path
 from database import SessionLocal
 from models import TranscriptionJob, JobStatus
 from config import config
+from services.extraction_cache import file_sha256
 
 
 class RepositoryMonitor:
@@ -42,12 +42,9 @@ class RepositoryMonitor:
         Returns:
             Hash SHA-256 do arquivo
         """
-        hash_sha256 = hashlib.sha256()
         try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+            # Mesmo hash usado como chave do cache de extrações do FileService
+            return file_sha256(file_path)
         except Exception as e:
             raise Exception(f"Erro ao calcular hash do arquivo {file_path}: {str(e)}")
     
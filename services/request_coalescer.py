@@ -0,0 +1,192 @@
+"""
+Agrupamento de requisições idênticas em andamento.
+
+Enquanto uma completion para determinada chave (hash do prompt) está em curso,
+chamadas idênticas aguardam o mesmo resultado em vez de enviar outra requisição
+à Zello MIND (ex.: duplo clique em /api/process, mesma transcrição enviada por
+dois usuários). Nada é guardado após a conclusão: a reutilização de respostas
+já concluídas é papel do CompletionCache.
+
+Os resultados são entregues por `concurrent.futures.Future`, de modo que
+threads e corrotinas (em qualquer event loop) compartilham as mesmas requisições.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class MergedRequestAbandoned(Exception):
+    """A requisição original foi interrompida pelo chamador antes de concluir."""
+
+
+class RequestCoalescer:
+    """Registro thread-safe de requisições em andamento, indexadas por chave."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._stats = {
+            "leaders": 0,
+            "merged": 0,
+            "merged_failures": 0,
+            "abandoned": 0
+        }
+
+    def claim(self, key: str) -> Tuple[bool, Future]:
+        """
+        Registra interesse em uma chave.
+
+        Args:
+            key: Chave da requisição (ver make_completion_key)
+
+        Returns:
+            Tupla (é_líder, future). O líder executa a requisição e deve chamar
+            resolve(); os demais apenas aguardam o future.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats["merged"] += 1
+                return False, future
+            future = Future()
+            self._in_flight[key] = future
+            self._stats["leaders"] += 1
+            return True, future
+
+    def resolve(self, key: str, future: Future, result: Any = None, error: BaseException = None) -> None:
+        """
+        Publica o resultado do líder e remove a chave do registro.
+
+        Args:
+            key: Chave da requisição
+            future: Future devolvido por claim()
+            result: Resultado da requisição
+            error: Exceção da requisição (tem precedência sobre result)
+        """
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+            if isinstance(error, (GeneratorExit, asyncio.CancelledError, KeyboardInterrupt)):
+                self._stats["abandoned"] += 1
+                error = MergedRequestAbandoned("Requisição original interrompida")
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def wait(self, future: Future) -> Any:
+        """
+        Aguarda o resultado de uma requisição agrupada.
+
+        Args:
+            future: Future devolvido por claim() a um não-líder
+
+        Returns:
+            Resultado do líder
+
+        Raises:
+            MergedRequestAbandoned: Se o líder foi interrompido (o chamador deve refazer a requisição)
+        """
+        try:
+            return future.result()
+        except MergedRequestAbandoned:
+            raise
+        except Exception:
+            with self._lock:
+                self._stats["merged_failures"] += 1
+            raise
+
+    async def await_result(self, future: Future) -> Any:
+        """Versão assíncrona de wait."""
+        try:
+            return await asyncio.wrap_future(future)
+        except MergedRequestAbandoned:
+            raise
+        except Exception:
+            with self._lock:
+                self._stats["merged_failures"] += 1
+            raise
+
+    def run(self, key: str, func: Callable[[], T]) -> T:
+        """
+        Executa func uma única vez para chamadas concorrentes com a mesma chave.
+
+        Args:
+            key: Chave da requisição
+            func: Função que executa a requisição
+
+        Returns:
+            Resultado de func (do líder, para chamadas agrupadas)
+        """
+        leader, future = self.claim(key)
+        if not leader:
+            try:
+                return self.wait(future)
+            except MergedRequestAbandoned:
+                return self.run(key, func)
+        try:
+            result = func()
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, result=result)
+        return result
+
+    async def arun(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Versão assíncrona de run.
+
+        Args:
+            key: Chave da requisição
+            func: Função que retorna a corrotina da requisição
+
+        Returns:
+            Resultado da corrotina (do líder, para chamadas agrupadas)
+        """
+        leader, future = self.claim(key)
+        if not leader:
+            try:
+                return await self.await_result(future)
+            except MergedRequestAbandoned:
+                return await self.arun(key, func)
+        try:
+            result = await func()
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, result=result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores de requisições agrupadas.
+
+        Returns:
+            Dicionário com líderes, chamadas agrupadas e requisições em andamento
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._in_flight)
+        return stats
+
+
+_shared_coalescer: Optional[RequestCoalescer] = None
+_shared_coalescer_lock = threading.Lock()
+
+
+def get_shared_request_coalescer() -> RequestCoalescer:
+    """
+    Retorna o agrupador de requisições compartilhado pelo processo.
+
+    Returns:
+        Instância única de RequestCoalescer
+    """
+    global _shared_coalescer
+    with _shared_coalescer_lock:
+        if _shared_coalescer is None:
+            _shared_coalescer = RequestCoalescer()
+        return _shared_coalescer
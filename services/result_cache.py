@@ -0,0 +1,164 @@
+"""
+Cache dos resultados de geração por arquivo enviado.
+
+O upload é salvo e tem o SHA-256 calculado na mesma leitura
+(FileService.save_file). Com o hash em mãos, um arquivo já processado é
+reconhecido antes de qualquer trabalho: o texto sai do cache de extrações e
+as HUs/resumo saem deste cache, sem extração nem chamadas à LLM.
+
+A chave combina o hash do arquivo com tudo que muda a saída: o extrator e suas
+opções (extractor_signature, que muda quando o texto extraído muda), tipo de
+saída, observações, compactação, tentativas, endpoint e modelo. Os resultados
+ficam em um CompletionCache próprio (memória + SQLite compartilhado pelos
+workers, com TTL e limite de tamanho).
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, Any, Optional
+
+from config import config
+from services.completion_cache import CompletionCache
+
+# Incrementar quando os prompts ou o formato dos resultados mudarem (invalida os resultados salvos)
+# v2: texto de DOCX passou a incluir tabelas e cabeçalhos (extrator docx v2)
+RESULT_CACHE_VERSION = 2
+
+
+def make_result_key(file_hash: str, extractor: str, output_type: str, observations: str, compact: bool, max_attempts: int, endpoint: str, model: str) -> str:
+    """
+    Calcula a chave dos resultados de um arquivo.
+
+    Args:
+        file_hash: SHA-256 do conteúdo do arquivo
+        extractor: Assinatura do extrator (extractor_signature da extensão)
+        output_type: 'hus', 'summary' ou 'both'
+        observations: Observações do usuário (pode ser vazio)
+        compact: Se o texto foi compactado antes dos prompts
+        max_attempts: Tentativas de auto-correção
+        endpoint: Endpoint de origem (define o modo de geração das HUs)
+        model: Modelo usado na geração
+
+    Returns:
+        Hash SHA-256 hexadecimal
+    """
+    material = json.dumps(
+        [file_hash, extractor or "", output_type, observations or "", bool(compact), max_attempts, endpoint or "", model, RESULT_CACHE_VERSION],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Guarda os resultados de geração por arquivo e mede o tempo de geração poupado."""
+
+    def __init__(self, cache: CompletionCache = None, enabled: bool = None):
+        """
+        Inicializa o cache.
+
+        Args:
+            cache: Cache subjacente (opcional, cria um com as configurações RESULT_CACHE_*)
+            enabled: Liga/desliga o cache (opcional, usa config)
+        """
+        self.enabled = config.RESULT_CACHE_ENABLED if enabled is None else enabled
+        self.cache = cache or CompletionCache(
+            db_path=config.RESULT_CACHE_DB_PATH,
+            memory_entries=config.RESULT_CACHE_MEMORY_ENTRIES,
+            ttl_seconds=config.RESULT_CACHE_TTL_SECONDS,
+            max_disk_bytes=config.RESULT_CACHE_MAX_BYTES,
+            enabled=self.enabled
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "job_artifacts_reused": 0,
+            "generation_ms_saved": 0.0
+        }
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca os resultados de um arquivo.
+
+        Args:
+            key: Chave gerada por make_result_key
+
+        Returns:
+            Resultados (como retornados por _generate_outputs) ou None
+        """
+        if not self.enabled:
+            return None
+        raw = self.cache.get(key)
+        results = None
+        if raw is not None:
+            try:
+                results = json.loads(raw)
+            except ValueError:
+                results = None
+        with self._lock:
+            self._stats["lookups"] += 1
+            if results:
+                self._stats["hits"] += 1
+                self._stats["generation_ms_saved"] += results.get("timings", {}).get("total_ms", 0.0)
+        return results or None
+
+    def set(self, key: str, results: Dict[str, Any]) -> None:
+        """
+        Salva os resultados de uma geração completa (sem saídas com erro).
+
+        Args:
+            key: Chave gerada por make_result_key
+            results: Resultados de _generate_outputs
+        """
+        if self.enabled and not results.get("output_errors") and ("user_stories" in results or "summary" in results):
+            self.cache.set(key, json.dumps(results, ensure_ascii=False, default=str))
+
+    def record_job_artifact(self, generation_ms: float = 0.0) -> None:
+        """
+        Registra um resultado reaproveitado do artefato de um job já processado.
+
+        Args:
+            generation_ms: Tempo de geração registrado no artefato
+        """
+        with self._lock:
+            self._stats["job_artifacts_reused"] += 1
+            self._stats["generation_ms_saved"] += generation_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna a taxa de acerto, o tempo poupado e a ocupação do cache.
+
+        Returns:
+            Dicionário com consultas, acertos, taxa, artefatos reaproveitados,
+            tempo de geração poupado e ocupação
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        cache_stats = self.cache.get_stats()
+        stats["hit_ratio"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["generation_ms_saved"] = round(stats["generation_ms_saved"], 1)
+        stats["enabled"] = self.enabled
+        stats["stores"] = cache_stats["stores"]
+        stats["entries"] = cache_stats["disk_entries"] or cache_stats["memory_entries"]
+        stats["disk_bytes"] = cache_stats["disk_bytes"]
+        stats["evictions"] = cache_stats["memory_evictions"] + cache_stats["disk_evictions"]
+        return stats
+
+
+_shared_cache: Optional[ResultCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_result_cache() -> ResultCache:
+    """
+    Retorna o cache de resultados compartilhado pelo processo.
+
+    Returns:
+        Instância única de ResultCache
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResultCache()
+        return _shared_cache
@@ -0,0 +1,175 @@
+"""
+Geração especulativa de Histórias de Usuário: K candidatas em paralelo.
+
+Em vez de gerar, validar e corrigir em sequência, várias candidatas são
+geradas ao mesmo tempo (com temperaturas diferentes) e validadas à medida
+que terminam; a primeira aprovada vence e as demais são canceladas. Troca
+tokens extras por menor latência no pior caso, por isso é habilitada por
+endpoint (SPECULATIVE_ENDPOINTS).
+
+Este módulo define as temperaturas das candidatas e as métricas de custo e
+latência do modo especulativo.
+"""
+
+import threading
+from typing import Dict, Any, List, Optional
+
+from config import config
+from services.text_chunker import estimate_tokens
+
+# Amostras de latência mantidas para os percentis
+LATENCY_SAMPLES = 512
+
+
+def speculative_endpoints() -> List[str]:
+    """
+    Lista os endpoints com geração especulativa habilitada.
+
+    Returns:
+        Nomes dos endpoints (ex.: 'process-stream'), conforme SPECULATIVE_ENDPOINTS
+    """
+    return [name.strip() for name in config.SPECULATIVE_ENDPOINTS.split(",") if name.strip()]
+
+
+def candidate_temperatures(candidates: int) -> List[float]:
+    """
+    Define a temperatura de cada candidata.
+
+    Usa SPECULATIVE_TEMPERATURES em ordem; se houver mais candidatas que
+    temperaturas, repete a lista com +0.05 por volta, para que nenhuma
+    candidata seja idêntica a outra (requisições idênticas seriam agrupadas).
+
+    Args:
+        candidates: Número de candidatas
+
+    Returns:
+        Lista de temperaturas, uma por candidata
+    """
+    base = [float(value) for value in config.SPECULATIVE_TEMPERATURES.split(",") if value.strip()] or [0.7]
+    return [round(base[index % len(base)] + 0.05 * (index // len(base)), 2) for index in range(max(candidates, 1))]
+
+
+def candidate_tokens(result: Dict[str, Any]) -> int:
+    """
+    Estima os tokens gastos por uma candidata concluída (geração + validação).
+
+    Args:
+        result: Resultado do fluxo da candidata
+
+    Returns:
+        Tokens estimados de prompt e resposta
+    """
+    tokens = 0
+    generation = result.get("generation") or {}
+    tokens += generation.get("prompt_tokens", 0) + estimate_tokens(generation.get("content", ""))
+    validation = result.get("validation") or {}
+    if validation.get("verdict_source") != "rules":
+        tokens += validation.get("prompt_tokens", 0) + estimate_tokens(validation.get("full_response", ""))
+    return tokens
+
+
+class SpeculativeStats:
+    """Métricas do modo especulativo: custo em candidatas/tokens e latência até a vencedora."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "runs_approved": 0,
+            "runs_fallback": 0,
+            "candidates_started": 0,
+            "candidates_finished": 0,
+            "candidates_approved": 0,
+            "candidates_cancelled": 0,
+            "candidates_failed": 0,
+            "tokens_spent": 0,
+            "tokens_winner": 0
+        }
+        self._latencies: List[float] = []
+        self._winner_temperatures: Dict[str, int] = {}
+
+    def record_candidate(self, result: Optional[Dict[str, Any]], cancelled: bool = False) -> None:
+        """
+        Registra o desfecho de uma candidata (inclusive as que terminam depois da vencedora).
+
+        Args:
+            result: Resultado do fluxo da candidata (None se cancelada antes de retornar)
+            cancelled: Se a candidata foi cancelada
+        """
+        with self._lock:
+            if cancelled or (result or {}).get("cancelled"):
+                self._stats["candidates_cancelled"] += 1
+                return
+            if not result or not result.get("success"):
+                self._stats["candidates_failed"] += 1
+                return
+            self._stats["candidates_finished"] += 1
+            self._stats["tokens_spent"] += candidate_tokens(result)
+            if result.get("is_approved"):
+                self._stats["candidates_approved"] += 1
+
+    def record_run(self, candidates: int, latency_ms: float, winner: Optional[Dict[str, Any]], fallback: bool) -> None:
+        """
+        Registra uma execução especulativa.
+
+        Args:
+            candidates: Candidatas iniciadas
+            latency_ms: Tempo até a resposta (vencedora ou fim da correção)
+            winner: Candidata vencedora (None se nenhuma foi aprovada)
+            fallback: Se a melhor candidata seguiu para a correção sequencial
+        """
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["candidates_started"] += candidates
+            if winner:
+                self._stats["runs_approved"] += 1
+                self._stats["tokens_winner"] += candidate_tokens(winner)
+                temperature = str(winner.get("temperature"))
+                self._winner_temperatures[temperature] = self._winner_temperatures.get(temperature, 0) + 1
+            if fallback:
+                self._stats["runs_fallback"] += 1
+            self._latencies.append(latency_ms)
+            if len(self._latencies) > LATENCY_SAMPLES:
+                self._latencies.pop(0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna custo e latência do modo especulativo.
+
+        Returns:
+            Dicionário com contadores, tokens estimados (total e da vencedora),
+            fração desperdiçada, latências (média, p50, p95, máx.) e
+            temperaturas vencedoras
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+            stats["winner_temperatures"] = dict(self._winner_temperatures)
+        stats["endpoints"] = speculative_endpoints()
+        stats["candidates_per_run"] = round(stats["candidates_started"] / stats["runs"], 2) if stats["runs"] else 0.0
+        wasted = stats["tokens_spent"] - stats["tokens_winner"]
+        stats["wasted_token_rate"] = round(wasted / stats["tokens_spent"], 4) if stats["tokens_spent"] else 0.0
+        if latencies:
+            stats["latency_avg_ms"] = round(sum(latencies) / len(latencies), 1)
+            stats["latency_p50_ms"] = round(latencies[len(latencies) // 2], 1)
+            stats["latency_p95_ms"] = round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 1)
+            stats["latency_max_ms"] = round(latencies[-1], 1)
+        return stats
+
+
+_shared_stats: Optional[SpeculativeStats] = None
+_shared_stats_lock = threading.Lock()
+
+
+def get_shared_speculative_stats() -> SpeculativeStats:
+    """
+    Retorna as métricas do modo especulativo compartilhadas pelo processo.
+
+    Returns:
+        Instância única de SpeculativeStats
+    """
+    global _shared_stats
+    with _shared_stats_lock:
+        if _shared_stats is None:
+            _shared_stats = SpeculativeStats()
+        return _shared_stats
@@ -0,0 +1,124 @@
+"""
+Pré-validação local (por regras) das Histórias de Usuário geradas.
+
+Verifica apenas a estrutura, antes da validação pela LLM: cada história tem a
+frase "Como ..., quero ..., para ...", uma seção de critérios de aceitação com
+ao menos um item, e as histórias numeradas seguem a sequência 1, 2, 3...
+Se a estrutura falha, a tentativa vai direto para a correção com o problema
+apontado, sem gastar uma chamada de validação.
+
+As regras só reprovam defeitos claros. Na dúvida a decisão fica com a LLM:
+sem nenhuma frase "Como ..., quero ..." reconhecida (marcação incomum) ou com
+a numeração fora de sequência, o veredito sai com 'uncertain' e a validação
+pela LLM é chamada normalmente.
+"""
+
+import re
+from typing import Dict, Any, List
+
+
+# "Como <papel>, quero <ação>" no início da linha, após marcação ou rótulo ("**História:** Como ..."),
+# com marcação entre as palavras ("**Como** gestor, **quero** ...") e "Eu, como ..."
+STORY_STATEMENT = re.compile(
+    r"^[\s>*\-_]*(?:[^\n:]{0,40}:\s*[*_]*\s*)?(?:eu\s*,?\s*[*_]*\s*)?como\b[^\n]{1,200}?[,\s][\s*_]*(?:eu\s+)?[*_]*\s*quero\b",
+    re.IGNORECASE | re.MULTILINE
+)
+BENEFIT = re.compile(r"\bpara\b|\ba fim de\b|\bde modo que\b|\bpois\b", re.IGNORECASE)
+ACCEPTANCE_HEADING = re.compile(r"crit[ée]rios?\s+de\s+aceita[çc][ãa]o", re.IGNORECASE)
+CRITERION_ITEM = re.compile(r"^\s*(?:[-*•]|\d{1,2}[.)]|\**\s*(?:CA|AC)\s*\d+|\**\s*dado\b)\s*\S", re.IGNORECASE | re.MULTILINE)
+# Título numerado de história: "## 1. Login", "### História 2 – ...", "**HU 3: ...**"
+STORY_HEADING = re.compile(
+    r"^\s*(?:#{1,6}\s*|\*\*)\**\s*(?:(HU|US|Hist[óo]ria(?:\s+de\s+Usu[áa]rio)?)\s*[-–#:]?\s*)?(\d{1,3})\s*[.)\-–:]\s*\**\s*(.*)$",
+    re.IGNORECASE | re.MULTILINE
+)
+# Títulos numerados das seções de uma história (não são histórias novas), como no
+# formato obrigatório de prompts/user_story_prompts.py: "## 2. **Padrão de História de Usuário**"
+SECTION_TITLE = re.compile(
+    r"^(?:nome|hist[óo]ria de usu[áa]rio\b\s*\**\s*(?::|$)|padr[ãa]o|tipo|crit[ée]rios|permiss|regras|requisitos|campos|componentes|cen[áa]rios)",
+    re.IGNORECASE
+)
+
+# Trecho após o "quero" em que o benefício ("para ...") é procurado
+BENEFIT_WINDOW = 400
+
+
+def _story_numbers(content: str, statements: List[int]) -> List[int]:
+    """
+    Números dos títulos de história, ignorando seções numeradas (Critérios, Regras...).
+
+    Só conta um título seguido de uma frase "Como ..., quero ..." antes do
+    próximo título: listas numeradas fora das histórias (ex.: as tasks
+    sugeridas "### 1. Backend", "### 2. Frontend") não entram na sequência.
+    Se algum título traz o prefixo de história ("História 2", "HU 3"), só esses
+    contam: os demais títulos numerados são seções dentro das histórias.
+
+    Args:
+        content: Texto das Histórias de Usuário
+        statements: Posições das frases "Como ..., quero ..."
+    """
+    matches = [
+        match for match in STORY_HEADING.finditer(content)
+        if not SECTION_TITLE.match(match.group(3).strip("*# ").strip())
+    ]
+    headings = []
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(content)
+        if any(match.end() <= position < end for position in statements):
+            headings.append((bool(match.group(1)), int(match.group(2))))
+    if any(prefixed for prefixed, _ in headings):
+        return [number for prefixed, number in headings if prefixed]
+    return [number for _, number in headings]
+
+
+def prevalidate_user_stories(content: str) -> Dict[str, Any]:
+    """
+    Confere a estrutura das Histórias de Usuário geradas.
+
+    Args:
+        content: Texto das Histórias de Usuário
+
+    Returns:
+        Veredito no formato de parse_validation_verdict (approved, score,
+        stories, issues) com source 'rules' e 'uncertain': True quando as
+        regras não reconhecem a estrutura mas também não acham um defeito
+        claro (a decisão deve ficar com a LLM)
+    """
+    issues: List[str] = []
+    doubts: List[str] = []
+    stories: List[Dict[str, Any]] = []
+    content = content or ""
+
+    statements = list(STORY_STATEMENT.finditer(content))
+    if not statements:
+        doubts.append('Nenhuma história no formato "Como [tipo de usuário], quero [funcionalidade] para [benefício esperado]".')
+
+    for index, statement in enumerate(statements):
+        # Trecho da história: da frase "Como ..." até a próxima
+        end = statements[index + 1].start() if index + 1 < len(statements) else len(content)
+        segment = content[statement.start():end]
+        label = f"História {index + 1}"
+        story_issues = []
+
+        if not BENEFIT.search(segment[len(statement.group(0)):][:BENEFIT_WINDOW]):
+            story_issues.append('falta o benefício na frase "Como ..., quero ... para ..."')
+        criteria = ACCEPTANCE_HEADING.search(segment)
+        if not criteria:
+            story_issues.append("faltam os critérios de aceitação")
+        elif not CRITERION_ITEM.search(segment[criteria.end():]):
+            story_issues.append("a seção de critérios de aceitação não tem itens")
+
+        stories.append({"story": label, "approved": not story_issues, "issues": story_issues})
+        issues.extend(f"{label}: {issue}." for issue in story_issues)
+
+    numbers = _story_numbers(content, [statement.start() for statement in statements])
+    if len(numbers) > 1 and numbers != list(range(1, len(numbers) + 1)):
+        doubts.append(f"Numeração das histórias fora de sequência ({', '.join(map(str, numbers))}); numere 1, 2, 3...")
+
+    return {
+        "approved": not issues and not doubts,
+        "uncertain": bool(doubts) and not issues,
+        "score": None,
+        "stories": stories,
+        "issues": issues + doubts,
+        "source": "rules"
+    }
@@ -0,0 +1,142 @@
+"""
+Resumos parciais (digests) de transcrições longas.
+
+No resumo map-reduce, cada trecho da transcrição vira um resumo parcial. As
+observações do usuário só entram no prompt final (reduce), então os parciais
+de uma transcrição podem ser reaproveitados: regenerar o resumo com novas
+observações executa apenas o reduce.
+
+Os parciais ficam em um CompletionCache próprio (memória + SQLite, com TTL e
+limite de tamanho), indexados pelo hash da transcrição.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, Any, List, Optional
+
+from config import config
+from services.completion_cache import CompletionCache
+
+# Incrementar quando o prompt de resumo de trecho mudar (invalida os parciais salvos)
+DIGEST_PROMPT_VERSION = 1
+
+
+def make_digest_key(text: str, chunk_tokens: int, model: str, kind: str = "summary") -> str:
+    """
+    Calcula a chave dos parciais de uma transcrição.
+
+    Args:
+        text: Transcrição completa
+        chunk_tokens: Orçamento de tokens por trecho (outro valor gera outros trechos)
+        model: Modelo usado na etapa map
+        kind: Tipo dos parciais ('summary' ou 'requirements', das HUs de entradas grandes)
+
+    Returns:
+        Hash SHA-256 hexadecimal
+    """
+    transcript_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    material = f"{transcript_hash}|{chunk_tokens}|{model}|v{DIGEST_PROMPT_VERSION}"
+    if kind != "summary":
+        material = f"{material}|{kind}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class SummaryDigestStore:
+    """Armazena os resumos parciais por transcrição e mede o reaproveitamento."""
+
+    def __init__(self, cache: CompletionCache = None, enabled: bool = None):
+        """
+        Inicializa o armazenamento.
+
+        Args:
+            cache: Cache subjacente (opcional, cria um com as configurações SUMMARY_DIGEST_*)
+            enabled: Liga/desliga o reaproveitamento (opcional, usa config)
+        """
+        self.enabled = config.SUMMARY_DIGESTS_ENABLED if enabled is None else enabled
+        self.cache = cache or CompletionCache(
+            db_path=config.SUMMARY_DIGEST_DB_PATH,
+            memory_entries=config.SUMMARY_DIGEST_MEMORY_ENTRIES,
+            ttl_seconds=config.SUMMARY_DIGEST_TTL_SECONDS,
+            max_disk_bytes=config.SUMMARY_DIGEST_MAX_BYTES,
+            enabled=self.enabled
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "reused": 0,
+            "chunks_reused": 0
+        }
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """
+        Busca os parciais de uma transcrição.
+
+        Args:
+            key: Chave gerada por make_digest_key
+
+        Returns:
+            Lista de resumos parciais na ordem dos trechos, ou None
+        """
+        if not self.enabled:
+            return None
+        raw = self.cache.get(key)
+        digests = None
+        if raw is not None:
+            try:
+                digests = json.loads(raw)
+            except ValueError:
+                digests = None
+        with self._lock:
+            self._stats["lookups"] += 1
+            if digests:
+                self._stats["reused"] += 1
+                self._stats["chunks_reused"] += len(digests)
+        return digests or None
+
+    def set(self, key: str, digests: List[str]) -> None:
+        """
+        Salva os parciais de uma transcrição.
+
+        Args:
+            key: Chave gerada por make_digest_key
+            digests: Resumos parciais na ordem dos trechos
+        """
+        if self.enabled and digests and all(digests):
+            self.cache.set(key, json.dumps(digests, ensure_ascii=False))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna a taxa de reaproveitamento e a ocupação do armazenamento.
+
+        Returns:
+            Dicionário com consultas, reaproveitamentos, taxa e ocupação
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        cache_stats = self.cache.get_stats()
+        stats["reuse_rate"] = round(stats["reused"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["enabled"] = self.enabled
+        stats["stores"] = cache_stats["stores"]
+        stats["entries"] = cache_stats["disk_entries"] or cache_stats["memory_entries"]
+        stats["disk_bytes"] = cache_stats["disk_bytes"]
+        stats["evictions"] = cache_stats["memory_evictions"] + cache_stats["disk_evictions"]
+        return stats
+
+
+_shared_store: Optional[SummaryDigestStore] = None
+_shared_store_lock = threading.Lock()
+
+
+def get_shared_summary_digest_store() -> SummaryDigestStore:
+    """
+    Retorna o armazenamento de resumos parciais compartilhado pelo processo.
+
+    Returns:
+        Instância única de SummaryDigestStore
+    """
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = SummaryDigestStore()
+        return _shared_store
@@ -0,0 +1,104 @@
+"""
+Divisão de textos longos em trechos por orçamento de tokens.
+
+Usado no resumo map-reduce de transcrições e na extração de requisitos de
+entradas acima do orçamento do modelo: cada trecho cabe em um prompt
+e os cortes respeitam, em ordem de preferência, trocas de interlocutor,
+parágrafos, linhas e frases. Só um trecho sem nenhum desses limites é
+cortado no meio.
+"""
+
+import re
+from typing import List
+
+# Estimador compartilhado com os templates e os clientes de LLM (reexportado aqui)
+from prompts.token_budget import CHARS_PER_TOKEN, estimate_tokens
+
+
+# Início de fala em transcrições: "João:", "Speaker 1:", "**Maria:**", "[00:12:03] Ana:", "00:12 - Ana:"
+SPEAKER_TURN = re.compile(
+    r"^\s*(?:\[?\(?\d{1,2}:\d{2}(?::\d{2})?\)?\]?\s*(?:-\s*)?)?\**[A-ZÀ-Ýa-zà-ý][\w .'-]{0,40}?\**\s*:\**\s",
+    re.UNICODE
+)
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def _speaker_turns(text: str) -> List[str]:
+    """Agrupa as linhas em falas, começando uma nova a cada interlocutor."""
+    turns: List[str] = []
+    current: List[str] = []
+    for line in text.splitlines():
+        if SPEAKER_TURN.match(line) and current:
+            turns.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        turns.append("\n".join(current))
+    return turns
+
+
+def _paragraphs(text: str) -> List[str]:
+    return [part for part in re.split(r"\n\s*\n", text) if part.strip()]
+
+
+def _split_oversized(unit: str, max_tokens: int) -> List[str]:
+    """Quebra uma unidade maior que o orçamento por linhas, depois frases, depois caracteres."""
+    for pieces, separator in ((unit.splitlines(), "\n"), (SENTENCE_END.split(unit), " ")):
+        pieces = [piece for piece in pieces if piece.strip()]
+        if len(pieces) > 1:
+            return _pack(pieces, max_tokens, separator)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return [unit[i:i + max_chars] for i in range(0, len(unit), max_chars)]
+
+
+def _pack(units: List[str], max_tokens: int, separator: str) -> List[str]:
+    """Junta unidades consecutivas enquanto couberem no orçamento."""
+    # Conta caracteres (incluindo separadores) para o trecho final respeitar o orçamento
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks: List[str] = []
+    current: List[str] = []
+    current_chars = 0
+    for unit in units:
+        if len(unit) > max_chars:
+            if current:
+                chunks.append(separator.join(current))
+                current, current_chars = [], 0
+            chunks.extend(_split_oversized(unit, max_tokens))
+            continue
+        added = len(unit) + (len(separator) if current else 0)
+        if current and current_chars + added > max_chars:
+            chunks.append(separator.join(current))
+            current, current_chars = [], 0
+            added = len(unit)
+        current.append(unit)
+        current_chars += added
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def split_by_token_budget(text: str, max_tokens: int) -> List[str]:
+    """
+    Divide o texto em trechos de até max_tokens (estimados).
+
+    Transcrições com marcação de interlocutor são cortadas entre falas; as
+    demais, entre parágrafos.
+
+    Args:
+        text: Texto completo
+        max_tokens: Orçamento de tokens por trecho
+
+    Returns:
+        Lista de trechos na ordem original (um único trecho se o texto couber)
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    max_tokens = max(max_tokens, 1)
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    turns = _speaker_turns(text)
+    if len(turns) > 1:
+        return _pack(turns, max_tokens, separator="\n")
+    return _pack(_paragraphs(text), max_tokens, separator="\n\n")
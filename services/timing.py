@@ -0,0 +1,240 @@
+"""
+Instrumentação de tempo por etapa do processamento.
+
+Cada etapa medida (extração de texto, construção de prompts, chamadas à LLM
+por etapa, geração de documento, envio de e-mail...) alimenta:
+
+- um histograma em memória por etapa, com faixas fixas em milissegundos,
+  exportável em JSON (/api/metrics) ou no formato texto do Prometheus;
+- o detalhamento da requisição HTTP atual (contextvar), devolvido em
+  generation_info.stage_timings e no cabeçalho Server-Timing.
+
+Uso:
+    with timed("extract.pdf"):
+        ...
+
+    @timed_stage("document.create")
+    def create_document(...): ...
+
+Tarefas em outras threads enxergam o detalhamento da requisição quando são
+executadas com contextvars.copy_context().run (como os ramos de HUs/resumo).
+"""
+
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+
+# Limites superiores das faixas do histograma, em milissegundos
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000)
+
+
+class StageHistogram:
+    """Histograma de durações de uma etapa (faixas fixas, custo constante por amostra)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)  # última faixa: acima do maior limite
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float) -> float:
+        """Estima o quantil pelo limite superior da faixa que o contém."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return float(BUCKET_BOUNDS_MS[index]) if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+
+class RequestTimings:
+    """Detalhamento de tempos de uma requisição: soma e quantidade por etapa."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, stage: str, ms: float) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"ms": 0.0, "count": 0})
+            entry["ms"] += ms
+            entry["count"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Retorna o detalhamento atual.
+
+        Returns:
+            Dicionário {etapa: {"ms", "count"}} mais o tempo total da requisição
+            ('total_ms'). Etapas paralelas (ex.: HUs e resumo) somam mais que o total.
+        """
+        with self._lock:
+            stages = {stage: {"ms": round(entry["ms"], 1), "count": entry["count"]} for stage, entry in self.stages.items()}
+        return {"stages": stages, "total_ms": round((time.perf_counter() - self.started) * 1000, 1)}
+
+    def server_timing_header(self) -> str:
+        """Valor do cabeçalho Server-Timing (ex.: 'extract_pdf;dur=120.5, llm_generation;dur=900.1')."""
+        with self._lock:
+            items = list(self.stages.items())
+        return ", ".join(f"{stage.replace('.', '_')};dur={entry['ms']:.1f}" for stage, entry in items)
+
+
+_current_request: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+class TimingRegistry:
+    """Histogramas de tempo por etapa do processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, StageHistogram] = {}
+
+    def record(self, stage: str, ms: float) -> None:
+        """
+        Registra a duração de uma etapa no histograma e no detalhamento da requisição atual.
+
+        Args:
+            stage: Nome da etapa (ex.: 'extract.pdf', 'llm.generation')
+            ms: Duração em milissegundos
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = StageHistogram()
+            histogram.observe(ms)
+        request_timings = _current_request.get()
+        if request_timings is not None:
+            request_timings.add(stage, ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna o resumo dos histogramas.
+
+        Returns:
+            Dicionário {etapa: {count, avg_ms, p50_ms, p95_ms, p99_ms, max_ms}}
+            (percentis estimados pelas faixas do histograma)
+        """
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return {
+                stage: {
+                    "count": histogram.count,
+                    "avg_ms": round(histogram.total_ms / histogram.count, 1) if histogram.count else 0.0,
+                    "p50_ms": histogram.quantile(0.50),
+                    "p95_ms": histogram.quantile(0.95),
+                    "p99_ms": histogram.quantile(0.99),
+                    "max_ms": round(histogram.max_ms, 1)
+                }
+                for stage, histogram in items
+            }
+
+    def export_prometheus(self) -> str:
+        """
+        Exporta os histogramas no formato texto do Prometheus.
+
+        Returns:
+            Texto com a métrica hu_stage_duration_seconds (buckets, soma e contagem por etapa)
+        """
+        lines: List[str] = [
+            "# HELP hu_stage_duration_seconds Duração das etapas do processamento",
+            "# TYPE hu_stage_duration_seconds histogram"
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKET_BOUNDS_MS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'hu_stage_duration_seconds_bucket{{stage="{stage}",le="{bound / 1000:g}"}} {cumulative}')
+                lines.append(f'hu_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'hu_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.total_ms / 1000:.6f}')
+                lines.append(f'hu_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+_shared_registry: Optional[TimingRegistry] = None
+_shared_registry_lock = threading.Lock()
+
+
+def get_shared_timing_registry() -> TimingRegistry:
+    """
+    Retorna os histogramas de tempo compartilhados pelo processo.
+
+    Returns:
+        Instância única de TimingRegistry
+    """
+    global _shared_registry
+    with _shared_registry_lock:
+        if _shared_registry is None:
+            _shared_registry = TimingRegistry()
+        return _shared_registry
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Mede o bloco e registra a duração na etapa informada (também em caso de erro).
+
+    Args:
+        stage: Nome da etapa
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        get_shared_timing_registry().record(stage, (time.perf_counter() - started) * 1000)
+
+
+def timed_stage(stage: str):
+    """
+    Decorador equivalente a `with timed(stage)` em volta da função.
+
+    Args:
+        stage: Nome da etapa
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_request_timings() -> contextvars.Token:
+    """
+    Inicia o detalhamento de tempos da requisição atual.
+
+    Returns:
+        Token para encerrar com end_request_timings
+    """
+    return _current_request.set(RequestTimings())
+
+
+def current_request_timings() -> Optional[RequestTimings]:
+    """Detalhamento da requisição atual (None fora de uma requisição)."""
+    return _current_request.get()
+
+
+def end_request_timings(token: contextvars.Token) -> None:
+    """
+    Encerra o detalhamento iniciado por start_request_timings.
+
+    Args:
+        token: Token retornado por start_request_timings
+    """
+    _current_request.reset(token)
@@ -0,0 +1,277 @@
+"""
+Normalização e compactação de transcrições antes da montagem dos prompts.
+
+Anotações do Gemini e saídas do Whisper trazem marcas de tempo, cabeçalhos
+de interlocutor repetidos, palavras de preenchimento ("hum", "né", "ahn"),
+textos padrão ("Anotações do Gemini", avisos de revisão) e parágrafos
+duplicados. Nada disso ajuda a LLM e tudo custa tokens.
+
+O texto passa linha a linha por uma sequência de etapas (geradores), sem
+cópias intermediárias do texto inteiro:
+
+- boilerplate: remove linhas de texto padrão do Gemini e cabeçalhos WEBVTT;
+- speakers: omite o cabeçalho quando o mesmo interlocutor continua falando.
+  Só contam como turno de fala rótulos "Nome:" com marca de tempo (na linha
+  ou na linha anterior) ou de um interlocutor já visto assim; um "Regra:"
+  repetido em um texto comum é mantido;
+- timestamps: remove marcas de tempo e índices de legenda (SRT/VTT); uma
+  linha só com um número só é tratada como índice quando a linha seguinte é
+  o tempo de uma legenda ("00:00:01,000 --> ..."), senão é mantida (ex.: a
+  resposta "3" a "Quantos perfis?");
+- fillers: remove palavras de preenchimento e repetições ("eu eu eu"; números
+  repetidos, como "10 10 20", são mantidos);
+- duplicates: descarta linhas longas já vistas;
+- whitespace: normaliza espaços e linhas em branco consecutivas.
+
+As etapas ativas vêm de TRANSCRIPT_COMPACTION_STEPS; cada requisição pode
+desligar a compactação (parâmetro compact_transcript=false).
+"""
+
+import hashlib
+import re
+import threading
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+from config import config
+from services.text_chunker import estimate_tokens
+
+# "speakers" vem antes de "timestamps": as marcas de tempo identificam os turnos de fala
+ALL_STEPS = ("boilerplate", "speakers", "timestamps", "fillers", "duplicates", "whitespace")
+
+BOILERPLATE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"^\W*anota[çc][õo]es\s*do\s*gemini\W*$",
+        r"^\W*notas\s*do\s*gemini\W*$",
+        r"^\W*transcri[çc][ãa]o\s*(do\s*gemini)?\W*$",
+        r"gemini\s+pode\s+cometer\s+erros",
+        r"(confira|verifique)\s+se\s+as\s+anota[çc][õo]es.*(corretas|precisas)",
+        r"voc[êe]\s+pode\s+editar\s+(essas|estas)\s+anota[çc][õo]es",
+        r"(avalie|como\s+foram)\s+(estas|essas|as)\s+anota[çc][õo]es",
+        r"^\W*(esta|essa)\s+transcri[çc][ãa]o\s+foi\s+gerada",
+        r"^\W*webvtt\W*$",
+        r"^\W*kind:\s*captions\W*$",
+        r"^\W*language:\s*[a-z-]+\W*$",
+    )
+]
+# "00:12:03", "[00:12]", "(00:01:02)", "00:00:12.345 --> 00:00:15.000", "00:12 -"
+TIMESTAMP_PREFIX = re.compile(
+    r"^\s*[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?[\])]?"
+    r"(?:\s*-->\s*[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?[\])]?)?\s*(?:[-–]\s*)?"
+)
+SUBTITLE_INDEX = re.compile(r"^\s*\d{1,6}\s*$")
+CUE_TIMING = re.compile(r"^\s*[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?[\])]?\s*-->")
+SPEAKER_HEADER = re.compile(r"^\s*\**([A-ZÀ-Ýa-zà-ý][\w .'-]{0,40}?)\**\s*:\**\s+(?=\S)", re.UNICODE)
+FILLERS = re.compile(
+    r"(?:,\s*)?\b(?:h+u+m+|h+m+|h+[ãa]+|[ãa]+h+|ahn|é{2,}|uhum|aham|tipo\s+assim|n[ée](?=\s*\?))(?=[\s,.!?…]|$)[,.]?",
+    re.IGNORECASE
+)
+# Palavra repetida ("eu eu eu"); números não ("Plano Básico 10 10 20")
+REPEATED_WORDS = re.compile(r"\b(?!\d+\b)(\w+)(?:[\s,]+\1\b)+", re.IGNORECASE | re.UNICODE)
+MULTI_SPACE = re.compile(r"[ \t]{2,}")
+
+
+class TranscriptCompactor:
+    """Compacta transcrições linha a linha e acumula o que foi removido."""
+
+    def __init__(self, steps: List[str] = None, dedup_min_chars: int = None):
+        """
+        Inicializa o compactador.
+
+        Args:
+            steps: Etapas ativas (opcional, usa TRANSCRIPT_COMPACTION_STEPS)
+            dedup_min_chars: Tamanho mínimo de uma linha para ser descartada
+                como duplicada (opcional, usa TRANSCRIPT_DEDUP_MIN_CHARS)
+        """
+        if steps is None:
+            steps = [step.strip() for step in config.TRANSCRIPT_COMPACTION_STEPS.split(",") if step.strip()]
+        self.steps = [step for step in ALL_STEPS if step in steps]
+        self.dedup_min_chars = config.TRANSCRIPT_DEDUP_MIN_CHARS if dedup_min_chars is None else dedup_min_chars
+        self._lock = threading.Lock()
+        self._stats = {
+            "jobs": 0,
+            "chars_in": 0,
+            "chars_removed": 0,
+            "tokens_removed": 0
+        }
+
+    def compact_lines(self, lines: Iterable[str], removed: Dict[str, int] = None) -> Iterator[str]:
+        """
+        Aplica as etapas ativas a um fluxo de linhas.
+
+        Args:
+            lines: Linhas da transcrição (sem quebra de linha)
+            removed: Dicionário que acumula os caracteres removidos por etapa (opcional)
+
+        Yields:
+            Linhas compactadas
+        """
+        removed = {} if removed is None else removed
+        stream: Iterator[str] = iter(lines)
+        for step in self.steps:
+            stream = getattr(self, f"_step_{step}")(stream, removed)
+        return stream
+
+    def compact(self, text: str) -> Dict[str, Any]:
+        """
+        Compacta uma transcrição completa.
+
+        Args:
+            text: Texto extraído
+
+        Returns:
+            Dicionário com o texto compactado ('text') e o relatório: caracteres
+            e tokens estimados antes/depois/removidos e caracteres removidos por etapa.
+            Se a compactação esvaziar o texto, o original é mantido.
+        """
+        text = text or ""
+        removed: Dict[str, int] = {step: 0 for step in self.steps}
+        compacted = "\n".join(self.compact_lines(text.splitlines(), removed)).strip()
+        if not compacted:
+            compacted = text
+            removed = {step: 0 for step in self.steps}
+        original_tokens = estimate_tokens(text)
+        compacted_tokens = estimate_tokens(compacted)
+        report = {
+            "text": compacted,
+            "steps": list(self.steps),
+            "original_chars": len(text),
+            "compacted_chars": len(compacted),
+            "chars_removed": len(text) - len(compacted),
+            "original_tokens": original_tokens,
+            "compacted_tokens": compacted_tokens,
+            "tokens_removed": original_tokens - compacted_tokens,
+            "removed_by_step": removed
+        }
+        with self._lock:
+            self._stats["jobs"] += 1
+            self._stats["chars_in"] += report["original_chars"]
+            self._stats["chars_removed"] += report["chars_removed"]
+            self._stats["tokens_removed"] += report["tokens_removed"]
+        return report
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna o total compactado pelo processo.
+
+        Returns:
+            Dicionário com jobs, caracteres e tokens removidos e a taxa de redução
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["enabled"] = config.TRANSCRIPT_COMPACTION_ENABLED
+        stats["steps"] = list(self.steps)
+        stats["reduction_rate"] = round(stats["chars_removed"] / stats["chars_in"], 4) if stats["chars_in"] else 0.0
+        return stats
+
+    # Etapas: cada uma recebe e produz um iterador de linhas
+
+    @staticmethod
+    def _step_boilerplate(lines: Iterator[str], removed: Dict[str, int]) -> Iterator[str]:
+        for line in lines:
+            if line.strip() and any(pattern.search(line) for pattern in BOILERPLATE_PATTERNS):
+                removed["boilerplate"] = removed.get("boilerplate", 0) + len(line) + 1
+                continue
+            yield line
+
+    @staticmethod
+    def _step_timestamps(lines: Iterator[str], removed: Dict[str, int]) -> Iterator[str]:
+        index = None  # possível índice de legenda, decidido pela linha seguinte
+        for line in lines:
+            if index is not None:
+                if CUE_TIMING.match(line):
+                    removed["timestamps"] = removed.get("timestamps", 0) + len(index) + 1
+                else:
+                    yield index
+                index = None
+            if SUBTITLE_INDEX.match(line):
+                index = line
+                continue
+            stripped = TIMESTAMP_PREFIX.sub("", line, count=1)
+            if stripped != line:
+                removed["timestamps"] = removed.get("timestamps", 0) + len(line) - len(stripped)
+                if not stripped.strip():
+                    removed["timestamps"] += 1
+                    continue
+            yield stripped
+        if index is not None:
+            yield index
+
+    @staticmethod
+    def _step_speakers(lines: Iterator[str], removed: Dict[str, int]) -> Iterator[str]:
+        current = None
+        known = set()  # interlocutores já vistos em um turno com marca de tempo
+        stamped = False  # linha anterior era só uma marca de tempo (Gemini, SRT/VTT)
+        for line in lines:
+            timestamp = TIMESTAMP_PREFIX.match(line)
+            prefix = line[:timestamp.end()] if timestamp else ""
+            body = line[len(prefix):]
+            if prefix and not body.strip():
+                stamped = True
+                yield line
+                continue
+            match = SPEAKER_HEADER.match(body)
+            if match:
+                speaker = match.group(1).strip().lower()
+                if prefix or stamped:
+                    known.add(speaker)
+                if speaker in known:
+                    if speaker == current:
+                        removed["speakers"] = removed.get("speakers", 0) + match.end()
+                        line = prefix + body[match.end():]
+                    current = speaker
+            if line.strip():
+                stamped = False
+            yield line
+
+    @staticmethod
+    def _step_fillers(lines: Iterator[str], removed: Dict[str, int]) -> Iterator[str]:
+        for line in lines:
+            cleaned = REPEATED_WORDS.sub(r"\1", FILLERS.sub("", line))
+            if cleaned != line:
+                removed["fillers"] = removed.get("fillers", 0) + len(line) - len(cleaned)
+            yield cleaned
+
+    def _step_duplicates(self, lines: Iterator[str], removed: Dict[str, int]) -> Iterator[str]:
+        seen = set()
+        for line in lines:
+            normalized = " ".join(line.lower().split())
+            if len(normalized) >= self.dedup_min_chars:
+                digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+                if digest in seen:
+                    removed["duplicates"] = removed.get("duplicates", 0) + len(line) + 1
+                    continue
+                seen.add(digest)
+            yield line
+
+    @staticmethod
+    def _step_whitespace(lines: Iterator[str], removed: Dict[str, int]) -> Iterator[str]:
+        blank = False
+        for line in lines:
+            cleaned = MULTI_SPACE.sub(" ", line).strip()
+            removed["whitespace"] = removed.get("whitespace", 0) + len(line) - len(cleaned)
+            if not cleaned:
+                if blank:
+                    removed["whitespace"] += 1
+                    continue
+                blank = True
+            else:
+                blank = False
+            yield cleaned
+
+
+_shared_compactor: Optional[TranscriptCompactor] = None
+_shared_compactor_lock = threading.Lock()
+
+
+def get_shared_transcript_compactor() -> TranscriptCompactor:
+    """
+    Retorna o compactador de transcrições compartilhado pelo processo.
+
+    Returns:
+        Instância única de TranscriptCompactor
+    """
+    global _shared_compactor
+    with _shared_compactor_lock:
+        if _shared_compactor is None:
+            _shared_compactor = TranscriptCompactor()
+        return _shared_compactor
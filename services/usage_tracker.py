@@ -0,0 +1,371 @@
+"""
+Contabilização de tokens consumidos na Zello MIND.
+
+Cada requisição bem-sucedida enviada à API (acertos de cache e chamadas
+agrupadas não contam) gera um registro com tokens de entrada e de saída,
+latência e tokens/segundo. O registro é associado ao job e ao colaborador
+do contexto atual (ver usage_context) e somado aos totais diários por
+colaborador, etapa e modelo.
+
+A gravação no banco é feita em lotes por uma thread em segundo plano, para
+não acrescentar uma transação à latência de cada chamada.
+"""
+
+import contextvars
+import queue
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from config import config
+from database import SessionLocal
+from models import LLMUsageRecord, LLMUsageDaily
+
+
+_usage_job_id: contextvars.ContextVar = contextvars.ContextVar("usage_job_id", default=None)
+_usage_collaborator: contextvars.ContextVar = contextvars.ContextVar("usage_collaborator", default=None)
+
+
+@contextmanager
+def usage_context(job_id: int = None, collaborator_email: str = None):
+    """
+    Associa as chamadas à LLM feitas dentro do bloco a um job e colaborador.
+
+    Vale para a thread atual e para corrotinas/threads criadas com cópia do
+    contexto (asyncio, asyncio.to_thread).
+
+    Args:
+        job_id: ID do TranscriptionJob (opcional)
+        collaborator_email: E-mail do colaborador (opcional)
+    """
+    job_token = _usage_job_id.set(job_id)
+    collaborator_token = _usage_collaborator.set(collaborator_email)
+    try:
+        yield
+    finally:
+        _usage_collaborator.reset(collaborator_token)
+        _usage_job_id.reset(job_token)
+
+
+def current_usage_context() -> Dict[str, Any]:
+    """Retorna o job e o colaborador associados às chamadas atuais."""
+    return {
+        "job_id": _usage_job_id.get(),
+        "collaborator_email": _usage_collaborator.get()
+    }
+
+
+class UsageRecorder:
+    """Acumula o uso de tokens em memória e grava no banco em lotes."""
+
+    def __init__(self, enabled: bool = None, flush_interval: float = None, batch_size: int = None):
+        """
+        Inicializa o contabilizador.
+
+        Args:
+            enabled: Se False, mantém apenas os totais em memória (opcional, usa config)
+            flush_interval: Segundos entre gravações no banco (opcional, usa config)
+            batch_size: Máximo de registros por gravação (opcional, usa config)
+        """
+        self.enabled = enabled if enabled is not None else config.LLM_USAGE_TRACKING_ENABLED
+        self.flush_interval = flush_interval or config.LLM_USAGE_FLUSH_SECONDS
+        self.batch_size = max(batch_size or config.LLM_USAGE_BATCH_SIZE, 1)
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "latency_total": 0.0,
+            "estimated_calls": 0
+        })
+        self._stats = {
+            "written": 0,
+            "write_errors": 0
+        }
+
+    def record(
+        self,
+        prompt_class: Optional[str],
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_seconds: float,
+        streamed: bool = False,
+        estimated: bool = False
+    ) -> None:
+        """
+        Registra o uso de uma requisição à API (não bloqueia).
+
+        Args:
+            prompt_class: Etapa do pipeline (None vira 'default')
+            model: Modelo utilizado
+            prompt_tokens: Tokens de entrada
+            completion_tokens: Tokens gerados
+            latency_seconds: Duração da requisição
+            streamed: Se a resposta veio em streaming
+            estimated: Se os tokens foram estimados (API sem bloco usage)
+        """
+        prompt_class = prompt_class or "default"
+        latency_seconds = max(latency_seconds, 0.0)
+        with self._lock:
+            totals = self._totals[prompt_class]
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["latency_total"] += latency_seconds
+            if estimated:
+                totals["estimated_calls"] += 1
+        if not self.enabled:
+            return
+
+        context = current_usage_context()
+        self._queue.put({
+            "job_id": context["job_id"],
+            "collaborator_email": context["collaborator_email"],
+            "prompt_class": prompt_class,
+            "model": model or "",
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency_ms": int(latency_seconds * 1000),
+            "tokens_per_second": round(completion_tokens / latency_seconds, 2) if latency_seconds > 0 else 0.0,
+            "streamed": streamed,
+            "estimated": estimated,
+            "created_at": datetime.utcnow()
+        })
+        self._ensure_worker()
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="llm-usage-writer", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        entries = []
+        while len(entries) < self.batch_size:
+            try:
+                entries.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return entries
+
+    def flush(self) -> int:
+        """
+        Grava no banco os registros pendentes.
+
+        Returns:
+            Quantidade de registros gravados
+        """
+        written = 0
+        with self._write_lock:
+            while True:
+                entries = self._drain()
+                if not entries:
+                    break
+                if self._write(entries):
+                    written += len(entries)
+        return written
+
+    def _write(self, entries: List[Dict[str, Any]]) -> bool:
+        """Insere os registros e soma os totais diários em uma transação (uma nova tentativa)."""
+        daily: Dict[tuple, Dict[str, int]] = defaultdict(lambda: {
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_latency_ms": 0
+        })
+        for entry in entries:
+            key = (entry["created_at"].date(), entry["collaborator_email"] or "", entry["prompt_class"], entry["model"])
+            totals = daily[key]
+            totals["calls"] += 1
+            totals["prompt_tokens"] += entry["prompt_tokens"]
+            totals["completion_tokens"] += entry["completion_tokens"]
+            totals["total_latency_ms"] += entry["latency_ms"]
+
+        for attempt in range(2):
+            session = SessionLocal()
+            try:
+                session.add_all([LLMUsageRecord(**entry) for entry in entries])
+                for (day, email, prompt_class, model), totals in daily.items():
+                    # UPDATE incremental: seguro com vários workers gravando o mesmo dia
+                    result = session.execute(
+                        update(LLMUsageDaily)
+                        .where(
+                            LLMUsageDaily.day == day,
+                            LLMUsageDaily.collaborator_email == email,
+                            LLMUsageDaily.prompt_class == prompt_class,
+                            LLMUsageDaily.model == model
+                        )
+                        .values(
+                            calls=LLMUsageDaily.calls + totals["calls"],
+                            prompt_tokens=LLMUsageDaily.prompt_tokens + totals["prompt_tokens"],
+                            completion_tokens=LLMUsageDaily.completion_tokens + totals["completion_tokens"],
+                            total_latency_ms=LLMUsageDaily.total_latency_ms + totals["total_latency_ms"]
+                        )
+                    )
+                    if result.rowcount == 0:
+                        session.add(LLMUsageDaily(
+                            day=day, collaborator_email=email, prompt_class=prompt_class, model=model, **totals
+                        ))
+                        session.flush()
+                session.commit()
+                with self._lock:
+                    self._stats["written"] += len(entries)
+                return True
+            except IntegrityError:
+                # Outro worker criou a linha diária ao mesmo tempo: repete com UPDATE
+                session.rollback()
+                if attempt == 0:
+                    continue
+                print("Erro ao gravar uso de tokens: conflito nos totais diários")
+            except SQLAlchemyError as e:
+                session.rollback()
+                print(f"Erro ao gravar uso de tokens: {str(e)}")
+                break
+            finally:
+                session.close()
+        with self._lock:
+            self._stats["write_errors"] += 1
+        return False
+
+    def query_daily(self, days: int = 7, collaborator_email: str = None) -> List[Dict[str, Any]]:
+        """
+        Consulta os totais diários.
+
+        Args:
+            days: Quantidade de dias (incluindo hoje)
+            collaborator_email: Filtra por colaborador (opcional)
+
+        Returns:
+            Lista de totais por dia, colaborador, etapa e modelo (mais recentes primeiro)
+        """
+        self.flush()
+        since = datetime.utcnow().date() - timedelta(days=max(days, 1) - 1)
+        session = SessionLocal()
+        try:
+            query = session.query(LLMUsageDaily).filter(LLMUsageDaily.day >= since)
+            if collaborator_email:
+                query = query.filter(LLMUsageDaily.collaborator_email == collaborator_email)
+            rows = query.order_by(LLMUsageDaily.day.desc(), LLMUsageDaily.collaborator_email, LLMUsageDaily.prompt_class).all()
+            return [
+                {
+                    "day": row.day.isoformat(),
+                    "collaborator_email": row.collaborator_email or None,
+                    "prompt_class": row.prompt_class,
+                    "model": row.model,
+                    "calls": row.calls,
+                    "prompt_tokens": row.prompt_tokens,
+                    "completion_tokens": row.completion_tokens,
+                    "avg_latency_ms": round(row.total_latency_ms / row.calls, 1) if row.calls else 0.0,
+                    "tokens_per_second": round(row.completion_tokens / (row.total_latency_ms / 1000), 2) if row.total_latency_ms else 0.0
+                }
+                for row in rows
+            ]
+        finally:
+            session.close()
+
+    def query_job(self, job_id: int) -> Dict[str, Any]:
+        """
+        Consulta o uso de tokens de um job, por etapa.
+
+        Args:
+            job_id: ID do TranscriptionJob
+
+        Returns:
+            Dicionário com totais do job e detalhamento por etapa
+        """
+        self.flush()
+        session = SessionLocal()
+        try:
+            rows = (
+                session.query(
+                    LLMUsageRecord.prompt_class,
+                    func.count(LLMUsageRecord.id),
+                    func.sum(LLMUsageRecord.prompt_tokens),
+                    func.sum(LLMUsageRecord.completion_tokens),
+                    func.sum(LLMUsageRecord.latency_ms)
+                )
+                .filter(LLMUsageRecord.job_id == job_id)
+                .group_by(LLMUsageRecord.prompt_class)
+                .all()
+            )
+        finally:
+            session.close()
+        stages = {
+            prompt_class: {
+                "calls": calls,
+                "prompt_tokens": int(prompt_tokens or 0),
+                "completion_tokens": int(completion_tokens or 0),
+                "latency_ms": int(latency_ms or 0)
+            }
+            for prompt_class, calls, prompt_tokens, completion_tokens, latency_ms in rows
+        }
+        return {
+            "job_id": job_id,
+            "calls": sum(stage["calls"] for stage in stages.values()),
+            "prompt_tokens": sum(stage["prompt_tokens"] for stage in stages.values()),
+            "completion_tokens": sum(stage["completion_tokens"] for stage in stages.values()),
+            "latency_ms": sum(stage["latency_ms"] for stage in stages.values()),
+            "stages": stages
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna os totais em memória desde o início do processo.
+
+        Returns:
+            Dicionário com totais por etapa e situação da gravação no banco
+        """
+        with self._lock:
+            totals = {key: dict(value) for key, value in self._totals.items()}
+            stats = dict(self._stats)
+        classes = {}
+        for prompt_class, value in totals.items():
+            latency = value["latency_total"]
+            classes[prompt_class] = {
+                "calls": value["calls"],
+                "prompt_tokens": value["prompt_tokens"],
+                "completion_tokens": value["completion_tokens"],
+                "estimated_calls": value["estimated_calls"],
+                "avg_latency_ms": round(latency / value["calls"] * 1000, 1) if value["calls"] else 0.0,
+                "tokens_per_second": round(value["completion_tokens"] / latency, 2) if latency else 0.0
+            }
+        return {
+            "enabled": self.enabled,
+            "calls": sum(value["calls"] for value in classes.values()),
+            "prompt_tokens": sum(value["prompt_tokens"] for value in classes.values()),
+            "completion_tokens": sum(value["completion_tokens"] for value in classes.values()),
+            "pending": self._queue.qsize(),
+            **stats,
+            "classes": classes
+        }
+
+
+_shared_recorder: Optional[UsageRecorder] = None
+_shared_recorder_lock = threading.Lock()
+
+
+def get_shared_usage_recorder() -> UsageRecorder:
+    """
+    Retorna o contabilizador de uso compartilhado pelo processo.
+
+    Returns:
+        Instância única de UsageRecorder
+    """
+    global _shared_recorder
+    with _shared_recorder_lock:
+        if _shared_recorder is None:
+            _shared_recorder = UsageRecorder()
+        return _shared_recorder
@@ -0,0 +1,386 @@
+"""
+Veredito estruturado da validação de Histórias de Usuário.
+
+O prompt de validação pede, ao final da análise, um bloco JSON com o veredito
+(aprovado, nota de 0 a 10 e problemas por história). O parser é tolerante:
+aceita o bloco cercado por ```json ou solto no texto, vírgulas sobrando e
+chaves em português ou inglês. Sem JSON válido, procura a linha
+"VEREDITO: APROVADO/REPROVADO"; só então recorre à contagem de palavras-chave.
+
+Também mantém as métricas de validação do processo: tentativas por job, taxa
+de aprovação, de qual fonte veio o veredito e quantas reprovações a contagem
+de palavras-chave teria feito em histórias aprovadas (falsas reprovações) e
+quantas chamadas de validação a pré-validação local economizou por dia.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import config
+
+
+# Nomes aceitos para cada campo do veredito (o prompt pede os primeiros)
+APPROVED_KEYS = ("aprovado", "aprovada", "approved")
+SCORE_KEYS = ("nota", "score")
+STORIES_KEYS = ("historias", "histórias", "stories")
+STORY_NAME_KEYS = ("historia", "história", "story", "nome", "titulo", "título")
+ISSUES_KEYS = ("problemas", "issues")
+
+FENCED_JSON = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL | re.IGNORECASE)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+VERDICT_LINE = re.compile(r"VEREDITO\s*:?\s*\**\s*(APROVAD[OA]S?|REPROVAD[OA]S?)", re.IGNORECASE)
+SCORE_LINE = re.compile(r"NOTA\s*:?\s*\**\s*(\d+(?:[.,]\d+)?)", re.IGNORECASE)
+
+# Dias mantidos no histórico de chamadas economizadas
+SAVED_HISTORY_DAYS = 30
+
+# Palavras-chave do parser antigo, mantido como último recurso
+APPROVAL_KEYWORDS = [
+    "aprovado", "aprovada", "aprovadas",
+    "adequado", "adequada", "adequadas",
+    "correto", "correta", "corretas",
+    "bom", "boa", "boas",
+    "satisfatório", "satisfatória", "satisfatórias",
+    "aceitável", "aceitáveis",
+    "válido", "válida", "válidas"
+]
+REJECTION_KEYWORDS = [
+    "reprovado", "reprovada", "reprovadas",
+    "inadequado", "inadequada", "inadequadas",
+    "incorreto", "incorreta", "incorretas",
+    "ruim", "ruins",
+    "insatisfatório", "insatisfatória", "insatisfatórias",
+    "inaceitável", "inaceitáveis",
+    "inválido", "inválida", "inválidas",
+    "problema", "problemas",
+    "erro", "erros",
+    "falta", "faltam",
+    "melhorar", "melhorias"
+]
+IMPROVEMENT_INDICATORS = [
+    "sugestão", "sugestões", "recomendação", "recomendações",
+    "melhorar", "refinar", "ajustar", "corrigir"
+]
+
+
+def keyword_verdict(response: str) -> bool:
+    """
+    Decide a aprovação pela contagem de palavras-chave (parser antigo).
+
+    Args:
+        response: Resposta da LLM sobre validação
+
+    Returns:
+        True se a contagem indicar aprovação
+    """
+    response_lower = response.lower()
+    approval_count = sum(1 for keyword in APPROVAL_KEYWORDS if keyword in response_lower)
+    rejection_count = sum(1 for keyword in REJECTION_KEYWORDS if keyword in response_lower)
+    if rejection_count != approval_count:
+        return approval_count > rejection_count
+    # Em caso de empate, reprovar se houver sugestões de melhoria
+    return not any(indicator in response_lower for indicator in IMPROVEMENT_INDICATORS)
+
+
+def _pick(data: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    """Retorna o valor da primeira chave presente (sem diferenciar maiúsculas)."""
+    lowered = {str(key).lower(): value for key, value in data.items()}
+    for key in keys:
+        if key in lowered:
+            return lowered[key]
+    return None
+
+
+def _as_bool(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in ("true", "sim", "yes", "aprovado", "aprovada"):
+            return True
+        if normalized in ("false", "nao", "não", "no", "reprovado", "reprovada"):
+            return False
+    return None
+
+
+def _as_score(value: Any) -> Optional[float]:
+    try:
+        score = float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+    return min(max(score, 0.0), 10.0)
+
+
+def _as_issues(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value.strip()] if value.strip() else []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return []
+
+
+def _json_candidates(response: str) -> List[str]:
+    """Blocos JSON candidatos, do último para o primeiro (o veredito fica no fim)."""
+    candidates = [match.group(1) for match in FENCED_JSON.finditer(response)]
+    # Objetos soltos: do último "{" de nível mais externo até a chave que o fecha
+    depth, start = 0, None
+    loose = []
+    for index, char in enumerate(response):
+        if char == "{":
+            if depth == 0:
+                start = index
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+            if depth == 0 and start is not None:
+                loose.append(response[start:index + 1])
+    candidates.extend(loose)
+    return list(reversed(candidates))
+
+
+def _load_json(candidate: str) -> Optional[Dict[str, Any]]:
+    """Carrega um bloco JSON tolerando vírgulas sobrando, aspas tipográficas e True/False."""
+    attempts = (
+        candidate,
+        TRAILING_COMMA.sub(r"\1", candidate.replace("“", '"').replace("”", '"'))
+    )
+    for text in attempts:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            text = re.sub(r"\bTrue\b", "true", re.sub(r"\bFalse\b", "false", text))
+            try:
+                data = json.loads(text)
+            except ValueError:
+                continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def _from_json(data: Dict[str, Any], approval_score: float) -> Optional[Dict[str, Any]]:
+    """Monta o veredito a partir do objeto JSON, ou None se não for um veredito."""
+    approved = _as_bool(_pick(data, APPROVED_KEYS))
+    score = _as_score(_pick(data, SCORE_KEYS))
+    if approved is None and score is None:
+        return None
+
+    stories = []
+    issues = []
+    raw_stories = _pick(data, STORIES_KEYS)
+    for item in raw_stories if isinstance(raw_stories, list) else []:
+        if not isinstance(item, dict):
+            continue
+        name = str(_pick(item, STORY_NAME_KEYS) or "").strip()
+        story_issues = _as_issues(_pick(item, ISSUES_KEYS))
+        story_approved = _as_bool(_pick(item, APPROVED_KEYS))
+        stories.append({
+            "story": name,
+            "approved": not story_issues if story_approved is None else story_approved,
+            "issues": story_issues
+        })
+        issues.extend(f"{name}: {issue}" if name else issue for issue in story_issues)
+    issues.extend(_as_issues(_pick(data, ISSUES_KEYS)))
+
+    if approved is None:
+        approved = score >= approval_score
+    return {"approved": approved, "score": score, "stories": stories, "issues": issues}
+
+
+def parse_validation_verdict(response: str, approval_score: float = None) -> Dict[str, Any]:
+    """
+    Extrai o veredito da resposta de validação.
+
+    Args:
+        response: Resposta da LLM sobre validação
+        approval_score: Nota mínima para aprovar quando o JSON não traz o campo
+            "aprovado" (opcional, usa VALIDATION_APPROVAL_SCORE)
+
+    Returns:
+        Dicionário com approved, score (ou None), stories, issues e source
+        ('json', 'marker' ou 'keywords')
+    """
+    if approval_score is None:
+        approval_score = config.VALIDATION_APPROVAL_SCORE
+    response = response or ""
+
+    for candidate in _json_candidates(response):
+        data = _load_json(candidate)
+        verdict = _from_json(data, approval_score) if data else None
+        if verdict:
+            verdict["source"] = "json"
+            return verdict
+
+    marker = VERDICT_LINE.findall(response)
+    if marker:
+        score_match = SCORE_LINE.findall(response)
+        return {
+            "approved": marker[-1].upper().startswith("APROVAD"),
+            "score": _as_score(score_match[-1]) if score_match else None,
+            "stories": [],
+            "issues": [],
+            "source": "marker"
+        }
+
+    return {
+        "approved": keyword_verdict(response),
+        "score": None,
+        "stories": [],
+        "issues": [],
+        "source": "keywords"
+    }
+
+
+class ValidationStats:
+    """Métricas de validação: vereditos, fontes, falsas reprovações e tentativas por job."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            "validations": 0,
+            "approved": 0,
+            "rejected": 0,
+            "source_json": 0,
+            "source_marker": 0,
+            "source_keywords": 0,
+            "source_rules": 0,
+            "keyword_false_rejections": 0,
+            "keyword_false_approvals": 0,
+            "jobs": 0,
+            "jobs_approved": 0,
+            "jobs_first_attempt": 0,
+            "job_attempts": 0,
+            "prevalidations": 0,
+            "prevalidation_failures": 0,
+            "prevalidation_uncertain": 0,
+            "llm_validations_saved": 0
+        }
+        self._score_total = 0.0
+        self._scored = 0
+        self._saved_by_day: "OrderedDict[str, int]" = OrderedDict()
+        # Tokens de prompt por número da tentativa: {tentativa: [soma, quantidade]}
+        self._prompt_tokens: Dict[int, List[int]] = {}
+
+    def record_verdict(self, verdict: Dict[str, Any], keyword_approved: bool) -> None:
+        """
+        Registra um veredito de validação.
+
+        Args:
+            verdict: Resultado de parse_validation_verdict
+            keyword_approved: Decisão que a contagem de palavras-chave teria tomado
+        """
+        with self._lock:
+            self._stats["validations"] += 1
+            self._stats["approved" if verdict["approved"] else "rejected"] += 1
+            self._stats[f"source_{verdict['source']}"] += 1
+            if verdict["source"] in ("json", "marker"):
+                # O parser antigo reprovaria uma validação aprovada (e vice-versa)
+                if verdict["approved"] and not keyword_approved:
+                    self._stats["keyword_false_rejections"] += 1
+                elif keyword_approved and not verdict["approved"]:
+                    self._stats["keyword_false_approvals"] += 1
+            if verdict.get("score") is not None:
+                self._score_total += verdict["score"]
+                self._scored += 1
+
+    def record_prevalidation(self, passed: bool, llm_skipped: bool, uncertain: bool = False) -> None:
+        """
+        Registra uma pré-validação local.
+
+        Args:
+            passed: Se a estrutura das histórias passou nas regras
+            llm_skipped: Se a validação pela LLM deixou de ser chamada
+            uncertain: Se as regras ficaram na dúvida (decisão passada à LLM)
+        """
+        with self._lock:
+            self._stats["prevalidations"] += 1
+            if uncertain:
+                self._stats["prevalidation_uncertain"] += 1
+            elif not passed:
+                self._stats["prevalidation_failures"] += 1
+            if llm_skipped:
+                self._stats["llm_validations_saved"] += 1
+                day = time.strftime("%Y-%m-%d")
+                self._saved_by_day[day] = self._saved_by_day.get(day, 0) + 1
+                while len(self._saved_by_day) > SAVED_HISTORY_DAYS:
+                    self._saved_by_day.popitem(last=False)
+
+    def record_attempt_prompt(self, attempt: int, prompt_tokens: int) -> None:
+        """
+        Registra o tamanho do prompt de geração de uma tentativa.
+
+        Args:
+            attempt: Número da tentativa (1 = geração inicial, 2+ = correções)
+            prompt_tokens: Tokens estimados do prompt enviado
+        """
+        with self._lock:
+            totals = self._prompt_tokens.setdefault(attempt, [0, 0])
+            totals[0] += prompt_tokens
+            totals[1] += 1
+
+    def record_job(self, attempts: int, approved: bool) -> None:
+        """
+        Registra o desfecho de um job de geração com auto-correção.
+
+        Args:
+            attempts: Número de tentativas de geração usadas
+            approved: Se alguma tentativa foi aprovada
+        """
+        with self._lock:
+            self._stats["jobs"] += 1
+            self._stats["job_attempts"] += attempts
+            if approved:
+                self._stats["jobs_approved"] += 1
+                if attempts == 1:
+                    self._stats["jobs_first_attempt"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna as métricas de validação.
+
+        Returns:
+            Dicionário com contadores, taxas, média de tentativas por job,
+            tokens de prompt médios por tentativa e chamadas de validação
+            economizadas por dia
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            score_total, scored = self._score_total, self._scored
+            stats["llm_validations_saved_by_day"] = dict(self._saved_by_day)
+            stats["avg_prompt_tokens_by_attempt"] = {
+                attempt: round(total / count) for attempt, (total, count) in sorted(self._prompt_tokens.items())
+            }
+        structured = stats["source_json"] + stats["source_marker"]
+        llm_validations = stats["validations"] - stats["source_rules"]
+        stats["approval_rate"] = round(stats["approved"] / stats["validations"], 4) if stats["validations"] else 0.0
+        stats["structured_rate"] = round(structured / llm_validations, 4) if llm_validations else 0.0
+        # Fração dos vereditos estruturados que a contagem de palavras-chave teria reprovado por engano
+        stats["keyword_false_rejection_rate"] = round(stats["keyword_false_rejections"] / structured, 4) if structured else 0.0
+        stats["avg_score"] = round(score_total / scored, 2) if scored else None
+        stats["avg_attempts_per_job"] = round(stats["job_attempts"] / stats["jobs"], 3) if stats["jobs"] else 0.0
+        stats["first_attempt_approval_rate"] = round(stats["jobs_first_attempt"] / stats["jobs"], 4) if stats["jobs"] else 0.0
+        return stats
+
+
+_shared_stats: Optional[ValidationStats] = None
+_shared_stats_lock = threading.Lock()
+
+
+def get_shared_validation_stats() -> ValidationStats:
+    """
+    Retorna as métricas de validação compartilhadas pelo processo.
+
+    Returns:
+        Instância única de ValidationStats
+    """
+    global _shared_stats
+    with _shared_stats_lock:
+        if _shared_stats is None:
+            _shared_stats = ValidationStats()
+        return _shared_stats